@@ -11,7 +11,9 @@ from src.core.config import settings
 from src.core.base_model import Base
 from src.dishes.model import Dish
 from src.collections.model import Collection
+from src.tags.model import Tag, DishTag
 from src.auth.model import User, AccessToken
+from src.weather.model import WeatherLog, WeatherDaily
 # import src.dishes.model
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,109 @@
+"""菜品列表序列化基准：ORM 实体 + 响应模型 对比 列投影 + 行直接序列化
+
+    uv run python bench_dish_list.py                  # 临时 SQLite 文件
+    uv run python bench_dish_list.py --limit 100 --rounds 50
+
+每种方式在新的会话中查询一页（默认 limit=500）并得到 JSON 字节，统计：
+- 每页耗时（中位数 / p95）
+- 单次调用的 Python 内存峰值（tracemalloc，单独一轮测量，避免影响计时）
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+
+if os.getenv("DB_TYPE", "sqlite") == "sqlite":
+    os.environ["SQLITE_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+
+from src.core.base_model import Base
+from src.core.database import engine, SessionFactory
+import src.auth.model, src.collections.model, src.tags.model  # noqa: F401  注册全部映射
+from src.dishes.model import Dish
+from src.dishes.repository import DishRepository
+from src.dishes.schema import DISH_FIELDS, DishResponse, dish_rows_json
+
+SEED_DISHES = 5000
+DESCRIPTION = "台风天锁门独享，狂风在外，福气在罐。" * 20  # 约 360 字的长描述
+
+_RESPONSE_ADAPTER = TypeAdapter(list[DishResponse])
+
+
+async def seed() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with SessionFactory() as session:
+        await session.execute(
+            insert(Dish),
+            [{"name": f"菜品{i}", "description": DESCRIPTION} for i in range(SEED_DISHES)],
+        )
+        await session.commit()
+
+
+async def orm_page(limit: int) -> bytes:
+    """原实现：加载完整的 Dish 实体，再逐个转换为 DishResponse"""
+    async with SessionFactory() as session:
+        query = (
+            select(Dish).where(Dish.deleted_at.is_(None)).order_by(Dish.id).limit(limit)
+        )
+        dishes = list(await session.scalars(query))
+        return _RESPONSE_ADAPTER.dump_json(
+            [DishResponse.model_validate(dish) for dish in dishes]
+        )
+
+
+async def rows_page(limit: int, fields: tuple[str, ...]) -> bytes:
+    """新实现：只查询所需列，行映射直接序列化"""
+    async with SessionFactory() as session:
+        rows = await DishRepository(session).get_all(limit=limit, columns=fields)
+        return dish_rows_json([dict(row) for row in rows])
+
+
+async def measure(
+    run: Callable[[], Awaitable[bytes]], rounds: int
+) -> tuple[float, float, float, int]:
+    await run()  # 预热：编译语句缓存、建立连接
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        body = await run()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    await run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    return statistics.median(timings), p95, peak / 1024, len(body)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="菜品列表序列化基准")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=30)
+    args = parser.parse_args()
+
+    await seed()
+    cases = [
+        ("ORM + DishResponse", lambda: orm_page(args.limit)),
+        ("rows (all fields)", lambda: rows_page(args.limit, DISH_FIELDS)),
+        ("rows fields=id,name", lambda: rows_page(args.limit, ("name", "id"))),
+    ]
+
+    print(f"\nlimit={args.limit}  rounds={args.rounds}  dishes={SEED_DISHES}")
+    print(f"{'case':<22}{'p50 ms':>10}{'p95 ms':>10}{'peak KiB':>12}{'body KiB':>10}")
+    for name, run in cases:
+        p50, p95, peak, size = await measure(run, args.rounds)
+        print(f"{name:<22}{p50:>10.2f}{p95:>10.2f}{peak:>12.0f}{size / 1024:>10.0f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,323 @@
+"""查询计划审计：在种子数据库上执行每个仓库查询的 EXPLAIN，发现大表全表扫描即失败
+
+    uv run python query_plan_audit.py                     # 临时 SQLite 文件
+    DB_TYPE=postgres uv run python query_plan_audit.py    # 使用配置的 PostgreSQL（请指向空的临时库）
+
+每个用例实际调用一次仓库方法，记录其执行的 SQL，再逐条执行
+EXPLAIN QUERY PLAN（SQLite）或 EXPLAIN (FORMAT JSON)（PostgreSQL，关闭 enable_seqscan）。
+确实无法走索引的查询需要在用例中显式声明允许扫描的表及原因。
+写操作用例同时限制语句条数，防止写路径退回 “先查询、再修改、提交后再 refresh” 的多次往返。
+"""
+import asyncio
+import os
+import random
+import re
+import sys
+import tempfile
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+if os.getenv("DB_TYPE", "sqlite") == "sqlite":
+    os.environ["SQLITE_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "audit.sqlite3")
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from src.core.config import settings
+from src.core.base_model import Base
+from src.core.database import engine, SessionFactory
+from src.auth.model import User
+from src.dishes.model import Dish
+from src.dishes.repository import DishRepository
+from src.collections.model import Collection, CollectionDish
+from src.collections.repository import CollectionRepository
+from src.tags.model import DishTag, Tag
+
+# 需要审计的大表及种子数据量
+SEED_DISHES = 5000
+SEED_USERS = 50
+SEED_COLLECTIONS_PER_USER = 40
+SEED_DISHES_PER_COLLECTION = 10
+SEED_TAGS = 20
+LARGE_TABLES = {"dishes", "collections", "collection_dish", "dish_tag", "user"}
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX \w+| USING INTEGER PRIMARY KEY)?")
+
+
+@dataclass
+class Seed:
+    user: User
+    dish_id: int
+    dish_ids: list[int]
+    collection_id: int
+    free_dish_id: int  # 不在 collection_id 中的菜品
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[AsyncSession, Seed], Awaitable[object]]
+    # 表名 → 允许全表扫描的原因
+    allow_scan: dict[str, str] = field(default_factory=dict)
+    # 允许执行的最多语句条数（None 表示不限制）
+    max_statements: int | None = None
+
+
+CASES = [
+    Case("dishes.get_by_id", lambda s, d: DishRepository(s).get_by_id(d.dish_id)),
+    Case("dishes.get_updated_at", lambda s, d: DishRepository(s).get_updated_at(d.dish_id)),
+    Case("dishes.get_by_ids", lambda s, d: DishRepository(s).get_by_ids(d.dish_ids)),
+    Case(
+        "dishes.get_rows_by_ids",
+        lambda s, d: DishRepository(s).get_rows_by_ids(d.dish_ids, ("id", "name")),
+    ),
+    Case(
+        "dishes.get_all order_by=id",
+        lambda s, d: DishRepository(s).get_all(order_by="id", limit=20, offset=100),
+        {"dishes": "按主键顺序分页，LIMIT 截断扫描"},
+    ),
+    Case(
+        "dishes.get_all order_by=name desc",
+        lambda s, d: DishRepository(s).get_all(order_by="name", direction="desc", limit=20),
+    ),
+    Case(
+        "dishes.get_all order_by=created_at",
+        lambda s, d: DishRepository(s).get_all(order_by="created_at", limit=20),
+    ),
+    Case(
+        "dishes.get_all tag ids",
+        lambda s, d: DishRepository(s).get_all(dish_ids=d.dish_ids, order_by="name"),
+    ),
+    Case(
+        "dishes.get_all fields=id,name",
+        lambda s, d: DishRepository(s).get_all(order_by="name", limit=20, columns=("id", "name")),
+    ),
+    Case(
+        "dishes.get_all search",
+        lambda s, d: DishRepository(s).get_all(search="鱼", limit=20),
+        {"dishes": "前导通配符 ILIKE 无法使用 B-tree 索引（PostgreSQL 可改用 pg_trgm）"},
+    ),
+    Case(
+        "dishes.get_ids tag ids",
+        lambda s, d: DishRepository(s).get_ids(dish_ids=d.dish_ids),
+    ),
+    Case(
+        "dishes.collections (reverse lookup)",
+        lambda s, d: s.scalars(
+            select(Dish).options(selectinload(Dish.collections)).where(Dish.id == d.dish_id)
+        ),
+    ),
+    Case(
+        "collections.get_by_id",
+        lambda s, d: CollectionRepository(s).get_by_id(d.collection_id, d.user),
+    ),
+    Case(
+        "collections.get_all",
+        lambda s, d: CollectionRepository(s).get_all(current_user=d.user),
+    ),
+    Case(
+        "collections.get_all order_by=name",
+        lambda s, d: CollectionRepository(s).get_all(order_by="name", current_user=d.user),
+    ),
+    Case(
+        "collections.get_dish_ids_for_user",
+        lambda s, d: CollectionRepository(s).get_dish_ids_for_user(d.user),
+    ),
+    Case(
+        "dishes.create",
+        lambda s, d: DishRepository(s).create({"name": "审计菜品", "description": None}),
+        max_statements=1,
+    ),
+    Case(
+        "dishes.update",
+        lambda s, d: DishRepository(s).update({"description": "审计"}, d.dish_id),
+        max_statements=1,
+    ),
+    Case(
+        "collections.create",
+        lambda s, d: CollectionRepository(s).create({"name": "审计收藏"}, d.user),
+        max_statements=1,
+    ),
+    Case(
+        "collections.update",
+        lambda s, d: CollectionRepository(s).update({"note": "审计"}, d.collection_id, d.user),
+        max_statements=2,
+    ),
+    Case(
+        "collections.add_dish_to_collection",
+        lambda s, d: CollectionRepository(s).add_dish_to_collection(
+            d.collection_id, d.free_dish_id, d.user
+        ),
+        max_statements=4,
+    ),
+    Case(
+        "collections.remove_dish_from_collection",
+        lambda s, d: CollectionRepository(s).remove_dish_from_collection(
+            d.collection_id, d.free_dish_id, d.user
+        ),
+        max_statements=3,
+    ),
+]
+
+
+async def seed() -> Seed:
+    rng = random.Random(42)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with SessionFactory() as session:
+        await session.execute(
+            insert(Dish),
+            [
+                {"name": f"测试菜品{i}", "description": rng.choice(["红烧鱼", "清蒸", "麻辣", None])}
+                for i in range(SEED_DISHES)
+            ],
+        )
+        users = [
+            {
+                "id": uuid.uuid4(),
+                "email": f"audit{i}@example.com",
+                "hashed_password": "x",
+                "is_active": True,
+                "is_superuser": False,
+                "is_verified": True,
+            }
+            for i in range(SEED_USERS)
+        ]
+        await session.execute(insert(User), users)
+        await session.execute(
+            insert(Collection),
+            [
+                {"name": f"收藏{u}-{c}", "user_id": user["id"]}
+                for u, user in enumerate(users)
+                for c in range(SEED_COLLECTIONS_PER_USER)
+            ],
+        )
+        collection_ids = list(await session.scalars(select(Collection.id)))
+        dish_ids = list(await session.scalars(select(Dish.id)))
+        await session.execute(
+            insert(CollectionDish),
+            [
+                {"collection_id": collection_id, "dish_id": dish_id}
+                for collection_id in collection_ids
+                for dish_id in rng.sample(dish_ids, SEED_DISHES_PER_COLLECTION)
+            ],
+        )
+        await session.execute(
+            insert(Tag), [{"kind": "cuisine", "name": f"标签{i}"} for i in range(SEED_TAGS)]
+        )
+        tag_ids = list(await session.scalars(select(Tag.id)))
+        await session.execute(
+            insert(DishTag),
+            [{"dish_id": dish_id, "tag_id": rng.choice(tag_ids)} for dish_id in dish_ids],
+        )
+        await session.commit()
+
+        user = await session.get(User, users[0]["id"])
+        collection_id = await session.scalar(
+            select(Collection.id).where(Collection.user_id == user.id).limit(1)
+        )
+        members = set(
+            await session.scalars(
+                select(CollectionDish.dish_id).where(CollectionDish.collection_id == collection_id)
+            )
+        )
+
+    # 更新统计信息，让查询规划器看到真实的数据分布
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("ANALYZE")
+
+    return Seed(
+        user=user,
+        dish_id=dish_ids[len(dish_ids) // 2],
+        dish_ids=sorted(rng.sample(dish_ids, 50)),
+        collection_id=collection_id,
+        free_dish_id=next(i for i in dish_ids if i not in members),
+    )
+
+
+def _sqlite_scans(rows) -> set[str]:
+    scans = set()
+    for row in rows:
+        match = _SQLITE_SCAN.match(row[-1])
+        # 带 USING INDEX 的扫描是按索引顺序读取，不算全表扫描
+        if match and match.group(0) == f"SCAN {match.group(1)}":
+            scans.add(match.group(1))
+    return scans
+
+
+def _postgres_scans(plan: dict) -> set[str]:
+    scans = set()
+    if plan.get("Node Type") == "Seq Scan":
+        scans.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        scans |= _postgres_scans(child)
+    return scans
+
+
+async def explain(statements: list[tuple[str, object]]) -> set[str]:
+    scans: set[str] = set()
+    async with engine.connect() as conn:
+        if settings.db_type == "postgres":
+            # 数据量小时规划器也可能选择顺序扫描；关闭后只有无索引可用时才会出现
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                continue
+            if settings.db_type == "postgres":
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                )
+                scans |= _postgres_scans(result.scalar()[0]["Plan"])
+            else:
+                result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                scans |= _sqlite_scans(result.all())
+    return scans
+
+
+async def audit(case: Case, data: Seed) -> tuple[list[tuple[str, object]], set[str]]:
+    """执行一个用例，返回它执行的语句及其中全表扫描的大表（tests/ 中的回归测试也调用它）"""
+    statements: list[tuple[str, object]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        async with SessionFactory() as session:
+            await case.run(session, data)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    return statements, (await explain(statements)) & LARGE_TABLES
+
+
+async def main() -> int:
+    data = await seed()
+    failures = 0
+
+    for case in CASES:
+        statements, scans = await audit(case, data)
+        violations = scans - case.allow_scan.keys()
+        too_many = case.max_statements is not None and len(statements) > case.max_statements
+        if violations or too_many:
+            failures += 1
+            if violations:
+                print(f"FAIL  {case.name}: 全表扫描 {', '.join(sorted(violations))}")
+            if too_many:
+                print(f"FAIL  {case.name}: 执行了 {len(statements)} 条语句，上限 {case.max_statements}")
+            for statement, _ in statements:
+                print(f"      {' '.join(statement.split())}")
+        else:
+            allowed = "；".join(f"{t}: {case.allow_scan[t]}" for t in sorted(scans))
+            print(f"ok    {case.name}" + (f"（允许扫描 {allowed}）" if allowed else ""))
+
+    await engine.dispose()
+    print(f"\n{len(CASES) - failures}/{len(CASES)} 个查询通过")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
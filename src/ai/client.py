@@ -0,0 +1,159 @@
+# src/ai/client.py
+import asyncio
+import hashlib
+import json
+from collections.abc import AsyncIterator
+
+import httpx
+from loguru import logger
+from redis.asyncio import Redis
+
+from src.core.config import settings
+
+
+def prompt_fingerprint(model: str, prompt: str) -> str:
+    """提示词指纹：模型 + 渲染后的完整提示词，相同指纹直接复用补全结果
+
+    城市、具体温度等变量都在提示词里，指纹不同的请求不会拿到为别的提示词生成的补全。
+    """
+    return hashlib.sha256(f"{model}|{prompt}".encode()).hexdigest()
+
+
+def completion_cache_key(fingerprint: str) -> str:
+    return f"llm:completion:{fingerprint}"
+
+
+class _Generation:
+    """一次上游生成，可被多个订阅者同时消费（逐 token 扇出）"""
+
+    def __init__(self):
+        self.tokens: list[str] = []
+        self.done = False
+        self.error: Exception | None = None
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def push(self, token: str) -> None:
+        self.tokens.append(token)
+        self._notify()
+
+    def finish(self, error: Exception | None = None) -> None:
+        self.done = True
+        self.error = error
+        self._notify()
+
+    async def stream(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.tokens):
+                yield self.tokens[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await changed.wait()
+
+
+class OllamaClient:
+    """本地 Ollama 推理网关
+
+    - 复用外部 API 共享客户端（连接池、熔断），信号量限制并发，避免拖垮其他外部调用；
+    - 请求合并（coalescing）：生成进行中（含排队等待信号量）到达的相同指纹请求
+      直接订阅同一次上游调用，不额外等待窗口；
+    - 补全结果按指纹缓存到 Redis；
+    - 以 token 流的形式向调用方输出。
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        redis: Redis,
+        *,
+        base_url: str = settings.ollama_base_url,
+        timeout: float = settings.ollama_timeout,
+        model: str = settings.ollama_model,
+        max_concurrency: int = settings.ollama_max_concurrency,
+        cache_ttl: int = settings.ollama_cache_ttl,
+    ):
+        self.client = client
+        self.redis = redis
+        self.base_url = base_url.rstrip("/")
+        # 生成耗时远长于普通外部调用，读超时单独设置
+        self.timeout = httpx.Timeout(
+            timeout, connect=settings.http_connect_timeout, pool=settings.http_pool_timeout
+        )
+        self.model = model
+        self.cache_ttl = cache_ttl
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight: dict[str, _Generation] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def stream(self, prompt: str, fingerprint: str) -> AsyncIterator[str]:
+        """流式返回补全结果；命中缓存时一次性返回完整文本"""
+        cached = await self.redis.get(completion_cache_key(fingerprint))
+        if cached:
+            yield cached
+            return
+
+        generation = self._inflight.get(fingerprint)
+        if generation is None:
+            generation = _Generation()
+            self._inflight[fingerprint] = generation
+            task = asyncio.create_task(self._generate(prompt, fingerprint, generation))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        async for token in generation.stream():
+            yield token
+
+    async def complete(self, prompt: str, fingerprint: str) -> str:
+        return "".join([token async for token in self.stream(prompt, fingerprint)])
+
+    async def _generate(
+        self, prompt: str, fingerprint: str, generation: _Generation
+    ) -> None:
+        try:
+            async with self._semaphore:
+                async with self.client.stream(
+                    "POST",
+                    f"{self.base_url}/api/generate",
+                    json={"model": self.model, "prompt": prompt, "stream": True},
+                    timeout=self.timeout,
+                ) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("response"):
+                            generation.push(chunk["response"])
+                        if chunk.get("done"):
+                            break
+
+            await self.redis.set(
+                completion_cache_key(fingerprint),
+                "".join(generation.tokens),
+                ex=self.cache_ttl,
+            )
+            generation.finish()
+        except asyncio.CancelledError:
+            # 关闭时被取消：结束这次生成，正在等待的订阅者随之收到错误而不是一直挂起
+            generation.finish(RuntimeError("LLM 推理已取消"))
+            raise
+        except Exception as e:
+            logger.error("LLM 推理失败: {}", e)
+            generation.finish(e)
+        finally:
+            self._inflight.pop(fingerprint, None)
+
+    async def aclose(self) -> None:
+        """取消进行中的生成；共享客户端由创建方关闭"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
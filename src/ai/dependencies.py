@@ -0,0 +1,9 @@
+from typing import cast
+from fastapi import Request
+
+from src.ai.client import OllamaClient
+
+
+# LLM 推理客户端依赖
+async def get_llm_client(request: Request) -> OllamaClient:
+    return cast(OllamaClient, request.state.llm_client)
@@ -0,0 +1,89 @@
+# src/ai/fake_ollama.py
+"""离线测试 / 压测用的假 Ollama 服务
+
+启动：uv run uvicorn src.ai.fake_ollama:app --port 11434
+环境变量：
+    FAKE_OLLAMA_TOKEN_DELAY  每个 token 的间隔（秒），默认 0.02
+    FAKE_OLLAMA_FIRST_TOKEN_DELAY  首 token 延迟（秒），默认 0.2
+    FAKE_OLLAMA_ERROR_RATE  返回 503 的比例，默认 0（也可运行时通过 PUT /_faults 修改）
+"""
+import asyncio
+import json
+import os
+import random
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+TOKEN_DELAY = float(os.getenv("FAKE_OLLAMA_TOKEN_DELAY", "0.02"))
+FIRST_TOKEN_DELAY = float(os.getenv("FAKE_OLLAMA_FIRST_TOKEN_DELAY", "0.2"))
+
+app = FastAPI(title="Fake Ollama")
+
+class Faults(BaseModel):
+    error_rate: float = float(os.getenv("FAKE_OLLAMA_ERROR_RATE", "0"))
+
+
+faults = Faults()
+
+# 调用计数，用于验证缓存、请求合并与熔断是否生效
+stats = {"generate_calls": 0, "errors": 0}
+
+
+class GenerateRequest(BaseModel):
+    model: str
+    prompt: str
+    stream: bool = True
+
+
+def fake_reply(prompt: str) -> list[str]:
+    """从提示词中挑出前三道菜，拼成确定性的回答"""
+    dishes = prompt.rsplit("：", 1)[-1].split("、")[:3]
+    tokens = ["今天", "推荐", "："]
+    for index, dish in enumerate(dishes, start=1):
+        tokens += [f"{index}. ", dish, "\n"]
+    tokens += ["祝", "你", "吃得", "开心", "！"]
+    return tokens
+
+
+@app.post("/api/generate")
+async def generate(payload: GenerateRequest):
+    stats["generate_calls"] += 1
+    if random.random() < faults.error_rate:
+        stats["errors"] += 1
+        raise HTTPException(status_code=503, detail="Injected upstream failure")
+    tokens = fake_reply(payload.prompt)
+
+    if not payload.stream:
+        await asyncio.sleep(FIRST_TOKEN_DELAY + TOKEN_DELAY * len(tokens))
+        return {"model": payload.model, "response": "".join(tokens), "done": True}
+
+    async def body():
+        await asyncio.sleep(FIRST_TOKEN_DELAY)
+        for token in tokens:
+            yield json.dumps(
+                {"model": payload.model, "response": token, "done": False},
+                ensure_ascii=False,
+            ) + "\n"
+            await asyncio.sleep(TOKEN_DELAY)
+        yield json.dumps({"model": payload.model, "response": "", "done": True}) + "\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+@app.get("/api/tags")
+async def tags():
+    return {"models": [{"name": "qwen3:8b"}]}
+
+
+@app.put("/_faults")
+async def update_faults(payload: Faults):
+    global faults
+    faults = payload
+    return faults
+
+
+@app.get("/stats")
+async def get_stats():
+    return {**stats, "faults": faults}
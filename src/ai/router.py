@@ -0,0 +1,67 @@
+# src/ai/router.py
+import json
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+import httpx
+from loguru import logger
+from redis.asyncio import Redis
+
+from src.ai.client import OllamaClient
+from src.ai.dependencies import get_llm_client
+from src.ai.service import AIRecommendationService
+from src.collections.dependencies import get_collection_session
+from src.collections.repository import CollectionRepository
+from src.core.database import get_db
+from src.core.redis_db import get_cache_redis
+from src.core.rate_limit import RateLimit
+from src.weather.dependencies import get_http_client
+from src.auth.user_manager import get_current_user
+from src.auth.schemas import UserRead
+
+# 本地大模型最慢，按用户严格限流
+router = APIRouter(
+    prefix="/recommendations",
+    tags=["Recommendations"],
+    dependencies=[
+        Depends(RateLimit("llm", user_rate=0.1, user_burst=3, ip_rate=0.5, ip_burst=5))
+    ],
+)
+
+
+# 注入仓库 + 服务层
+async def get_ai_service(
+    session=Depends(get_db),
+    collection_session=Depends(get_collection_session),
+    redis: Redis = Depends(get_cache_redis),
+    client: httpx.AsyncClient = Depends(get_http_client),
+    llm: OllamaClient = Depends(get_llm_client),
+) -> AIRecommendationService:
+    repository = CollectionRepository(collection_session, catalog=session)
+    return AIRecommendationService(repository, redis, client, llm)
+
+
+async def sse_events(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """把 token 流编码为 SSE 事件"""
+    try:
+        async for token in tokens:
+            yield f"data: {json.dumps({'token': token}, ensure_ascii=False)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    except Exception:
+        logger.exception("推荐推流中断")
+        yield f"event: error\ndata: {json.dumps({'detail': 'LLM 推理失败'}, ensure_ascii=False)}\n\n"
+
+
+@router.get("/llm", summary="大模型推荐（SSE 流式输出）")
+async def recommend_with_llm(
+    city: str = Query(..., description="城市名称，例如: 北京"),
+    service: AIRecommendationService = Depends(get_ai_service),
+    current_user: UserRead = Depends(get_current_user),
+) -> StreamingResponse:
+    tokens = await service.stream_recommendation(city, current_user)
+    return StreamingResponse(
+        sse_events(tokens),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
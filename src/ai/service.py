@@ -0,0 +1,68 @@
+# src/ai/service.py
+import json
+from collections.abc import AsyncIterator
+
+import httpx
+from redis.asyncio import Redis
+
+from src.ai.client import OllamaClient, prompt_fingerprint
+from src.collections.repository import CollectionRepository
+from src.core.exception import NotFoundException
+from src.core.tracing import traced
+from src.recommendations.index import (
+    DISHES_KEY,
+    band_key,
+    condition_key,
+    weather_bucket,
+)
+from src.weather.cache_weather import fetch_weather_with_cache
+
+MAX_CANDIDATES = 20  # 提示词中最多列出的候选菜品数
+
+
+@traced("service")
+class AIRecommendationService:
+    """天气 + 收藏记录 → 本地大模型生成推荐"""
+
+    def __init__(
+        self,
+        repository: CollectionRepository,
+        redis: Redis,
+        client: httpx.AsyncClient,
+        llm: OllamaClient,
+    ):
+        self.repository = repository
+        self.redis = redis
+        self.client = client
+        self.llm = llm
+
+    async def stream_recommendation(self, city: str, current_user) -> AsyncIterator[str]:
+        """准备提示词并返回 token 流（校验失败时在开始推流前抛出异常）"""
+        weather = await fetch_weather_with_cache(self.client, self.redis, city)
+        if weather is None:
+            raise NotFoundException("无法获取该城市天气数据")
+        condition, band = weather_bucket(weather)
+
+        dish_ids = sorted(await self.repository.get_dish_ids_for_user(current_user))
+        if not dish_ids:
+            # 没有收藏时，退回到天气倒排索引中的候选菜品
+            candidates = await self.redis.sunion(condition_key(condition), band_key(band))
+            dish_ids = sorted(int(i) for i in candidates)
+        dish_ids = dish_ids[:MAX_CANDIDATES]
+
+        summaries = (
+            await self.redis.hmget(DISHES_KEY, [str(i) for i in dish_ids])
+            if dish_ids
+            else []
+        )
+        dish_list = "、".join(json.loads(s)["name"] for s in summaries if s)
+        if not dish_list:
+            raise NotFoundException("暂无可推荐的菜品")
+
+        prompt = (
+            f"根据今天{weather['城市']}的天气（{weather['天气']} "
+            f"{weather['最低气温']}~{weather['最高气温']}），"
+            f"从以下收藏菜中推荐适合的三道菜：{dish_list}"
+        )
+        fingerprint = prompt_fingerprint(self.llm.model, prompt)
+        return self.llm.stream(prompt, fingerprint)
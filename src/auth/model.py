@@ -1,7 +1,8 @@
 # src/auth/model.py
+from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import String
+from sqlalchemy import DateTime, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from fastapi_users.db import SQLAlchemyBaseUserTableUUID
 from fastapi_users_db_sqlalchemy.access_token import SQLAlchemyBaseAccessTokenTableUUID
@@ -12,6 +13,8 @@ if TYPE_CHECKING:
 
 class User(SQLAlchemyBaseUserTableUUID, Base, DateTimeMixin):
     name: Mapped[str] = mapped_column(String(64), nullable=True)
+    # 软删除时间：删除时同时停用账号，收藏等关联数据由后台任务分批清理
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     
     collections: Mapped[list["Collection"]] = relationship(
         back_populates="user",          # 双向
@@ -1,10 +1,12 @@
 # src/auth/user_manager.py
 import uuid
+from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi import Depends, Request
+from loguru import logger
 from redis.asyncio import Redis
-from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin
+from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin, exceptions
 from fastapi_users.authentication import (
     AuthenticationBackend,
     BearerTransport,
@@ -17,7 +19,10 @@ from fastapi_users.authentication.strategy.db import (
 )
 from fastapi_users.db import SQLAlchemyUserDatabase
 from src.core.config import settings
-from src.core.redis_db import get_auth_redis
+from src.core.client_cache import ClientSideCache
+from src.core.exception import ForbiddenException, UnauthorizedException
+from src.core.redis_db import get_auth_redis, get_cache_redis, get_token_cache
+from src.tasks.queue import enqueue
 from src.auth.dependencies import get_user_db, get_access_token_db
 from src.auth.model import User, AccessToken
 
@@ -30,22 +35,50 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
     reset_password_token_secret = SECRET
     verification_token_secret = SECRET
 
+    def __init__(self, user_db: SQLAlchemyUserDatabase, redis: Redis):
+        super().__init__(user_db)
+        self.redis = redis
+
+    async def get(self, id: uuid.UUID) -> User:
+        """已软删除的用户视为不存在（令牌校验、用户管理接口均经过这里）"""
+        user = await super().get(id)
+        if user.deleted_at is not None:
+            raise exceptions.UserNotExists()
+        return user
+
+    async def delete(self, user: User, request: Optional[Request] = None) -> None:
+        """软删除：立即停用并隐藏账号，收藏等关联数据交给后台任务分批清理"""
+        await self.on_before_delete(user, request)
+        await self.user_db.update(
+            user, {"is_active": False, "deleted_at": datetime.now(timezone.utc)}
+        )
+        # 账号已停用，清理任务不设发起者，仅超级用户可查询
+        job_id = await enqueue(self.redis, "users.purge", user_id=str(user.id))
+        logger.info("User {} has been deleted. Purge job: {}", user.id, job_id)
+        await self.on_after_delete(user, request)
+
     async def on_after_register(self, user: User, request: Optional[Request] = None):
-        print(f"User {user.id} has registered.")
+        logger.info("User {} has registered.", user.id)
 
     async def on_after_forgot_password(
         self, user: User, token: str, request: Optional[Request] = None
     ):
-        print(f"User {user.id} has forgot their password. Reset token: {token}")
+        logger.info("User {} has forgot their password.", user.id)
+        # 令牌可直接重置密码，只在调试级别输出（尚未接入邮件发送）
+        logger.debug("Reset token for user {}: {}", user.id, token)
 
     async def on_after_request_verify(
         self, user: User, token: str, request: Optional[Request] = None
     ):
-        print(f"Verification requested for user {user.id}. Verification token: {token}")
+        logger.info("Verification requested for user {}.", user.id)
+        logger.debug("Verification token for user {}: {}", user.id, token)
 
 
-async def get_user_manager(user_db: SQLAlchemyUserDatabase = Depends(get_user_db)):
-    yield UserManager(user_db)
+async def get_user_manager(
+    user_db: SQLAlchemyUserDatabase = Depends(get_user_db),
+    redis: Redis = Depends(get_cache_redis),
+):
+    yield UserManager(user_db, redis)
 
 
 # cookie 传输方式
@@ -62,9 +95,42 @@ def get_database_strategy(
     return DatabaseStrategy(access_token_db, lifetime_seconds=3600)
 
 
+TOKEN_KEY_PREFIX = "fastapi_users_token:"
+
+
+class CachedRedisStrategy(RedisStrategy[User, uuid.UUID]):
+    """令牌查询优先读进程内缓存（服务端推送失效），每个请求省去一次 Redis 往返"""
+
+    def __init__(self, redis: Redis, cache: ClientSideCache, lifetime_seconds: int):
+        super().__init__(redis, lifetime_seconds, key_prefix=TOKEN_KEY_PREFIX)
+        self.cache = cache
+
+    async def read_token(self, token, user_manager):
+        if token is None:
+            return None
+
+        user_id = await self.cache.get(f"{self.key_prefix}{token}")
+        if user_id is None:
+            return None
+
+        try:
+            parsed_id = user_manager.parse_id(user_id)
+            return await user_manager.get(parsed_id)
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+
+    async def destroy_token(self, token: str, user: User) -> None:
+        await super().destroy_token(token, user)
+        # 本进程立即失效，不必等待服务端通知
+        self.cache.invalidate([f"{self.key_prefix}{token}"])
+
+
 # redis策略
-def get_redis_strategy(auth_redis: Redis = Depends(get_auth_redis)) -> RedisStrategy:
-    return RedisStrategy(auth_redis, lifetime_seconds=3600)
+def get_redis_strategy(
+    auth_redis: Redis = Depends(get_auth_redis),
+    token_cache: ClientSideCache = Depends(get_token_cache),
+) -> RedisStrategy:
+    return CachedRedisStrategy(auth_redis, token_cache, lifetime_seconds=3600)
 
 
 # 数据库认证后端
@@ -86,12 +152,31 @@ fastapi_users = FastAPIUsers[User, uuid.UUID](
     get_user_manager, [redis_auth_backend, database_auth_backend]
 )
 
+# 可选用户（未登录时为 None），用于限流、剖析等不强制认证的场景
+# 下面几种依赖都建立在它之上：FastAPI 只按同一个依赖函数缓存结果，
+# 各自调用 fastapi_users.current_user() 会让同一请求重复解析令牌并查询用户
+current_user_optional = fastapi_users.current_user(active=True, optional=True)
+
+
 # 默认为获取当前激活用户
-get_current_user = fastapi_users.current_user(active=True)
+async def get_current_user(user: User | None = Depends(current_user_optional)) -> User:
+    if user is None:
+        raise UnauthorizedException("Unauthorized")
+    return user
+
 
 """ 以下为不同的获取当前用户的策略，可根据需要选择 """
 
+
 # 获取当前激活且已验证用户
-current_verified_user = fastapi_users.current_user(active=True, verified=True)
+async def current_verified_user(user: User = Depends(get_current_user)) -> User:
+    if not user.is_verified:
+        raise ForbiddenException("Forbidden")
+    return user
+
+
 # 获取当前激活且为超级用户
-current_superuser = fastapi_users.current_user(active=True, superuser=True)
+async def current_superuser(user: User = Depends(get_current_user)) -> User:
+    if not user.is_superuser:
+        raise ForbiddenException("Forbidden")
+    return user
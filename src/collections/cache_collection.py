@@ -0,0 +1,217 @@
+# src/collections/cache_collection.py
+import json
+import uuid
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import WatchError
+
+from src.collections.schema import CollectionResponse
+from src.core.etag import make_etag, table_version_key
+from src.core.exception import NotFoundException
+from src.dishes.schema import DishResponse
+
+CACHE_TTL = 60 * 60  # 收藏变动不频繁，快照缓存 1 小时，写路径会主动刷新
+FILL_TTL_MS = 10_000  # 缓存未命中时回源的租约时长，超时的回源结果不再写入快照
+
+# 与 src.dishes.service.DISHES_VERSION_KEY 相同（直接导入会循环依赖）
+_DISHES_VERSION_KEY = table_version_key("dishes")
+
+# 回源结果只在期间没有写入时才落入快照：
+# 收藏的写路径会删除租约，菜品的写路径会先递增菜品表版本号再改写快照
+_FILL_SCRIPT = """
+if redis.call('GET', KEYS[2]) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[2])
+if (redis.call('GET', KEYS[3]) or '0') ~= ARGV[2] then
+    return 0
+end
+if not redis.call('SET', KEYS[1], ARGV[3], 'EX', ARGV[4], 'NX') then
+    return 0
+end
+for i = 4, #KEYS do
+    redis.call('SADD', KEYS[i], ARGV[5])
+end
+return 1
+"""
+
+
+def collection_cache_key(collection_id: int) -> str:
+    return f"collection:{collection_id}"
+
+
+def collection_fill_key(collection_id: int) -> str:
+    return f"collection:{collection_id}:fill"
+
+
+def dish_collections_key(dish_id: int) -> str:
+    """反向索引：包含该菜品的收藏 id 集合，用于菜品修改时定位快照"""
+    return f"dish:{dish_id}:collections"
+
+
+def collection_json(data: dict) -> bytes:
+    """收藏响应体的统一序列化方式，保证相同内容得到相同字节（预压缩按内容哈希缓存）"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def collection_etag(collection_id: int, body: bytes) -> str:
+    """按响应体内容生成 ETag：收藏本身与其中菜品的任何变化都会改变响应体，
+    其他菜品的修改不影响该收藏的 ETag"""
+    return make_etag("collection", collection_id, body.decode("utf-8"))
+
+
+def _snapshot(data: dict, user_id: str) -> dict:
+    return {
+        "user_id": user_id,
+        "etag": collection_etag(data["id"], collection_json(data)),
+        "data": data,
+    }
+
+
+async def get_cached_collection_body(
+    redis: Redis, collection_id: int, user_id: uuid.UUID
+) -> tuple[bytes, str] | None:
+    """一次 GET 读取收藏快照，并用缓存中的 user_id 做归属校验，直接返回 (响应体, ETag)"""
+    cached = await redis.get(collection_cache_key(collection_id))
+    if not cached:
+        return None
+    snapshot = json.loads(cached)
+    if snapshot["user_id"] != str(user_id):
+        # 与数据库查询保持一致：不属于当前用户即视为不存在
+        raise NotFoundException(f"Collection with id {collection_id} not found")
+    # 跳过 pydantic 校验与再次序列化
+    body = collection_json(snapshot["data"])
+    # 升级前写入的快照没有 etag 字段，按内容现算
+    return body, snapshot.get("etag") or collection_etag(collection_id, body)
+
+
+async def cache_collection(
+    redis: Redis, collection: CollectionResponse, user_id: uuid.UUID
+) -> None:
+    """写入（重建）收藏快照，并维护 菜品 → 收藏 的反向索引"""
+    snapshot = _snapshot(collection.model_dump(mode="json"), str(user_id))
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.set(
+            collection_cache_key(collection.id),
+            json.dumps(snapshot, ensure_ascii=False),
+            ex=CACHE_TTL,
+        )
+        # 使进行中的回源作废，避免旧数据覆盖刚写入的快照
+        pipe.delete(collection_fill_key(collection.id))
+        for dish in collection.dishes:
+            pipe.sadd(dish_collections_key(dish.id), collection.id)
+        await pipe.execute()
+
+
+async def begin_collection_fill(redis: Redis, collection_id: int) -> tuple[str, str]:
+    """缓存未命中、查询数据库之前调用：登记回源租约并记下菜品表版本号"""
+    token = uuid.uuid4().hex
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.set(collection_fill_key(collection_id), token, px=FILL_TTL_MS)
+        pipe.get(_DISHES_VERSION_KEY)
+        _, version = await pipe.execute()
+    return token, version or "0"
+
+
+async def fill_collection_cache(
+    redis: Redis,
+    collection: CollectionResponse,
+    user_id: uuid.UUID,
+    fill: tuple[str, str],
+) -> bool:
+    """把回源结果写入快照（比较并设置），期间收藏或菜品被修改时放弃写入，返回是否写入"""
+    token, version = fill
+    snapshot = _snapshot(collection.model_dump(mode="json"), str(user_id))
+    script = redis.register_script(_FILL_SCRIPT)
+    return bool(
+        await script(
+            keys=[
+                collection_cache_key(collection.id),
+                collection_fill_key(collection.id),
+                _DISHES_VERSION_KEY,
+                *(dish_collections_key(dish.id) for dish in collection.dishes),
+            ],
+            args=[token, version, json.dumps(snapshot, ensure_ascii=False), CACHE_TTL, collection.id],
+        )
+    )
+
+
+async def drop_dish_from_index(redis: Redis, collection_id: int, dish_id: int) -> None:
+    """菜品移出收藏后，同步清理反向索引"""
+    await redis.srem(dish_collections_key(dish_id), collection_id)
+
+
+async def invalidate_collection(redis: Redis, collection_id: int) -> None:
+    """删除收藏时清理快照；反向索引中的残留 id 在刷新时会被跳过"""
+    await redis.delete(collection_cache_key(collection_id), collection_fill_key(collection_id))
+
+
+async def _patch_snapshot(
+    redis: Redis, collection_id: int, patch: dict[int, DishResponse | None]
+) -> None:
+    """在 WATCH 事务中替换（值为 None 时移除）快照里的菜品"""
+    key = collection_cache_key(collection_id)
+    async with redis.pipeline(transaction=True) as pipe:
+        try:
+            await pipe.watch(key)
+            cached = await pipe.get(key)
+            if not cached:
+                await pipe.unwatch()
+                return
+            snapshot = json.loads(cached)
+            dishes = snapshot["data"]["dishes"]
+            dishes[:] = [
+                patch[d["id"]].model_dump(mode="json") if d["id"] in patch else d
+                for d in dishes
+                if d["id"] not in patch or patch[d["id"]] is not None
+            ]
+            snapshot = _snapshot(snapshot["data"], snapshot["user_id"])
+            pipe.multi()
+            pipe.set(key, json.dumps(snapshot, ensure_ascii=False), keepttl=True)
+            await pipe.execute()
+        except WatchError:
+            # 并发写入了新的快照，直接丢弃，下次读取时从数据库重建
+            logger.debug("收藏快照并发修改，丢弃缓存: {}", key)
+            await redis.delete(key)
+
+
+async def _patch_collections(
+    redis: Redis, changes: dict[int, DishResponse | None]
+) -> None:
+    """按反向索引把菜品变更归并到各个收藏，每个快照只改写一次"""
+    async with redis.pipeline(transaction=False) as pipe:
+        for dish_id in changes:
+            pipe.smembers(dish_collections_key(dish_id))
+        members = await pipe.execute()
+
+    patches: dict[int, dict[int, DishResponse | None]] = {}
+    for (dish_id, dish), collection_ids in zip(changes.items(), members):
+        for collection_id in collection_ids:
+            patches.setdefault(int(collection_id), {})[dish_id] = dish
+    for collection_id, patch in patches.items():
+        await _patch_snapshot(redis, collection_id, patch)
+
+
+async def refresh_dishes_in_collections(redis: Redis, dishes: list[DishResponse]) -> None:
+    """菜品被修改后，增量更新所有包含它们的收藏快照"""
+    if dishes:
+        await _patch_collections(redis, {dish.id: dish for dish in dishes})
+
+
+async def refresh_dish_in_collections(redis: Redis, dish: DishResponse) -> None:
+    """菜品被修改后，增量更新所有包含它的收藏快照"""
+    await refresh_dishes_in_collections(redis, [dish])
+
+
+async def remove_dishes_from_collections(redis: Redis, dish_ids: list[int]) -> None:
+    """菜品被删除后，从所有收藏快照中移除它们"""
+    if not dish_ids:
+        return
+    await _patch_collections(redis, dict.fromkeys(dish_ids))
+    await redis.delete(*(dish_collections_key(dish_id) for dish_id in dish_ids))
+
+
+async def remove_dish_from_collections(redis: Redis, dish_id: int) -> None:
+    """菜品被删除后，从所有收藏快照中移除它"""
+    await remove_dishes_from_collections(redis, [dish_id])
@@ -1,15 +1,18 @@
+from collections.abc import AsyncIterator
 from typing import Annotated
 
 from fastapi import Path, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import get_db
+from src.core.sharding import shard_router
 from src.dishes.model import Dish
 from src.core.exception import NotFoundException
+from src.auth.user_manager import get_current_user
 
 async def validate_dish(dish_id: int, session: AsyncSession) -> None:
     dish = await session.get(Dish, dish_id)
-    if dish is None:
+    if dish is None or dish.deleted_at is not None:
         raise NotFoundException(f"Dish with id {dish_id} not found")
     
 
@@ -22,4 +25,16 @@ async def get_dish_id(
     return dish_id
 
 # 使用方法
-# dish_id: Annotated[int, Depends(get_dish_id)],
\ No newline at end of file
+# dish_id: Annotated[int, Depends(get_dish_id)],
+
+
+async def get_collection_session(
+    session: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+) -> AsyncIterator[AsyncSession]:
+    """收藏所在的会话：未分片时即主库会话，分片时为当前用户所在分片的会话"""
+    if shard_router is None:
+        yield session
+        return
+    async with shard_router.session_factory_for(current_user.id)() as shard_session:
+        yield shard_session
@@ -7,6 +7,7 @@ from sqlalchemy import (
     Text,
     UUID,
     ForeignKey,    
+    Index,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -24,9 +25,12 @@ class Collection(Base, DateTimeMixin):
     name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     note: Mapped[str | None] = mapped_column(Text, nullable=True)
 
-    # 外键
+    # 外键（所有收藏查询都按 user_id 过滤）
     user_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("user.id", ondelete="CASCADE"), nullable=False
+        UUID(as_uuid=True),
+        ForeignKey("user.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
     )
 
     # 1. 与 User 的多对一关系
@@ -36,6 +40,8 @@ class Collection(Base, DateTimeMixin):
     dishes: Mapped[list["Dish"]] = relationship(
         "Dish",
         secondary="collection_dish",  # ← 字符串表名
+        # 已软删除、尚未清理的菜品不出现在收藏中
+        secondaryjoin="and_(Dish.id == collection_dish.c.dish_id, Dish.deleted_at.is_(None))",
         back_populates="collections",
         lazy="selectin",
     )
@@ -44,7 +50,11 @@ class Collection(Base, DateTimeMixin):
 # 中间表
 class CollectionDish(Base):
     __tablename__ = "collection_dish"
-    __table_args__ = ({"comment": "收藏-菜品 中间表"},)
+    __table_args__ = (
+        # 主键以 collection_id 开头；按菜品反查收藏与级联删除需要单独的索引
+        Index("collection_dish_dish_id_collection_id_idx", "dish_id", "collection_id"),
+        {"comment": "收藏-菜品 中间表"},
+    )
 
     collection_id: Mapped[int] = mapped_column(
         ForeignKey("collections.id", ondelete="CASCADE"), primary_key=True
@@ -52,3 +62,12 @@ class CollectionDish(Base):
     dish_id: Mapped[int] = mapped_column(
         ForeignKey("dishes.id", ondelete="CASCADE"), primary_key=True
     )
+
+
+# 分片模式下的收藏 id 发号表（位于主库）：各分片不再自增，
+# 由这里统一分配，收藏 id 仍全局唯一（Redis 快照、反向索引都以 id 为键）
+class CollectionIdTicket(Base):
+    __tablename__ = "collection_id_tickets"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -0,0 +1,217 @@
+# src/collections/rebalance.py
+"""收藏分片的初始化与再平衡
+
+    uv run python -m src.collections.rebalance init                  # 在各分片建表，发号表越过现有最大 id
+    uv run python -m src.collections.rebalance status                # 各分片收藏数与放错分片的收藏数
+    uv run python -m src.collections.rebalance run --from-primary    # 首次启用分片：从主库迁出
+    uv run python -m src.collections.rebalance run                   # 增加分片后：把放错的用户迁往新分片
+    uv run python -m src.collections.rebalance run --from URL        # 去掉最后一个分片：从旧地址迁出
+
+COLLECTION_SHARD_URLS 配置的是目标分片。跳跃一致性哈希下，增加第 N+1 个分片时
+只有约 1/(N+1) 的用户需要迁移，且都从原有分片迁往新分片；只能在末尾增减分片，不能调整顺序。
+
+迁移按用户、按批进行：先在目标分片写入（同 id 的行先删后插），提交后再删除来源的行，
+中途失败可以直接重跑。注意：
+- 切换配置到迁移完成之间，尚未迁移的用户看不到自己的收藏，应在低峰期操作并尽快跑完
+- 收藏名的唯一约束只在单个分片内生效
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+
+from sqlalchemy import Table, delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.database import engine, SessionFactory
+from src.core.sharding import ShardRouter, local_tables, shard_router
+import src.auth.model, src.dishes.model, src.tags.model  # noqa: F401  注册全部映射
+from src.collections.model import Collection, CollectionDish, CollectionIdTicket
+
+# 分片上的表：与主库结构相同，去掉指向 user / dishes 的外键
+collections_table, collection_dish_table = SHARD_TABLES = local_tables(
+    [Collection.__table__, CollectionDish.__table__]
+)
+
+
+@dataclass
+class Source:
+    label: str
+    session_factory: async_sessionmaker[AsyncSession]
+    shard: int | None = None  # 属于目标分片时的序号；主库与已移除的分片为 None
+
+
+async def _max_collection_id(session: AsyncSession) -> int:
+    return (await session.scalar(select(func.max(collections_table.c.id)))) or 0
+
+
+async def init_shards(router: ShardRouter) -> int:
+    """建表，并让发号表从现有最大收藏 id 之后开始发号，返回该最大 id"""
+    await router.create_tables(SHARD_TABLES)
+    async with SessionFactory() as session:
+        max_id = max([await _max_collection_id(session), *await router.map(_max_collection_id)])
+        if engine.dialect.name == "postgresql":
+            sequence = "pg_get_serial_sequence('collection_id_tickets', 'id')"
+            current = await session.scalar(text(f"SELECT nextval({sequence})"))
+            if current <= max_id:
+                await session.execute(
+                    text(f"SELECT setval({sequence}, :value)"), {"value": max_id}
+                )
+        elif max_id:
+            # SQLite AUTOINCREMENT 记录历史最大值，插入再删除即可抬高计数
+            await session.execute(insert(CollectionIdTicket).values(id=max_id))
+            await session.execute(delete(CollectionIdTicket))
+        await session.commit()
+    return max_id
+
+
+async def _user_counts(session: AsyncSession) -> dict:
+    query = select(collections_table.c.user_id, func.count()).group_by(
+        collections_table.c.user_id
+    )
+    return {user_id: count for user_id, count in await session.execute(query)}
+
+
+async def shard_status(router: ShardRouter) -> list[tuple[int, int]]:
+    """各分片的 (收藏数, 不属于该分片的收藏数)"""
+    status = []
+    for shard, counts in enumerate(await router.map(_user_counts)):
+        misplaced = sum(
+            count for user_id, count in counts.items() if router.shard_of(user_id) != shard
+        )
+        status.append((sum(counts.values()), misplaced))
+    return status
+
+
+async def _copy_batch(
+    target: AsyncSession, collections: list[dict], links: list[dict]
+) -> None:
+    ids = [row["id"] for row in collections]
+    await target.execute(
+        delete(collection_dish_table).where(collection_dish_table.c.collection_id.in_(ids))
+    )
+    await target.execute(delete(collections_table).where(collections_table.c.id.in_(ids)))
+    await target.execute(insert(collections_table), collections)
+    if links:
+        await target.execute(insert(collection_dish_table), links)
+    await target.commit()
+
+
+async def _delete_batch(source: AsyncSession, ids: list[int]) -> None:
+    await source.execute(
+        delete(collection_dish_table).where(collection_dish_table.c.collection_id.in_(ids))
+    )
+    await source.execute(delete(collections_table).where(collections_table.c.id.in_(ids)))
+    await source.commit()
+
+
+async def _move_user(
+    router: ShardRouter, source: Source, user_id, batch_size: int
+) -> int:
+    moved = 0
+    target_factory = router.session_factory_for(user_id)
+    while True:
+        async with source.session_factory() as session:
+            query = (
+                select(collections_table)
+                .where(collections_table.c.user_id == user_id)
+                .order_by(collections_table.c.id)
+                .limit(batch_size)
+            )
+            collections = [dict(row) for row in (await session.execute(query)).mappings()]
+            if not collections:
+                return moved
+            ids = [row["id"] for row in collections]
+            links = [
+                dict(row)
+                for row in (
+                    await session.execute(
+                        select(collection_dish_table).where(
+                            collection_dish_table.c.collection_id.in_(ids)
+                        )
+                    )
+                ).mappings()
+            ]
+            async with target_factory() as target:
+                await _copy_batch(target, collections, links)
+            await _delete_batch(session, ids)
+        moved += len(collections)
+
+
+async def rebalance(
+    router: ShardRouter,
+    sources: list[Source],
+    *,
+    dry_run: bool = False,
+    batch_size: int = 500,
+) -> dict[str, int]:
+    """把来源中不属于所在分片的用户收藏迁往目标分片，返回各来源迁出的收藏数"""
+    moved: dict[str, int] = defaultdict(int)
+    for source in sources:
+        async with source.session_factory() as session:
+            counts = await _user_counts(session)
+        for user_id, count in counts.items():
+            if router.shard_of(user_id) == source.shard:
+                continue
+            if dry_run:
+                moved[source.label] += count
+            else:
+                moved[source.label] += await _move_user(router, source, user_id, batch_size)
+    return dict(moved)
+
+
+def _sources(router: ShardRouter, args: argparse.Namespace) -> tuple[list[Source], list]:
+    sources = [
+        Source(url, factory, shard)
+        for shard, (url, factory) in enumerate(zip(router.urls, router.session_factories))
+    ]
+    extra = ShardRouter(args.sources) if args.sources else None
+    if extra is not None:
+        sources += [
+            Source(url, factory) for url, factory in zip(extra.urls, extra.session_factories)
+        ]
+    if args.from_primary:
+        sources.insert(0, Source("primary", SessionFactory))
+    return sources, [extra] if extra is not None else []
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="收藏分片初始化与再平衡")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("init", help="在各分片建表并初始化发号表")
+    commands.add_parser("status", help="查看各分片收藏数")
+    run = commands.add_parser("run", help="迁移放错分片的收藏")
+    run.add_argument("--from", dest="sources", action="append", default=[], metavar="URL",
+                     help="额外的来源库（例如被移除的分片），可重复")
+    run.add_argument("--from-primary", action="store_true", help="同时从主库迁出")
+    run.add_argument("--dry-run", action="store_true", help="只统计需要迁移的收藏数")
+    run.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    if shard_router is None:
+        parser.error("未配置 COLLECTION_SHARD_URLS")
+
+    if args.command == "init":
+        max_id = await init_shards(shard_router)
+        print(f"{len(shard_router)} 个分片已建表，发号从 {max_id + 1} 开始")
+    elif args.command == "status":
+        for shard, (total, misplaced) in enumerate(await shard_status(shard_router)):
+            print(f"[{shard}] {shard_router.urls[shard]}: {total} 个收藏，{misplaced} 个待迁移")
+    else:
+        sources, extra = _sources(shard_router, args)
+        moved = await rebalance(
+            shard_router, sources, dry_run=args.dry_run, batch_size=args.batch_size
+        )
+        verb = "需迁移" if args.dry_run else "已迁移"
+        for label, count in moved.items():
+            print(f"{label}: {verb} {count} 个收藏")
+        print(f"共{verb} {sum(moved.values())} 个收藏")
+        for router in extra:
+            await router.dispose()
+
+    await shard_router.dispose()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
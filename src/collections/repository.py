@@ -1,33 +1,113 @@
 # src/collections/repository.py
+from datetime import datetime, timezone
 from typing import Mapping, Any
 
-from sqlalchemy import func, select, or_, desc, asc
+from sqlalchemy import delete, func, insert, select, or_, desc, asc, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from src.collections.model import Collection
+from src.collections.model import Collection, CollectionDish, CollectionIdTicket
 from src.dishes.model import Dish
 from src.core.exception import NotFoundException, AlreadyExistsException
+from src.core.tracing import traced
 
 
+@traced("repository")
 class CollectionRepository:
-    """数据库表仓库层"""
+    """数据库表仓库层
+
+    分片模式下 session 为当前用户所在分片的会话，catalog 为主库会话：
+    收藏与中间表在分片上，菜品只在主库，dishes 不能再由 selectin 跨库加载，
+    改为分别查询两边后用 set_committed_value 拼装（见 _attach_dishes）。
+    """
 
     MAX_PAGE_SIZE = 500
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, catalog: AsyncSession | None = None):
         self.session = session
+        self.catalog = catalog if catalog is not None else session
+        self.sharded = self.catalog is not session
+
+    def _without_dishes(self, query):
+        # 分片模式下 dishes 由 _attach_dishes 填充
+        return query.options(noload(Collection.dishes)) if self.sharded else query
+
+    async def _attach_dishes(self, collections: list[Collection]) -> None:
+        """分片模式：从分片读取关联行，再从主库按 id 批量读取未删除的菜品"""
+        if not self.sharded or not collections:
+            return
+        links = (
+            await self.session.execute(
+                select(CollectionDish.collection_id, CollectionDish.dish_id).where(
+                    CollectionDish.collection_id.in_([item.id for item in collections])
+                )
+            )
+        ).all()
+        dishes: dict[int, Dish] = {}
+        if links:
+            query = select(Dish).where(
+                Dish.id.in_({dish_id for _, dish_id in links}), Dish.deleted_at.is_(None)
+            )
+            dishes = {dish.id: dish for dish in await self.catalog.scalars(query)}
+        grouped: dict[int, list[Dish]] = {item.id: [] for item in collections}
+        for collection_id, dish_id in links:
+            if dish_id in dishes:
+                grouped[collection_id].append(dishes[dish_id])
+        for item in collections:
+            set_committed_value(item, "dishes", grouped[item.id])
+
+    async def _next_id(self) -> int:
+        """分片模式：在主库发号表取一个全局唯一的收藏 id
+
+        取号后立即删除该行，表始终为空；自增计数（SQLite AUTOINCREMENT / PostgreSQL 序列）不回退，
+        id 不会重复。取号单独提交，即使随后的插入失败也只是跳过一个 id。
+        """
+        item_id = await self.catalog.scalar(
+            insert(CollectionIdTicket).returning(CollectionIdTicket.id)
+        )
+        await self.catalog.execute(
+            delete(CollectionIdTicket).where(CollectionIdTicket.id == item_id)
+        )
+        await self.catalog.commit()
+        return item_id
 
     async def create(self, data: Mapping[str, Any], current_user) -> Collection:
-        """创建数据"""
-        item = Collection(**data, user_id=current_user.id)
-        self.session.add(item)
+        """创建数据（INSERT ... RETURNING，新收藏没有菜品，不再加载 dishes）"""
+        if self.sharded:
+            data = {**data, "id": await self._next_id()}
+        query = (
+            insert(Collection)
+            .values(**data, user_id=current_user.id)
+            .returning(Collection)
+            .options(noload(Collection.dishes))
+        )
         try:
+            item = await self.session.scalar(query)
             await self.session.commit()
         except IntegrityError:
             await self.session.rollback()
             raise AlreadyExistsException("Collection with this name already exists")
-        await self.session.refresh(item)
+        return item
+
+    async def _touch(self, item_id: int, current_user, **values: Any) -> Collection:
+        """UPDATE ... RETURNING 更新收藏并取回（dishes 由 selectin 一并加载），同时完成归属校验
+
+        只修改中间表不会触发 onupdate，因此增删菜品时也经由这里更新时间戳。
+        """
+        item = await self.session.scalar(
+            self._without_dishes(
+                update(Collection)
+                .where(Collection.id == item_id, Collection.user_id == current_user.id)
+                .values(**values, updated_at=datetime.now(timezone.utc))
+                .returning(Collection)
+            ),
+            execution_options={"populate_existing": True},
+        )
+        if not item:
+            raise NotFoundException(f"Collection with id {item_id} not found")
+        await self._attach_dishes([item])
         return item
 
     async def get_by_id(self, item_id: int, current_user) -> Collection:
@@ -39,10 +119,11 @@ class CollectionRepository:
             # .options(selectinload(Collection.dishes))
             #  models里定义了lazy属性就无需这条
         )
-        result = await self.session.scalars(query)
+        result = await self.session.scalars(self._without_dishes(query))
         item = result.one_or_none()
         if not item:
             raise NotFoundException(f"Collection with id {item_id} not found")
+        await self._attach_dishes([item])
         return item
 
     async def get_all(
@@ -84,76 +165,99 @@ class CollectionRepository:
         offset = max(offset, 0)
         paginated_query = query.offset(offset).limit(limit)
 
-        items = list(await self.session.scalars(paginated_query))
+        items = list(await self.session.scalars(self._without_dishes(paginated_query)))
+        await self._attach_dishes(items)
 
         return items, total
 
+    async def get_dish_ids_for_user(self, current_user) -> list[int]:
+        """获取用户所有收藏中的菜品 id（去重）"""
+        query = (
+            select(CollectionDish.dish_id)
+            .join(Collection, Collection.id == CollectionDish.collection_id)
+            .where(Collection.user_id == current_user.id)
+            .distinct()
+        )
+        return list(await self.session.scalars(query))
+
     async def update(
         self, data: Mapping[str, Any], item_id: int, current_user
     ) -> Collection:
         """更新数据"""
-        query = select(Collection).where(
-            Collection.id == item_id, Collection.user_id == current_user.id
-        )
-        result = await self.session.scalars(query)
-        item = result.one_or_none()
-        if not item:
-            raise NotFoundException(f"Collection with id {item_id} not found")
-
-        for key, value in data.items():
-            setattr(item, key, value)
+        item = await self._touch(item_id, current_user, **data)
         await self.session.commit()
-        await self.session.refresh(item)
         return item
 
-    async def delete(self, item_id: int, current_user) -> None:
-        """删除数据"""
+    async def delete(self, item_id: int, current_user) -> list[int]:
+        """删除数据，返回收藏中的菜品 id（用于更新菜品热度）"""
+        if self.sharded:
+            return await self._delete_sharded(item_id, current_user)
         item = await self.session.get(Collection, item_id)
         if not item or item.user_id != current_user.id:
             raise NotFoundException(f"Collection with id {item_id} not found")
 
+        dish_ids = [dish.id for dish in item.dishes]
         await self.session.delete(item)
         await self.session.commit()
-        
+        return dish_ids
+
+    async def _delete_sharded(self, item_id: int, current_user) -> list[int]:
+        # 分片上没有 ORM 级联可用（dishes 在另一个库），显式删除中间表与收藏
+        item = await self.get_by_id(item_id, current_user)
+        dish_ids = [dish.id for dish in item.dishes]
+        await self.session.execute(
+            delete(CollectionDish).where(CollectionDish.collection_id == item_id)
+        )
+        await self.session.execute(delete(Collection).where(Collection.id == item_id))
+        await self.session.commit()
+        return dish_ids
 
     async def add_dish_to_collection(
         self, collection_id: int, dish_id: int, current_user
     ) -> Collection:
-        collection = await self.get_by_id(collection_id, current_user)
+        """UPDATE 时间戳并取回收藏 + 查询菜品 + INSERT 关联，提交后不再 refresh"""
+        collection = await self._touch(collection_id, current_user)
 
-        query = select(Dish).where(Dish.id == dish_id)
-        result = await self.session.scalars(query)
+        query = select(Dish).where(Dish.id == dish_id, Dish.deleted_at.is_(None))
+        result = await self.catalog.scalars(query)
         dish = result.one_or_none()
         if not dish:
+            await self.session.rollback()
             raise NotFoundException(f"Dish with id {dish_id} not found")
 
         if dish in collection.dishes:
+            await self.session.rollback()
             raise AlreadyExistsException(
                 f"Dish with id {dish_id} already associated with collection {collection_id}"
             )
 
-        collection.dishes.append(dish)
+        await self.session.execute(
+            insert(CollectionDish).values(collection_id=collection_id, dish_id=dish_id)
+        )
         await self.session.commit()
-        await self.session.refresh(collection)
+        # 直接写入中间表，内存中的 dishes 同步更新但不标记为待刷新
+        set_committed_value(collection, "dishes", [*collection.dishes, dish])
         return collection
 
     async def remove_dish_from_collection(
         self, collection_id: int, dish_id: int, current_user
     ) -> Collection:
-        collection = await self.get_by_id(collection_id, current_user)
+        """UPDATE 时间戳并取回收藏 + DELETE 关联；菜品从已加载的 dishes 中查找"""
+        collection = await self._touch(collection_id, current_user)
 
-        query = select(Dish).where(Dish.id == dish_id)
-        result = await self.session.scalars(query)
-        dish = result.one_or_none()
-        if not dish:
-            NotFoundException(f"Dish with id {dish_id} not found")
-
-        if dish not in collection.dishes:
+        remaining = [dish for dish in collection.dishes if dish.id != dish_id]
+        if len(remaining) == len(collection.dishes):
+            await self.session.rollback()
             raise NotFoundException(
                 f"Dish with id {dish_id} not associated with note {collection_id}"
             )
 
-        collection.dishes.remove(dish)
+        await self.session.execute(
+            delete(CollectionDish).where(
+                CollectionDish.collection_id == collection_id,
+                CollectionDish.dish_id == dish_id,
+            )
+        )
         await self.session.commit()
-        await self.session.refresh(collection)
+        set_committed_value(collection, "dishes", remaining)
         return collection
@@ -1,8 +1,9 @@
 # src/collections/router.py
 from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, Path, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
 from loguru import logger
+from redis.asyncio import Redis
 
 from src.collections.service import CollectionService
 from src.collections.repository import CollectionRepository
@@ -11,18 +12,30 @@ from src.collections.schema import (
     CollectionUpdate,
     CollectionResponse,
 )
-from src.collections.dependencies import get_dish_id
+from src.collections.dependencies import get_collection_session, get_dish_id
 from src.core.database import get_db
+from src.core.etag import check_not_modified
+from src.core.compression import precompressed_response
+from src.core.redis_db import get_cache_redis
+from src.core.rate_limit import RateLimit
 from src.auth.user_manager import get_current_user
 from src.auth.schemas import UserRead
 
-router = APIRouter(prefix="/collections", tags=["Collections"])
+router = APIRouter(
+    prefix="/collections",
+    tags=["Collections"],
+    dependencies=[Depends(RateLimit("collections"))],
+)
 
 
 # 注入仓库 + 服务层
-async def get_collection_service(session=Depends(get_db)) -> CollectionService:
-    repository = CollectionRepository(session)
-    return CollectionService(repository)
+async def get_collection_service(
+    session=Depends(get_db),
+    collection_session=Depends(get_collection_session),
+    redis: Redis = Depends(get_cache_redis),
+) -> CollectionService:
+    repository = CollectionRepository(collection_session, catalog=session)
+    return CollectionService(repository, redis)
 
 
 @router.post(
@@ -40,24 +53,37 @@ async def create_collection(
 
 @router.get("/{collection_id}", response_model=CollectionResponse)
 async def get_collection(
+    request: Request,
+    response: Response,
     collection_id: int = Path(..., description="收藏ID"),
     service: CollectionService = Depends(get_collection_service),
+    redis: Redis = Depends(get_cache_redis),
     current_user: UserRead = Depends(get_current_user),
-) -> CollectionResponse:
-    """获取单个收藏"""
+) -> CollectionResponse | Response:
+    """获取单个收藏（支持 If-None-Match，快照命中时返回预压缩的响应体）"""
 
-    logger.debug(f"正在获取收藏 ID: {collection_id}")
+    logger.debug("正在获取收藏 ID: {}", collection_id)
     try:
-        collection = await service.get_collection_by_id(collection_id, current_user)
-        logger.info(f"获取到收藏, ID: {collection_id}")
-        return collection
+        body, etag = await service.get_collection_body(collection_id, current_user)
+        not_modified = check_not_modified(request, response, etag)
+        if not_modified is not None:
+            return not_modified
+        logger.debug("获取到收藏, ID: {}", collection_id)
+        return await precompressed_response(
+            request, redis, body, headers=response.headers
+        )
+    except HTTPException as e:
+        logger.debug("获取 ID 为 {} 的收藏失败: {}", collection_id, e.detail)
+        raise
     except Exception as e:
-        logger.error(f"获取 ID 为 {collection_id} 的收藏时出错: {str(e)}")
+        logger.error("获取 ID 为 {} 的收藏时出错: {}", collection_id, e)
         raise
 
 
 @router.get("/", response_model=list[CollectionResponse])
 async def list_collections(
+    request: Request,
+    response: Response,
     search: str | None = Query(None, description="搜索关键词"),
     order_by: Literal["id", "name", "created_at"] = Query("id", description="排序字段"),
     direction: Literal["asc", "desc"] = Query("asc", description="排序方向"),
@@ -65,8 +91,13 @@ async def list_collections(
     offset: int = Query(0, ge=0),
     service: CollectionService = Depends(get_collection_service),
     current_user: UserRead = Depends(get_current_user),
-) -> list[CollectionResponse]:
-    """查询所有收藏"""
+) -> list[CollectionResponse] | Response:
+    """查询所有收藏（支持 If-None-Match）"""
+    etag = await service.list_etag(request.url.query, current_user)
+    not_modified = check_not_modified(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+
     collections = await service.list_collections(
         search=search,
         order_by=order_by,
@@ -123,15 +154,19 @@ async def add_dish_to_collection(
         updated_collection = await service.add_dish_to_collection(
             collection_id, dish_id, current_user
         )
-        logger.info(
-            f"Added dish {dish_id} to collection {collection_id} for user {current_user.id}"
+    except HTTPException as e:
+        # 404 / 409 属于正常的业务结果，访问日志已有状态码
+        logger.debug(
+            "Cannot add dish {} to collection {}: {}", dish_id, collection_id, e.detail
         )
-        return updated_collection
+        raise
     except Exception as e:
-        logger.error(
-            f"Failed to add dish {dish_id} to collection {collection_id}: {str(e)}"
-        )
+        logger.error("Failed to add dish {} to collection {}: {}", dish_id, collection_id, e)
         raise
+    logger.debug(
+        "Added dish {} to collection {} for user {}", dish_id, collection_id, current_user.id
+    )
+    return updated_collection
 
 
 @router.delete(
@@ -150,12 +185,17 @@ async def remove_tag_from_note(
         updated_collection = await service.remove_dish_from_collection(
             collection_id, dish_id, current_user
         )
-        logger.info(
-            f"Removed dish {dish_id} from collection {collection_id} for user {current_user.id}"
+    except HTTPException as e:
+        logger.debug(
+            "Cannot remove dish {} from collection {}: {}", dish_id, collection_id, e.detail
         )
-        return updated_collection
+        raise
     except Exception as e:
         logger.error(
-            f"Failed to remove dish {dish_id} from collection {collection_id}: {str(e)}"
+            "Failed to remove dish {} from collection {}: {}", dish_id, collection_id, e
         )
         raise
+    logger.debug(
+        "Removed dish {} from collection {} for user {}", dish_id, collection_id, current_user.id
+    )
+    return updated_collection
@@ -1,5 +1,28 @@
 # src/collections/service.py
+from redis.asyncio import Redis
+
+from src.core.etag import (
+    bump_table_version,
+    get_table_versions,
+    make_etag,
+    table_version_key,
+)
+from src.core.tracing import traced
+from src.dishes.service import DISHES_VERSION_KEY
+from src.dishes.popularity import incr_popularity
+
 from src.collections.repository import CollectionRepository
+from src.collections.cache_collection import (
+    get_cached_collection_body,
+    begin_collection_fill,
+    cache_collection,
+    collection_etag,
+    collection_json,
+    drop_dish_from_index,
+    fill_collection_cache,
+    invalidate_collection,
+)
+from src.recommendations.service import invalidate_user_recommendations
 from src.collections.schema import (
     CollectionCreate,
     CollectionUpdate,
@@ -7,11 +30,24 @@ from src.collections.schema import (
 )
 
 
+def collections_version_key(user_id) -> str:
+    """收藏只对本人可见，列表版本号按用户划分"""
+    return table_version_key("collections", user_id)
+
+
+@traced("service")
 class CollectionService:
     """业务逻辑层（Service Layer）"""
 
-    def __init__(self, repository: CollectionRepository):
+    def __init__(self, repository: CollectionRepository, redis: Redis):
         self.repository = repository
+        self.redis = redis
+
+    async def list_etag(self, query: str, current_user) -> str:
+        versions = await get_table_versions(
+            self.redis, collections_version_key(current_user.id), DISHES_VERSION_KEY
+        )
+        return make_etag("collections", current_user.id, *versions, query)
 
     async def create_collection(
         self, data: CollectionCreate, current_user
@@ -19,12 +55,25 @@ class CollectionService:
         """创建收藏，处理唯一约束冲突"""
         dict_data = data.model_dump()
         item = await self.repository.create(dict_data, current_user)
+        await bump_table_version(self.redis, collections_version_key(current_user.id))
         return CollectionResponse.model_validate(item)
 
-    async def get_collection_by_id(self, item_id: int, current_user) -> CollectionResponse:
-        """通过 ID 获取收藏"""
+    async def get_collection_body(self, item_id: int, current_user) -> tuple[bytes, str]:
+        """通过 ID 获取收藏的 JSON 响应体与 ETag，优先读取 Redis 快照
+
+        ETag 随快照一起存放，快照命中时只有一次 Redis GET，不查询数据库。
+        """
+        cached = await get_cached_collection_body(self.redis, item_id, current_user.id)
+        if cached is not None:
+            return cached
+
+        # 回源期间可能有并发写入，快照只在没有写入时才落入 Redis
+        fill = await begin_collection_fill(self.redis, item_id)
         item = await self.repository.get_by_id(item_id, current_user)
-        return CollectionResponse.model_validate(item)
+        response = CollectionResponse.model_validate(item)
+        await fill_collection_cache(self.redis, response, current_user.id, fill)
+        body = collection_json(response.model_dump(mode="json"))
+        return body, collection_etag(item_id, body)
 
     async def list_collections(
         self,
@@ -54,12 +103,19 @@ class CollectionService:
         """更新收藏"""
         update_data = item_data.model_dump(exclude_unset=True, exclude_none=True)
         updated = await self.repository.update(update_data, item_id, current_user)
-        return CollectionResponse.model_validate(updated)
+        response = CollectionResponse.model_validate(updated)
+        await cache_collection(self.redis, response, current_user.id)
+        await bump_table_version(self.redis, collections_version_key(current_user.id))
+        return response
 
     async def delete_collection(self, item_id: int, current_user) -> None:
         """删除收藏"""
 
-        await self.repository.delete(item_id, current_user)
+        dish_ids = await self.repository.delete(item_id, current_user)
+        await incr_popularity(self.redis, {dish_id: -1 for dish_id in dish_ids})
+        await invalidate_collection(self.redis, item_id)
+        await invalidate_user_recommendations(self.redis, current_user.id)
+        await bump_table_version(self.redis, collections_version_key(current_user.id))
 
     async def add_dish_to_collection(
         self, collection_id: int, dish_id: int, current_user
@@ -67,7 +123,12 @@ class CollectionService:
         result = await self.repository.add_dish_to_collection(
             collection_id, dish_id, current_user
         )
-        return CollectionResponse.model_validate(result)
+        response = CollectionResponse.model_validate(result)
+        await incr_popularity(self.redis, {dish_id: 1})
+        await cache_collection(self.redis, response, current_user.id)
+        await invalidate_user_recommendations(self.redis, current_user.id)
+        await bump_table_version(self.redis, collections_version_key(current_user.id))
+        return response
 
     async def remove_dish_from_collection(
         self, collection_id: int, dish_id: int, current_user
@@ -75,4 +136,10 @@ class CollectionService:
         note = await self.repository.remove_dish_from_collection(
             collection_id, dish_id, current_user
         )
-        return CollectionResponse.model_validate(note)
+        response = CollectionResponse.model_validate(note)
+        await incr_popularity(self.redis, {dish_id: -1})
+        await cache_collection(self.redis, response, current_user.id)
+        await drop_dish_from_index(self.redis, collection_id, dish_id)
+        await invalidate_user_recommendations(self.redis, current_user.id)
+        await bump_table_version(self.redis, collections_version_key(current_user.id))
+        return response
@@ -40,13 +40,14 @@ class DateTimeMixin:
         created_at: Mapped[datetime] = mapped_column(
             DateTime(timezone=True),
             # 插入时用应用层时间,生产环境推荐使用 Unix 时间戳
-            default=datetime.now(timezone.utc),
+            # 必须传入可调用对象，否则默认值只在导入时计算一次
+            default=lambda: datetime.now(timezone.utc),
             nullable=False,
             index=True,
         )
         updated_at: Mapped[datetime] = mapped_column(
             DateTime(timezone=True),
-            default=datetime.now(timezone.utc),
-            onupdate=datetime.now(timezone.utc),
+            default=lambda: datetime.now(timezone.utc),
+            onupdate=lambda: datetime.now(timezone.utc),
             nullable=False,
         )
@@ -0,0 +1,129 @@
+# src/core/client_cache.py
+import asyncio
+import time
+from collections import OrderedDict
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from src.core.config import settings
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+
+
+class ClientSideCache:
+    """服务端协助的客户端缓存：热点 GET 直接读进程内存，由 Redis 推送失效消息
+
+    使用 CLIENT TRACKING 的 BCAST 模式：一条专用连接订阅 __redis__:invalidate，
+    并把跟踪消息重定向给自己；匹配前缀的键被任何客户端修改、删除或过期时都会收到通知。
+    失效通道断开期间本地缓存整体停用，宁可多访问 Redis 也不返回过期数据。
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        prefixes: tuple[str, ...],
+        *,
+        enabled: bool = settings.redis_client_cache_enabled,
+        max_keys: int = settings.redis_client_cache_max_keys,
+        ttl: float = settings.redis_client_cache_ttl,
+    ):
+        self.redis = redis
+        self.prefixes = prefixes
+        self.enabled = enabled
+        self.max_keys = max_keys
+        self.ttl = ttl  # 本地最长保留时间，作为失效消息丢失时的兜底
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        # 每收到一次失效消息递增；GET 期间发生过失效则不写入本地缓存
+        self._generation = 0
+        self._ready = False
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def tracks(self, key: str) -> bool:
+        return key.startswith(self.prefixes)
+
+    async def get(self, key: str) -> str | None:
+        if not (self._ready and self.tracks(key)):
+            return await self.redis.get(key)
+
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        generation = self._generation
+        value = await self.redis.get(key)
+        # 不缓存不存在的键：写入方紧接着的读取不必等失效消息到达
+        if value is not None and self._ready and generation == self._generation:
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, keys: list[str] | None = None) -> None:
+        """keys 为 None 表示清空（服务端 FLUSHDB 或失效通道重连）"""
+        self._generation += 1
+        if keys is None:
+            self._entries.clear()
+            return
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def _listen(self) -> None:
+        prefix_args = [arg for prefix in self.prefixes for arg in ("PREFIX", prefix)]
+        while True:
+            connection = self.redis.connection_pool.make_connection()
+            # 订阅模式下 PING 的回复格式不同，由本循环自行发送心跳
+            connection.health_check_interval = 0
+            try:
+                await connection.connect()
+                await connection.send_command("CLIENT", "ID")
+                client_id = await connection.read_response()
+                await connection.send_command(
+                    "CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST", *prefix_args
+                )
+                await connection.read_response()
+                await connection.send_command("SUBSCRIBE", INVALIDATE_CHANNEL)
+                await connection.read_response()
+                self._ready = True
+                logger.info("客户端缓存已启用，跟踪前缀: {}", ", ".join(self.prefixes))
+
+                while True:
+                    message = await connection.read_response(
+                        timeout=settings.redis_health_check_interval or 30
+                    )
+                    if message is None:
+                        await connection.send_command("PING")
+                        continue
+                    if message[0] == "message" and message[1] == INVALIDATE_CHANNEL:
+                        self.invalidate(message[2])
+            except asyncio.CancelledError:
+                raise
+            except ResponseError as e:
+                # 服务端不支持 CLIENT TRACKING（Redis < 6 或兼容实现），直接停用
+                logger.warning("Redis 不支持客户端缓存，已停用: {}", e)
+                return
+            except Exception as e:
+                logger.warning("客户端缓存失效通道断开，暂停本地缓存: {}", e)
+            finally:
+                self._ready = False
+                self.invalidate()
+                await connection.disconnect()
+            await asyncio.sleep(1)
@@ -0,0 +1,160 @@
+# src/core/compression.py
+import base64
+import gzip
+import hashlib
+from collections.abc import Mapping
+
+from fastapi import Request, Response
+from redis.asyncio import Redis
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # 可选依赖：uv sync --extra compression
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    """按 Accept-Encoding 协商编码：优先 br（已安装时），其次 gzip；q=0 表示拒绝"""
+    if not accept_encoding:
+        return None
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    candidates = ("br", "gzip") if brotli is not None else ("gzip",)
+    best = max(candidates, key=lambda coding: accepted.get(coding, wildcard))
+    return best if accepted.get(best, wildcard) > 0 else None
+
+
+def compress(body: bytes, encoding: str, *, cached: bool = False) -> bytes:
+    """cached=True 时结果会被缓存复用，使用更高的压缩等级"""
+    if encoding == "br":
+        quality = (
+            settings.compression_cache_brotli_quality
+            if cached
+            else settings.compression_brotli_quality
+        )
+        return brotli.compress(body, quality=quality)
+    level = settings.compression_cache_gzip_level if cached else settings.compression_gzip_level
+    # mtime=0 保证相同内容的压缩结果一致
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "")
+    return (
+        "content-encoding" not in headers
+        and content_type.startswith(COMPRESSIBLE_TYPES)
+        and not content_type.startswith("text/event-stream")
+    )
+
+
+class CompressionMiddleware:
+    """按客户端 Accept-Encoding 压缩响应体
+
+    只处理一次性返回的 JSON / 文本响应；流式响应（SSE、LLM 输出）原样透传，
+    避免缓冲导致首字节延迟。已经带 Content-Encoding 的响应（预压缩缓存）直接放行。
+    """
+
+    def __init__(self, app: ASGIApp, *, minimum_size: int = settings.compression_minimum_size):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.compression_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or not _compressible(headers)
+            ):
+                passthrough = True
+                if _compressible(headers):
+                    headers.add_vary_header("Accept-Encoding")
+                await send(start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def compressed_body_key(encoding: str, body: bytes) -> str:
+    """按内容哈希寻址：内容相同的缓存体共享一份压缩结果"""
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return f"compressed:{encoding}:{digest}"
+
+
+async def precompressed_response(
+    request: Request,
+    redis: Redis,
+    body: bytes,
+    *,
+    headers: Mapping[str, str] | None = None,
+    media_type: str = "application/json",
+    ttl: int = settings.compression_cache_ttl,
+) -> Response:
+    """返回来自缓存层的响应体，压缩结果与缓存一起保存在 Redis，热点响应只压缩一次"""
+    headers = dict(headers or {})
+    headers.pop("content-length", None)
+    encoding = (
+        choose_encoding(request.headers.get("accept-encoding"))
+        if settings.compression_enabled and len(body) >= settings.compression_minimum_size
+        else None
+    )
+    if encoding is None:
+        return Response(body, media_type=media_type, headers=headers)
+
+    key = compressed_body_key(encoding, body)
+    cached = await redis.get(key)
+    if cached is not None:
+        # Redis 客户端开启了 decode_responses，二进制内容以 base64 存储
+        compressed = base64.b64decode(cached)
+    else:
+        compressed = compress(body, encoding, cached=True)
+        await redis.set(key, base64.b64encode(compressed).decode("ascii"), ex=ttl)
+    headers["Content-Encoding"] = encoding
+    headers["Vary"] = "Accept-Encoding"
+    return Response(compressed, media_type=media_type, headers=headers)
@@ -33,14 +33,164 @@ class Settings(BaseSettings):
     pool_use_lifo: bool = False # 连接池取连接顺序，False=FIFO（默认），True=LIFO 可提高高并发命中率
     echo: bool = False          # 是否打印 SQL，开发可打开，生产关闭
 
+    # 启动器（python -m src.server）：全局连接预算按 worker 数平分
+    server_workers: int = 1
+    server_graceful_timeout: int = 30      # 关闭 / 重载时等待进行中请求的秒数
+    db_connection_budget: int = 90         # 留给 API 进程的数据库连接总数（扣除迁移、任务 worker 等）
+    redis_connection_budget: int = 400     # 留给 API 进程的 Redis 连接总数
+
     # SQLite 配置
     sqlite_db_path: str = "./data/what2eat.sqlite3"
+
+    # 收藏分片（按 user_id 哈希），为空表示不分片、收藏表留在主库
+    # 例：COLLECTION_SHARD_URLS='["sqlite+aiosqlite:///./data/shard0.sqlite3", "sqlite+aiosqlite:///./data/shard1.sqlite3"]'
+    collection_shard_urls: list[str] = []
+    shard_pool_size: int = 10      # 每个分片的连接池大小（仅 PostgreSQL）
+    shard_max_overflow: int = 5
     
     # Redis 配置
     redis_host: str = "localhost"
     redis_port: int = 6379
+    redis_password: str | None = None
     auth_redis_db: int = 0
     cache_redis_db: int = 1
+    # 认证与缓存可分别部署，未设置时使用 redis_host / redis_port
+    auth_redis_host: str | None = None
+    auth_redis_port: int | None = None
+    cache_redis_host: str | None = None
+    cache_redis_port: int | None = None
+
+    # Redis 连接池
+    auth_redis_max_connections: int = 20
+    cache_redis_max_connections: int = 50
+    redis_socket_timeout: float = 5.0         # 需大于阻塞命令的等待时间（任务队列 XREADGROUP block=1s）
+    redis_connect_timeout: float = 2.0
+    redis_socket_keepalive: bool = True
+    redis_health_check_interval: int = 30     # 空闲超过该秒数的连接取用前先 PING
+    redis_retries: int = 3                    # 连接错误 / 超时重试次数
+    redis_retry_backoff_base: float = 0.05
+    redis_retry_backoff_cap: float = 1.0
+
+    # Redis 客户端缓存（CLIENT TRACKING，需要 Redis 6+）
+    redis_client_cache_enabled: bool = False
+    redis_client_cache_max_keys: int = 10000
+    redis_client_cache_ttl: float = 30.0      # 本地最长保留时间（秒），失效消息丢失时的兜底
+
+    # 限流（令牌桶，rate=每秒令牌数，burst=桶容量）
+    rate_limit_enabled: bool = True
+    rate_limit_user_rate: float = 10.0
+    rate_limit_user_burst: int = 20
+    rate_limit_ip_rate: float = 20.0
+    rate_limit_ip_burst: int = 40
+
+    # 自适应降载
+    shed_enabled: bool = True
+    shed_max_loop_lag: float = 0.2       # 事件循环延迟阈值（秒）
+    shed_max_pool_wait: float = 0.05     # 借出数据库连接的等待时间阈值（秒）
+    shed_retry_after: int = 1            # 503 响应的 Retry-After（秒）
+
+    # 响应压缩
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024       # 小于该字节数不压缩
+    compression_gzip_level: int = 6            # 动态响应：兼顾 CPU 与压缩率
+    compression_brotli_quality: int = 5
+    compression_cache_gzip_level: int = 9      # 预压缩缓存只压缩一次，使用最高压缩率
+    compression_cache_brotli_quality: int = 11
+    compression_cache_ttl: int = 3600          # 预压缩结果缓存时间（秒）
+
+    # 日志（loguru，经队列由后台线程写出，不阻塞事件循环）
+    log_level: str = "INFO"
+    log_json: bool = False               # 输出 JSON 行，便于日志平台采集
+    log_enqueue: bool = True             # 经队列异步写出
+    log_access_sample_rate: float = 1.0  # 成功请求（< 400）访问日志的采样率，错误请求总是记录
+    log_access_sample_routes: dict[str, float] = {"/health": 0.0}  # 按路由模板前缀覆盖采样率
+
+    # 链路追踪（OpenTelemetry，可选依赖：uv sync --extra tracing）
+    tracing_enabled: bool = False
+    tracing_service_name: str = "what2eat"
+    tracing_sample_rate: float = 0.05    # 根 span 采样率，下游 span 沿用父 span 的决定
+    tracing_exporter: Literal["file", "otlp"] = "file"
+    tracing_file_path: str = "./data/traces/spans.jsonl"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"  # 本地 collector
+    tracing_excluded_urls: str = "health"  # 不建 span 的路径（逗号分隔的正则）
+
+    # 请求级性能剖析（pyinstrument，可选依赖：uv sync --extra profiling）
+    profile_enabled: bool = True                 # 允许超级用户通过 X-Profile: 1 剖析单个请求
+    profile_interval: float = 0.001              # 采样间隔（秒）
+    profile_ttl: int = 24 * 3600                 # 按需剖析结果保留时间（秒）
+    profile_max_recent: int = 100                # 最近剖析记录的保留条数
+    profile_continuous_sample_rate: float = 0.0  # 持续剖析的请求抽样率，0 表示关闭
+    profile_continuous_retention: int = 48       # 持续剖析聚合结果保留的小时数
+    profile_continuous_exclude: list[str] = ["/weather/subscribe", "/recommendations/llm"]  # 长连接不参与抽样
+
+    # 外部 HTTP 客户端（Open-Meteo 等）
+    open_meteo_geocoding_url: str = "https://geocoding-api.open-meteo.com"
+    open_meteo_forecast_url: str = "https://api.open-meteo.com"
+    http2: bool = True
+    http_max_connections: int = 50
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_connect_timeout: float = 2.0
+    http_read_timeout: float = 5.0
+    http_pool_timeout: float = 1.0       # 等待空闲连接的上限，池满时尽快失败
+    http_retries: int = 2                # 仅对幂等请求重试
+    http_retry_backoff: float = 0.2      # 退避基数（秒），实际等待为 [0, base * 2^n] 随机值
+    http_hedge_delay: float | None = None  # 对冲请求延迟（秒），None 表示关闭
+    http_breaker_window: int = 20        # 熔断统计的最近请求数
+    http_breaker_min_requests: int = 10  # 达到该请求数后才判断失败率
+    http_breaker_failure_ratio: float = 0.5
+    http_breaker_cooldown: float = 15.0  # 熔断打开后多久放行探测请求（秒）
+    geocode_cache_size: int = 1024       # 进程内城市经纬度缓存条目数
+    geocode_negative_ttl: int = 600      # 查无此城市的结果缓存多久（秒）
+
+    # 热门城市天气预取
+    weather_prefetch_enabled: bool = True
+    weather_prefetch_top_n: int = 50           # 预取热度最高的城市数
+    weather_prefetch_interval: float = 10.0    # 轮询间隔（秒）
+    weather_prefetch_refresh_before: int = 20  # 缓存剩余 TTL 低于该值（秒）时刷新
+    weather_prefetch_concurrency: int = 5      # 同时刷新的城市数
+
+    # 天气订阅推送
+    weather_poll_interval: float = 60.0        # 被订阅城市的上游轮询间隔（秒）
+    weather_watch_ttl: int = 30                # worker 订阅心跳有效期（秒）
+
+    # 天气历史（进程内缓冲批量写入 + 按日汇总）
+    weather_log_enabled: bool = True
+    weather_log_flush_interval: float = 5.0    # 缓冲写入间隔（秒）
+    weather_log_batch_size: int = 500          # 每批写入条数，缓冲达到该数量时提前写入
+    weather_log_max_buffer: int = 10_000       # 缓冲上限，数据库不可用时丢弃最旧的记录
+    weather_log_max_retries: int = 3           # 同一批连续写入失败的次数上限，超过后丢弃该批
+    weather_log_retention_days: int = 7        # 原始记录保留天数，按日汇总永久保留
+    weather_log_compact_interval: float = 3600.0  # 压缩原始记录的间隔（秒）
+    weather_history_max_days: int = 365        # 趋势查询最多返回的天数
+
+    # 菜品热度排行（Redis 有序集合，定期按数据库对账）
+    popularity_reconcile_interval: float = 300.0  # 对账间隔（秒）
+
+    # 后台任务（Redis Streams）
+    task_worker_concurrency: int = 8                       # 单个 worker 同时执行的任务数
+    task_worker_mode: Literal["asyncio", "process"] = "asyncio"  # 并发模型
+    task_result_ttl: int = 24 * 3600                       # 任务状态与结果保留时间（秒）
+    task_claim_idle_ms: int = 5 * 60 * 1000                # 未确认消息超过该时长将被其他 worker 接管
+
+    # 软删除后的后台清理：分批删除关联行，批次之间让出锁
+    purge_chunk_size: int = 500          # 每个事务删除的最大行数
+    purge_chunk_pause: float = 0.05      # 批次间隔（秒）
+
+    # 菜品批量管理接口：每批一条 UPDATE ... WHERE id IN (...)
+    dish_bulk_max_items: int = 10_000    # 单次请求最多处理的菜品数
+    dish_bulk_chunk_size: int = 1000     # 每条语句（事务）处理的菜品数
+
+    # 相似菜品索引（内存映射文件，多 worker 共享）
+    similarity_index_path: str = "./data/similarity/dishes"
+    similarity_dimensions: int = 256     # 特征哈希维度，越大越精确、查询越慢
+
+    # Ollama 本地推理配置
+    ollama_base_url: str = "http://localhost:11434"
+    ollama_model: str = "qwen3:8b"
+    ollama_timeout: float = 120.0        # 单次生成的读超时（秒）
+    ollama_max_concurrency: int = 2      # 同时进行的生成数，受本地显存限制
+    ollama_cache_ttl: int = 3600         # 补全结果缓存时间（秒）
 
     @computed_field
     @property
@@ -74,12 +224,16 @@ class Settings(BaseSettings):
     @computed_field
     @property
     def auth_redis_url(self) -> str:
-        return f"redis://{self.redis_host}:{self.redis_port}/{self.auth_redis_db}"
+        return self._redis_url(self.auth_redis_host, self.auth_redis_port, self.auth_redis_db)
     
     @computed_field
     @property
     def cache_redis_url(self) -> str:
-        return f"redis://{self.redis_host}:{self.redis_port}/{self.cache_redis_db}"
+        return self._redis_url(self.cache_redis_host, self.cache_redis_port, self.cache_redis_db)
+
+    def _redis_url(self, host: str | None, port: int | None, db: int) -> str:
+        auth = f":{self.redis_password}@" if self.redis_password else ""
+        return f"redis://{auth}{host or self.redis_host}:{port or self.redis_port}/{db}"
 
     # JWT 配置
     jwt_secret: str = "龘爨麤鬻籱灪蠼蠛纛齉鬲靐龗齾龕鑪鸙饢驫麣"
@@ -1,14 +1,39 @@
+import time
 from typing import AsyncGenerator
 
 from loguru import logger
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.core.config import settings
 from src.core.base_model import Base, DateTimeMixin
 from src.dishes.model import Dish
 
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """记录借出连接的等待时间，供降载判断请求是否已经在连接池前排队
+
+    只保留上次读取以来的最大值，由读取方（LoadMonitor）负责平滑与衰减；
+    dispose() 重建连接池时计数随之清零。
+    """
+
+    max_wait = 0.0
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self.max_wait = max(self.max_wait, time.perf_counter() - started)
+
+    def take_max_wait(self) -> float:
+        wait, self.max_wait = self.max_wait, 0.0
+        return wait
+
+
 # 创建数据库引擎和会话工厂
-engine = create_async_engine(settings.database_url, **settings.engine_options)
+engine = create_async_engine(
+    settings.database_url, poolclass=TimedQueuePool, **settings.engine_options
+)
 
 SessionFactory = async_sessionmaker(
     class_=AsyncSession, autoflush=False, expire_on_commit=False, bind=engine
@@ -0,0 +1,88 @@
+# src/core/etag.py
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response, status
+from redis.asyncio import Redis
+
+# 客户端每次都需要携带验证器重新验证，但命中时只返回 304 空响应
+CACHE_CONTROL = "private, no-cache"
+
+
+def table_version_key(table: str, scope: object | None = None) -> str:
+    """表级版本号；scope 用于按用户划分（例如每个用户自己的收藏列表）"""
+    return f"etag:version:{table}" if scope is None else f"etag:version:{table}:{scope}"
+
+
+async def get_table_versions(redis: Redis, *keys: str) -> list[str]:
+    """一次 MGET 读取多个版本号，不存在视为 0"""
+    return [version or "0" for version in await redis.mget(keys)]
+
+
+async def bump_table_version(redis: Redis, *keys: str) -> None:
+    """写路径调用：递增版本号，使对应列表的 ETag 全部失效"""
+    async with redis.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.incr(key)
+        await pipe.execute()
+
+
+def make_etag(*parts: object) -> str:
+    """由资源标识与版本信息生成强 ETag"""
+    digest = hashlib.blake2b(
+        "|".join(str(part) for part in parts).encode("utf-8"), digest_size=12
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match 使用弱比较：忽略 W/ 前缀
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP 日期只精确到秒
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite 读回的时间不带时区，写入时统一使用 UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: datetime | None = None,
+) -> Response | None:
+    """为响应设置验证器；客户端缓存仍然有效时返回 304 响应，由路由直接返回"""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        matched = _etag_matches(if_none_match, etag)
+    else:
+        # 只有未携带 If-None-Match 时才看 If-Modified-Since
+        if_modified_since = request.headers.get("if-modified-since")
+        matched = (
+            if_modified_since is not None
+            and last_modified is not None
+            and _not_modified_since(if_modified_since, _as_utc(last_modified))
+        )
+    if matched:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
@@ -4,6 +4,10 @@ from fastapi.responses import JSONResponse
 from loguru import logger
 
 # ------------------ 业务异常 ------------------
+class BadRequestException(HTTPException):
+    def __init__(self, detail: str = "Bad request"):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
 class NotFoundException(HTTPException):
     def __init__(self, detail: str = "Resource not found"):
         super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
@@ -20,9 +24,17 @@ class ForbiddenException(HTTPException):
     def __init__(self, detail: str = "Access forbidden"):
         super().__init__(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
 
+class TooManyRequestsException(HTTPException):
+    def __init__(self, retry_after: int, detail: str = "Too many requests"):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
+
 # ------------------ 全局兜底 ------------------
 async def global_exception_handler(request: Request, exc: Exception) -> JSONResponse:
-    logger.exception(f"Unhandled exception at {request.url.path}: {exc}")
+    logger.exception("Unhandled exception at {}: {}", request.url.path, exc)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "Internal server error"},
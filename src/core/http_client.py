@@ -0,0 +1,208 @@
+# src/core/http_client.py
+import asyncio
+import random
+import time
+from collections import deque
+
+import httpx
+from loguru import logger
+
+from src.core.config import settings
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
+
+
+class CircuitOpenError(httpx.TransportError):
+    """熔断打开时快速失败；继承 httpx.HTTPError，调用方现有的异常处理无需修改"""
+
+
+class CircuitBreaker:
+    """按上游主机统计最近请求的失败率
+
+    closed: 正常放行；失败率超过阈值后 → open: 直接拒绝；
+    冷却时间结束后 → half-open: 只放行一个探测请求，成功则恢复 closed。
+    """
+
+    def __init__(
+        self,
+        *,
+        window: int = settings.http_breaker_window,
+        min_requests: int = settings.http_breaker_min_requests,
+        failure_ratio: float = settings.http_breaker_failure_ratio,
+        cooldown: float = settings.http_breaker_cooldown,
+    ):
+        self.window = window
+        self.min_requests = min_requests
+        self.failure_ratio = failure_ratio
+        self.cooldown = cooldown
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def abandon_probe(self) -> None:
+        """探测请求未得出结果（例如被取消）：放弃本次探测，下一个请求重新探测"""
+        self._probing = False
+
+    def record(self, success: bool) -> None:
+        if self._probing:
+            self._probing = False
+            if success:
+                self._opened_at = None
+                self._outcomes.clear()
+            else:
+                self._opened_at = time.monotonic()
+            return
+
+        self._outcomes.append(success)
+        failures = self._outcomes.count(False)
+        if (
+            self._opened_at is None
+            and len(self._outcomes) >= self.min_requests
+            and failures / len(self._outcomes) >= self.failure_ratio
+        ):
+            self._opened_at = time.monotonic()
+            logger.warning("上游失败率 {}/{}，熔断打开", failures, len(self._outcomes))
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """在 httpx 传输层实现 熔断 + 幂等请求抖动重试 + 可选对冲请求
+
+    放在 transport 上而不是包装 client，业务代码照常使用 client.get()。
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        *,
+        retries: int = settings.http_retries,
+        backoff: float = settings.http_retry_backoff,
+        hedge_delay: float | None = settings.http_hedge_delay,
+    ):
+        self.transport = transport
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge_delay = hedge_delay
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker()
+        return self.breakers[host]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        breaker = self._breaker(request.url.host)
+        idempotent = request.method in IDEMPOTENT_METHODS
+        attempts = self.retries + 1 if idempotent else 1
+
+        for attempt in range(attempts):
+            # 与 allow() 之间没有 await，据此判断本次是否为半开状态下的探测请求
+            probe = breaker.state == "half-open"
+            if not breaker.allow():
+                raise CircuitOpenError(
+                    f"Circuit open for {request.url.host}", request=request
+                )
+            settled = False
+            try:
+                if idempotent and self.hedge_delay is not None:
+                    response = await self._send_hedged(request)
+                else:
+                    response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                settled = True
+                breaker.record(False)
+                if attempt == attempts - 1:
+                    raise
+            else:
+                settled = True
+                retryable = response.status_code in RETRYABLE_STATUS
+                breaker.record(response.status_code < 500)
+                if not retryable or attempt == attempts - 1:
+                    return response
+                await response.aclose()
+            finally:
+                # 取消（CancelledError）或其他非传输异常不会走到 record()，探测标记必须在这里清除，
+                # 否则熔断器会永久停在半开且拒绝所有请求
+                if probe and not settled:
+                    breaker.abandon_probe()
+
+            # 全抖动指数退避
+            delay = random.uniform(0, self.backoff * 2**attempt)
+            logger.debug("重试 {} {}（第 {} 次），{:.2f}s 后", request.method, request.url, attempt + 1, delay)
+            await asyncio.sleep(delay)
+
+        raise RuntimeError("unreachable")  # pragma: no cover
+
+    async def _send_hedged(self, request: httpx.Request) -> httpx.Response:
+        """首个请求超过 hedge_delay 仍未返回时，再发一个副本，取先成功的结果"""
+        tasks = [asyncio.create_task(self.transport.handle_async_request(request))]
+        winner: asyncio.Task | None = None
+        error: BaseException | None = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay)
+            if not done:
+                tasks.append(asyncio.create_task(self.transport.handle_async_request(request)))
+            pending = set(tasks)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif winner is None:
+                        winner = task
+        finally:
+            await _discard(task for task in tasks if task is not winner)
+        if winner is None:
+            raise error  # type: ignore[misc]
+        return winner.result()
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+async def _discard(tasks) -> None:
+    """取消并等待落败的请求：关闭已返回的响应（归还连接），取走异常（避免 "exception was never retrieved"）"""
+    tasks = list(tasks)
+    for task in tasks:
+        task.cancel()
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, httpx.Response):
+            await result.aclose()
+
+
+def create_http_client(**kwargs) -> httpx.AsyncClient:
+    """外部 API 共享客户端：显式连接池、keep-alive、HTTP/2、分阶段超时"""
+    transport = httpx.AsyncHTTPTransport(
+        http2=settings.http2,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+    )
+    return httpx.AsyncClient(
+        transport=ResilientTransport(transport),
+        timeout=httpx.Timeout(
+            settings.http_read_timeout,
+            connect=settings.http_connect_timeout,
+            pool=settings.http_pool_timeout,
+        ),
+        **kwargs,
+    )
@@ -0,0 +1,42 @@
+# src/core/lease.py
+import os
+import socket
+import uuid
+
+from redis.asyncio import Redis
+
+# 仅当锁仍归自己所有时才续期 / 释放，避免误操作其他 worker 的租约
+_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLease:
+    """基于 Redis 的租约，用于在多个 worker 中选出唯一的后台任务执行者"""
+
+    def __init__(self, redis: Redis, name: str, ttl: float):
+        self.redis = redis
+        self.key = f"lease:{name}"
+        self.ttl_ms = int(ttl * 1000)
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._renew = redis.register_script(_RENEW_SCRIPT)
+        self._release = redis.register_script(_RELEASE_SCRIPT)
+
+    async def acquire(self) -> bool:
+        """获取或续期租约，返回当前是否为持有者"""
+        if await self._renew(keys=[self.key], args=[self.token, self.ttl_ms]):
+            return True
+        return bool(await self.redis.set(self.key, self.token, nx=True, px=self.ttl_ms))
+
+    async def release(self) -> None:
+        await self._release(keys=[self.key], args=[self.token])
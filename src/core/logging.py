@@ -0,0 +1,137 @@
+# src/core/logging.py
+"""日志配置与请求上下文
+
+loguru 默认在调用方线程同步写 stderr，高并发时每条日志都在事件循环上等待 I/O。
+这里统一改为 enqueue=True：日志记录放入队列，由后台线程写出；
+每条日志带上当前请求的 request_id（X-Request-ID），可选输出 JSON 行。
+访问日志由中间件统一记录：错误请求全部保留，成功请求按路由采样。
+"""
+import random
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from functools import lru_cache
+
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+from src.core.tracing import current_trace_id
+
+REQUEST_ID_HEADER = b"x-request-id"
+# 只接受常见的 id 字符，避免把任意客户端输入原样写进日志和响应头
+_REQUEST_ID_PATTERN = re.compile(r"[\w.\-]{1,64}")
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+TEXT_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
+    "<level>{level: <8}</level> | "
+    "{extra[request_id]} | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
+    "<level>{message}</level>"
+)
+
+
+def _patch_record(record) -> None:
+    # patcher 在调用方执行（入队之前），此时还能读到请求的 contextvar
+    record["extra"].setdefault("request_id", request_id_var.get() or "-")
+    trace_id = current_trace_id()
+    if trace_id is not None:
+        record["extra"]["trace_id"] = trace_id
+
+
+def setup_logging(
+    *,
+    level: str = settings.log_level,
+    json: bool = settings.log_json,
+    enqueue: bool = settings.log_enqueue,
+) -> None:
+    """替换 loguru 默认的同步 sink；API 进程与任务 worker 启动时各调用一次"""
+    logger.remove()
+    logger.configure(patcher=_patch_record)
+    logger.add(
+        sys.stderr,
+        level=level,
+        format=TEXT_FORMAT,
+        serialize=json,
+        enqueue=enqueue,
+        backtrace=False,
+        diagnose=settings.debug,  # 异常回溯中展开变量值，仅开发环境开启
+    )
+
+
+@lru_cache(maxsize=512)
+def access_sample_rate(route: str) -> float:
+    """按最长匹配的路由模板前缀取采样率"""
+    matched = [prefix for prefix in settings.log_access_sample_routes if route.startswith(prefix)]
+    if not matched:
+        return settings.log_access_sample_rate
+    return settings.log_access_sample_routes[max(matched, key=len)]
+
+
+def _incoming_request_id(scope: Scope) -> str | None:
+    for name, value in scope["headers"]:
+        if name == REQUEST_ID_HEADER:
+            candidate = value.decode("latin-1")
+            return candidate if _REQUEST_ID_PATTERN.fullmatch(candidate) else None
+    return None
+
+
+class RequestContextMiddleware:
+    """为每个请求分配 request_id（沿用上游传入的 X-Request-ID），并记录采样后的访问日志
+
+    放在最外层，降载返回的 503 同样带 request_id 并被记录。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _incoming_request_id(scope) or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (REQUEST_ID_HEADER, request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            self._log_access(scope, status, time.perf_counter() - started)
+            request_id_var.reset(token)
+
+    @staticmethod
+    def _log_access(scope: Scope, status: int, elapsed: float) -> None:
+        # FastAPI 匹配成功后会把路由写入 scope，采样按模板（/dishes/{dish_id}）而不是具体路径
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        if status >= 500:
+            level = "ERROR"
+        elif status >= 400:
+            level = "WARNING"
+        else:
+            rate = access_sample_rate(route)
+            if rate <= 0 or (rate < 1 and random.random() >= rate):
+                return
+            level = "INFO"
+        logger.bind(
+            method=scope["method"],
+            path=scope["path"],
+            route=route,
+            status=status,
+            duration_ms=round(elapsed * 1000, 2),
+        ).log(level, "{} {} {} {:.1f}ms", scope["method"], scope["path"], status, elapsed * 1000)
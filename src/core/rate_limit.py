@@ -0,0 +1,191 @@
+# src/core/rate_limit.py
+import asyncio
+import math
+import time
+from typing import Literal
+
+from fastapi import Depends, Request
+from fastapi.responses import JSONResponse
+from loguru import logger
+from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.core.config import settings
+from src.core.database import engine
+from src.core.exception import TooManyRequestsException
+from src.core.redis_db import get_cache_redis
+from src.auth.model import User
+from src.auth.user_manager import current_user_optional
+
+# 令牌桶：在 Redis 内原子地补充与扣减令牌，使用服务器时间避免各 worker 时钟偏差
+# 返回 {是否放行, 需等待毫秒数}
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate / 1000)
+
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = math.ceil((cost - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return {allowed, wait}
+"""
+
+
+class RateLimit:
+    """按用户 + 按 IP 的令牌桶限流依赖，可在 APIRouter(dependencies=[...]) 中按路由配置
+
+    rate: 每秒补充的令牌数；burst: 桶容量（允许的瞬时突发）
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        user_rate: float = settings.rate_limit_user_rate,
+        user_burst: int = settings.rate_limit_user_burst,
+        ip_rate: float = settings.rate_limit_ip_rate,
+        ip_burst: int = settings.rate_limit_ip_burst,
+    ):
+        self.name = name
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.ip_rate = ip_rate
+        self.ip_burst = ip_burst
+        self._script: AsyncScript | None = None
+
+    async def _consume(self, redis: Redis, key: str, rate: float, burst: int) -> int:
+        """返回需要等待的秒数，0 表示放行"""
+        if self._script is None or self._script.registered_client is not redis:
+            self._script = redis.register_script(_TOKEN_BUCKET_SCRIPT)
+        allowed, wait_ms = await self._script(keys=[key], args=[rate, burst, 1])
+        return 0 if allowed else max(1, math.ceil(int(wait_ms) / 1000))
+
+    async def __call__(
+        self,
+        request: Request,
+        redis: Redis = Depends(get_cache_redis),
+        user: User | None = Depends(current_user_optional),
+    ) -> None:
+        if not settings.rate_limit_enabled:
+            return
+
+        ip = request.client.host if request.client else "unknown"
+        retry_after = await self._consume(
+            redis, f"ratelimit:{self.name}:ip:{ip}", self.ip_rate, self.ip_burst
+        )
+        if not retry_after and user is not None:
+            retry_after = await self._consume(
+                redis,
+                f"ratelimit:{self.name}:user:{user.id}",
+                self.user_rate,
+                self.user_burst,
+            )
+        if retry_after:
+            raise TooManyRequestsException(retry_after)
+
+
+class LoadMonitor:
+    """定时采样事件循环延迟与连接池借出等待时间（指数平滑），由 lifespan 启停"""
+
+    def __init__(
+        self,
+        *,
+        max_loop_lag: float = settings.shed_max_loop_lag,
+        max_pool_wait: float = settings.shed_max_pool_wait,
+        check_interval: float = 0.1,
+    ):
+        self.max_loop_lag = max_loop_lag
+        self.max_pool_wait = max_pool_wait
+        self.check_interval = check_interval
+        self.loop_lag = 0.0
+        self.pool_wait = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if settings.shed_enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.loop_lag = self.pool_wait = 0.0
+
+    async def _run(self) -> None:
+        """定时 sleep 并测量实际唤醒延迟；同时取出这段时间内借连接的最长等待
+
+        没有新的借出时采样为 0，平滑值会自然衰减，不会因为降载挡住请求而一直卡在高位。
+        """
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.check_interval)
+            lag = time.perf_counter() - started - self.check_interval
+            self.loop_lag = 0.8 * self.loop_lag + 0.2 * max(lag, 0.0)
+            take_max_wait = getattr(engine.pool, "take_max_wait", None)
+            if take_max_wait is not None:
+                self.pool_wait = 0.8 * self.pool_wait + 0.2 * take_max_wait()
+
+    def overloaded(self) -> str | None:
+        if self.loop_lag > self.max_loop_lag:
+            return f"event loop lag {self.loop_lag * 1000:.0f}ms"
+        if self.pool_wait > self.max_pool_wait:
+            return f"database pool wait {self.pool_wait * 1000:.0f}ms"
+        return None
+
+
+load_monitor = LoadMonitor()
+
+
+class LoadSheddingMiddleware:
+    """自适应降载：事件循环延迟或借数据库连接已在排队时，直接返回 503 而不是继续排队
+
+    排队等待连接池（pool_timeout=30s）只会让延迟雪崩，快速失败并提示 Retry-After
+    可以让客户端退避，已接收的请求也能尽快完成。指标由 load_monitor 在后台采样。
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        monitor: LoadMonitor = load_monitor,
+        retry_after: int = settings.shed_retry_after,
+        exempt_paths: tuple[str, ...] = ("/health",),
+    ):
+        self.app = app
+        self.monitor = monitor
+        self.retry_after = retry_after
+        self.exempt_paths = exempt_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.shed_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        reason = None if scope["path"] in self.exempt_paths else self.monitor.overloaded()
+        if reason:
+            logger.warning("触发降载，拒绝请求 {}: {}", scope["path"], reason)
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Service overloaded, please retry later"},
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
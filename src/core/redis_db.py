@@ -3,25 +3,56 @@ from typing import cast
 
 from fastapi import Request
 from redis.asyncio import Redis
+from redis.asyncio.retry import Retry
+from redis.backoff import EqualJitterBackoff
+from redis.exceptions import ConnectionError, TimeoutError
+
+from src.core.client_cache import ClientSideCache
 from src.core.config import settings
 
-def create_auth_redis() -> Redis:
+
+def create_redis(url: str, *, max_connections: int, client_name: str) -> Redis:
+    """统一的 Redis 客户端工厂：连接池大小、超时、重试、keep-alive、健康检查均来自配置"""
     return Redis.from_url(
-        settings.auth_redis_url,
-        max_connections=20,
+        url,
+        max_connections=max_connections,
         decode_responses=True,
+        socket_timeout=settings.redis_socket_timeout,
+        socket_connect_timeout=settings.redis_connect_timeout,
+        socket_keepalive=settings.redis_socket_keepalive,
+        health_check_interval=settings.redis_health_check_interval,
+        retry=Retry(
+            EqualJitterBackoff(
+                cap=settings.redis_retry_backoff_cap,
+                base=settings.redis_retry_backoff_base,
+            ),
+            settings.redis_retries,
+        ),
+        retry_on_error=[ConnectionError, TimeoutError],
+        client_name=client_name,
+    )
+
+
+def create_auth_redis() -> Redis:
+    return create_redis(
+        settings.auth_redis_url,
+        max_connections=settings.auth_redis_max_connections,
+        client_name="what2eat-auth",
     )
 
 def create_cache_redis() -> Redis:
-    return Redis.from_url(
+    return create_redis(
         settings.cache_redis_url,
-        max_connections=20,
-        decode_responses=True,
+        max_connections=settings.cache_redis_max_connections,
+        client_name="what2eat-cache",
     )
-    
-    
+
+
 async def get_auth_redis(request: Request) -> Redis:
     return cast(Redis, request.state.auth_redis)
 
 async def get_cache_redis(request: Request) -> Redis:
-    return cast(Redis,request.state.cache_redis)
\ No newline at end of file
+    return cast(Redis,request.state.cache_redis)
+
+async def get_token_cache(request: Request) -> ClientSideCache:
+    return cast(ClientSideCache, request.state.token_cache)
@@ -0,0 +1,118 @@
+# src/core/sharding.py
+"""按用户哈希分片（可选）：collection_shard_urls 非空时启用
+
+收藏与中间表随用户增长，按 user_id 的跳跃一致性哈希（Jump Consistent Hash）落到 N 个库之一；
+菜品目录体量小且全局共享，始终读写主库。分片数从 N 增加到 N+1 时，
+只有约 1/(N+1) 的用户需要迁移，且都迁往新增的分片（见 python -m src.collections.rebalance）。
+本地测试可以用多个 SQLite 文件充当分片。
+"""
+import asyncio
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from sqlalchemy import MetaData, Table
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from src.core.config import settings
+
+T = TypeVar("T")
+
+_MASK64 = (1 << 64) - 1
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Lamping & Veach, "A Fast, Minimal Memory, Consistent Hash Algorithm"（2014）"""
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & _MASK64
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def user_shard(user_id: uuid.UUID, buckets: int) -> int:
+    return jump_hash(user_id.int & _MASK64, buckets)
+
+
+def _engine_options(url: str) -> dict:
+    # 连接池参数只对服务端数据库有意义，SQLite 分片与主库 SQLite 一致只设置 echo
+    if url.startswith("sqlite"):
+        return {"echo": settings.echo}
+    return {
+        "echo": settings.echo,
+        "pool_size": settings.shard_pool_size,
+        "max_overflow": settings.shard_max_overflow,
+        "pool_timeout": settings.pool_timeout,
+        "pool_pre_ping": settings.pool_pre_ping,
+    }
+
+
+class ShardRouter:
+    """分片引擎与会话工厂，按 user_id 选择分片"""
+
+    def __init__(self, urls: list[str]):
+        if not urls:
+            raise ValueError("至少需要一个分片")
+        self.urls = list(urls)
+        self.engines: list[AsyncEngine] = [
+            create_async_engine(url, **_engine_options(url)) for url in self.urls
+        ]
+        self.session_factories: list[async_sessionmaker[AsyncSession]] = [
+            async_sessionmaker(
+                class_=AsyncSession, autoflush=False, expire_on_commit=False, bind=engine
+            )
+            for engine in self.engines
+        ]
+
+    def __len__(self) -> int:
+        return len(self.engines)
+
+    def shard_of(self, user_id: uuid.UUID) -> int:
+        return user_shard(user_id, len(self.engines))
+
+    def session_factory_for(self, user_id: uuid.UUID) -> async_sessionmaker[AsyncSession]:
+        return self.session_factories[self.shard_of(user_id)]
+
+    async def map(self, func: Callable[[AsyncSession], Awaitable[T]]) -> list[T]:
+        """在每个分片上各开一个会话并发执行 func，按分片顺序返回结果"""
+
+        async def run(factory: async_sessionmaker[AsyncSession]) -> T:
+            async with factory() as session:
+                return await func(session)
+
+        return await asyncio.gather(*(run(factory) for factory in self.session_factories))
+
+    async def create_tables(self, tables: list[Table]) -> None:
+        for engine in self.engines:
+            async with engine.begin() as conn:
+                await conn.run_sync(tables[0].metadata.create_all, tables=tables)
+
+    async def dispose(self) -> None:
+        await asyncio.gather(*(engine.dispose() for engine in self.engines))
+
+
+def local_tables(tables: list[Table]) -> list[Table]:
+    """复制表结构到独立的 MetaData，去掉指向分片外（user、dishes）的外键"""
+    metadata = MetaData(naming_convention=tables[0].metadata.naming_convention)
+    names = {table.name for table in tables}
+    copies = [table.to_metadata(metadata) for table in tables]
+    for table in copies:
+        for constraint in list(table.foreign_key_constraints):
+            if constraint.elements[0].target_fullname.split(".")[0] not in names:
+                table.constraints.discard(constraint)
+                table.foreign_keys.difference_update(constraint.elements)
+                for column in constraint.columns:
+                    column.foreign_keys.difference_update(constraint.elements)
+    return copies
+
+
+# 与 engine / SessionFactory 一样在导入时创建；未配置分片时为 None，收藏表留在主库
+shard_router: ShardRouter | None = (
+    ShardRouter(settings.collection_shard_urls) if settings.collection_shard_urls else None
+)
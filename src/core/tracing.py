@@ -0,0 +1,162 @@
+# src/core/tracing.py
+"""链路追踪（OpenTelemetry，可选依赖：uv sync --extra tracing）
+
+- 入口：FastAPI 请求 span（路由层）
+- 业务：@traced 为 Service / Repository 的公开协程方法各建一个子 span
+- 依赖：SQLAlchemy 语句、Redis 命令、httpx 请求由官方 instrumentation 记录
+- 后台任务：投递时把 traceparent 写入任务 hash，worker 执行时以其为父 span
+
+根 span 按 tracing_sample_rate 采样，子 span 沿用父 span 的决定；未采样的 span 不记录属性，
+导出由 BatchSpanProcessor 在后台线程批量完成，开销小到可以在生产环境常开。
+未启用或未安装时 @traced 原样返回类，没有任何额外开销。
+"""
+import functools
+import inspect
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from fastapi import FastAPI
+from loguru import logger
+
+from src.core.config import settings
+
+try:
+    from opentelemetry import propagate, trace
+except ImportError:  # 可选依赖：uv sync --extra tracing
+    propagate = trace = None
+
+TRACING_ENABLED = settings.tracing_enabled and trace is not None
+
+_tracer = trace.get_tracer("what2eat") if trace is not None else None
+_provider = None
+
+
+def traced(layer: str):
+    """类装饰器：为公开的协程方法包一层 span，名称形如 DishService.get_dish_by_id"""
+
+    def decorate(cls: type) -> type:
+        if not TRACING_ENABLED:
+            return cls
+        for attr, func in vars(cls).items():
+            if attr.startswith("_") or not inspect.iscoroutinefunction(func):
+                continue
+            setattr(cls, attr, _wrap(func, f"{cls.__name__}.{attr}", layer))
+        return cls
+
+    return decorate
+
+
+def _wrap(func, name: str, layer: str):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with _tracer.start_as_current_span(name, attributes={"app.layer": layer}):
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+
+def inject_context() -> dict[str, str]:
+    """当前 span 的传播头（traceparent 等），供后台任务恢复上下文"""
+    carrier: dict[str, str] = {}
+    if TRACING_ENABLED:
+        propagate.inject(carrier)
+    return carrier
+
+
+@contextmanager
+def task_span(name: str, carrier: dict[str, str] | None, **attributes) -> Iterator[None]:
+    """后台任务的 CONSUMER span，父 span 为投递任务的请求"""
+    if not TRACING_ENABLED:
+        yield
+        return
+    parent = propagate.extract(carrier) if carrier else None
+    with _tracer.start_as_current_span(
+        f"task {name}", context=parent, kind=trace.SpanKind.CONSUMER, attributes=attributes
+    ):
+        yield
+
+
+def current_trace_id() -> str | None:
+    if not TRACING_ENABLED:
+        return None
+    span_context = trace.get_current_span().get_span_context()
+    return format(span_context.trace_id, "032x") if span_context.is_valid else None
+
+
+def _exporter():
+    if settings.tracing_exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    # 本地 JSON 行文件，可直接导入 Jaeger / Tempo 等工具，也方便 grep
+    path = Path(settings.tracing_file_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return ConsoleSpanExporter(
+        out=path.open("a", encoding="utf-8"),
+        formatter=lambda span: span.to_json(indent=None) + "\n",
+    )
+
+
+def _instrument(app: FastAPI | None) -> None:
+    from src.core.database import engine
+
+    try:
+        from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+
+        SQLAlchemyInstrumentor().instrument(engine=engine.sync_engine)
+    except ImportError:
+        logger.warning("未安装 opentelemetry-instrumentation-sqlalchemy，跳过数据库 span")
+    try:
+        from opentelemetry.instrumentation.redis import RedisInstrumentor
+
+        RedisInstrumentor().instrument()
+    except ImportError:
+        logger.warning("未安装 opentelemetry-instrumentation-redis，跳过 Redis span")
+    try:
+        from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+
+        HTTPXClientInstrumentor().instrument()
+    except ImportError:
+        logger.warning("未安装 opentelemetry-instrumentation-httpx，跳过外部请求 span")
+    if app is not None:
+        try:
+            from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
+            FastAPIInstrumentor.instrument_app(
+                app, excluded_urls=settings.tracing_excluded_urls
+            )
+        except ImportError:
+            logger.warning("未安装 opentelemetry-instrumentation-fastapi，跳过请求 span")
+
+
+def setup_tracing(app: FastAPI | None = None) -> None:
+    """配置全局 TracerProvider 与自动埋点；API 进程传入 app，任务 worker 不传"""
+    global _provider
+    if not TRACING_ENABLED or _provider is not None:
+        return
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        logger.warning("未安装 OpenTelemetry SDK，链路追踪未启用：uv sync --extra tracing")
+        return
+
+    # 进程退出时 TracerProvider 会自动 shutdown，把队列中的 span 导出完
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.tracing_service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_rate)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(_exporter()))
+    trace.set_tracer_provider(_provider)
+    _instrument(app)
+    logger.info(
+        "链路追踪已启用：{} 导出，采样率 {}",
+        settings.tracing_exporter,
+        settings.tracing_sample_rate,
+    )
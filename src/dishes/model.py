@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import TYPE_CHECKING
-from sqlalchemy import Integer, String, Text
+from sqlalchemy import DateTime, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.base_model import Base, DateTimeMixin
@@ -14,6 +15,8 @@ class Dish(Base, DateTimeMixin):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     description: Mapped[str | None] = mapped_column(Text)
+    # 软删除时间：非空即对所有读取隐藏，关联行由后台任务分批清理后再物理删除
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
     collections: Mapped[list["Collection"]] = relationship(
         "Collection",
@@ -0,0 +1,174 @@
+# src/dishes/popularity.py
+"""菜品热度（被收藏次数）排行
+
+有序集合 dish:popularity 保存每道未删除菜品的被收藏次数，未被收藏的菜品分数为 0，
+因此按热度分页可以直接读取有序集合，不必对 collection_dish 做 GROUP BY。
+收藏增删时原子地 ZINCRBY；进程崩溃、后台物理清理等造成的偏差由对账任务定期按数据库校正。
+"""
+import asyncio
+
+from loguru import logger
+from redis.asyncio import Redis
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.config import settings
+from src.core.etag import table_version_key
+from src.core.lease import RedisLease
+from src.core.sharding import shard_router
+from src.collections.model import CollectionDish
+from src.dishes.model import Dish
+
+POPULARITY_KEY = "dish:popularity"
+# 热度变化时递增，按热度排序的列表 ETag 随之失效
+POPULARITY_VERSION_KEY = table_version_key("dish_popularity")
+_REBUILD_BATCH = 10_000
+
+
+async def add_dish(redis: Redis, dish_id: int) -> None:
+    """新菜品以 0 分加入排行（已存在时不覆盖）"""
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.zadd(POPULARITY_KEY, {str(dish_id): 0}, nx=True)
+        pipe.incr(POPULARITY_VERSION_KEY)
+        await pipe.execute()
+
+
+async def remove_dishes(redis: Redis, dish_ids: list[int]) -> None:
+    if not dish_ids:
+        return
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.zrem(POPULARITY_KEY, *(str(dish_id) for dish_id in dish_ids))
+        pipe.incr(POPULARITY_VERSION_KEY)
+        await pipe.execute()
+
+
+async def remove_dish(redis: Redis, dish_id: int) -> None:
+    await remove_dishes(redis, [dish_id])
+
+
+async def incr_popularity(redis: Redis, changes: dict[int, int]) -> None:
+    """批量调整被收藏次数（删除收藏夹时一次调整其中所有菜品）"""
+    if not changes:
+        return
+    async with redis.pipeline(transaction=True) as pipe:
+        for dish_id, delta in changes.items():
+            pipe.zincrby(POPULARITY_KEY, delta, str(dish_id))
+        pipe.incr(POPULARITY_VERSION_KEY)
+        await pipe.execute()
+
+
+async def popularity_page(
+    redis: Redis, offset: int, limit: int, *, descending: bool = True
+) -> list[int]:
+    """全量排行分页：一次 ZRANGE 得到当前页的菜品 id"""
+    read = redis.zrevrange if descending else redis.zrange
+    return [int(i) for i in await read(POPULARITY_KEY, offset, offset + limit - 1)]
+
+
+async def rank_ids(
+    redis: Redis,
+    dish_ids: list[int],
+    offset: int,
+    limit: int,
+    *,
+    descending: bool = True,
+) -> list[int]:
+    """对候选集合（标签筛选 / 搜索结果）按热度排序后分页，同分按 id 升序"""
+    if not dish_ids:
+        return []
+    scores = await redis.zmscore(POPULARITY_KEY, [str(i) for i in dish_ids])
+    sign = -1 if descending else 1
+    ranked = sorted(
+        zip(dish_ids, scores), key=lambda pair: (sign * (pair[1] or 0), pair[0])
+    )
+    return [dish_id for dish_id, _ in ranked[offset : offset + limit]]
+
+
+async def top_dishes(redis: Redis, limit: int) -> list[tuple[int, int]]:
+    """被收藏次数最多的菜品 (id, 次数)，不含未被收藏的菜品"""
+    pairs = await redis.zrevrange(POPULARITY_KEY, 0, limit - 1, withscores=True)
+    return [(int(member), int(score)) for member, score in pairs if score > 0]
+
+
+async def _shard_counts(session: AsyncSession) -> list[tuple[int, int]]:
+    query = select(CollectionDish.dish_id, func.count()).group_by(CollectionDish.dish_id)
+    return [tuple(row) for row in await session.execute(query)]
+
+
+async def _sharded_scores(session: AsyncSession) -> dict[str, int]:
+    """分片模式：主库给出未删除的菜品，各分片并发统计收藏次数后合并"""
+    query = select(Dish.id).where(Dish.deleted_at.is_(None))
+    scores = {str(dish_id): 0 for dish_id in await session.scalars(query)}
+    for counts in await shard_router.map(_shard_counts):
+        for dish_id, count in counts:
+            if str(dish_id) in scores:
+                scores[str(dish_id)] += count
+    return scores
+
+
+async def build_popularity(session: AsyncSession, redis: Redis, *, force: bool = False) -> int:
+    """从数据库全量构建；已存在时默认跳过
+
+    先写入临时键再 RENAME，读取方不会看到构建到一半的排行。
+    构建期间发生的增量更新会被覆盖，下一轮对账时再校正。
+    """
+    if not force and await redis.exists(POPULARITY_KEY):
+        return 0
+
+    if shard_router is None:
+        query = (
+            select(Dish.id, func.count(CollectionDish.dish_id))
+            .outerjoin(CollectionDish, CollectionDish.dish_id == Dish.id)
+            .where(Dish.deleted_at.is_(None))
+            .group_by(Dish.id)
+        )
+        scores = {str(dish_id): count for dish_id, count in await session.execute(query)}
+    else:
+        scores = await _sharded_scores(session)
+
+    staging = f"{POPULARITY_KEY}:rebuild"
+    items = list(scores.items())
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(staging)
+        for start in range(0, len(items), _REBUILD_BATCH):
+            pipe.zadd(staging, dict(items[start : start + _REBUILD_BATCH]))
+        if items:
+            pipe.rename(staging, POPULARITY_KEY)
+        else:
+            pipe.delete(POPULARITY_KEY)
+        pipe.incr(POPULARITY_VERSION_KEY)
+        await pipe.execute()
+    logger.info("菜品热度排行构建完成，共 {} 道菜品", len(items))
+    return len(items)
+
+
+class PopularityReconciler:
+    """定期按数据库校正热度排行
+
+    所有 worker 都会启动该任务，但只有持有租约的 worker 真正执行对账。
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        interval: float = settings.popularity_reconcile_interval,
+    ):
+        self.redis = redis
+        self.session_factory = session_factory
+        self.interval = interval
+        self.lease = RedisLease(redis, "popularity-reconciler", ttl=interval * 3)
+
+    async def run(self) -> None:
+        while True:
+            # 启动时已按需构建过，先等待一个周期
+            await asyncio.sleep(self.interval)
+            try:
+                if await self.lease.acquire():
+                    async with self.session_factory() as session:
+                        await build_popularity(session, self.redis, force=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("菜品热度对账失败: {}", e)
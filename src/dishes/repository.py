@@ -1,13 +1,45 @@
 # src/dishes/repository.py
+import json
+from collections.abc import Sequence
+from datetime import datetime, timezone
 from typing import Mapping, Any
 
-from sqlalchemy import select, or_, desc, asc
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    RowMapping,
+    any_,
+    bindparam,
+    func,
+    insert,
+    select,
+    or_,
+    desc,
+    asc,
+    update,
+)
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.config import settings
+from src.core.tracing import traced
 from src.dishes.model import Dish
 
 
+def _id_in(dish_ids: list[int]) -> ColumnElement[bool]:
+    """Dish.id IN (...) 的单参数写法
+
+    标签筛选可能匹配数万个 id，展开成逐个绑定参数会超过 asyncpg 的 32767 个参数上限
+    （SQLite 默认上限为 32766），因此整个列表只占一个参数。
+    """
+    if settings.db_type == "postgres":
+        return Dish.id == any_(bindparam(None, dish_ids, type_=postgresql.ARRAY(Integer)))
+    ids = func.json_each(json.dumps(dish_ids)).table_valued("value")
+    return Dish.id.in_(select(ids.c.value))
+
+
+@traced("repository")
 class DishRepository:
     """数据库表仓库层"""
 
@@ -15,23 +47,68 @@ class DishRepository:
         self.session = session
 
     async def create(self, dish_data: Mapping[str, Any]) -> Dish:
-        dish = Dish(**dish_data)
-        self.session.add(dish)
+        """INSERT ... RETURNING：一条语句写入并取回完整的行，提交后无需 refresh"""
         try:
+            dish = await self.session.scalar(insert(Dish).values(**dish_data).returning(Dish))
             await self.session.commit()
         except IntegrityError:
             await self.session.rollback()
             raise
-        await self.session.refresh(dish)
         return dish
 
     async def get_by_id(self, dish_id: int) -> Dish | None:
         """使用 id 获取数据"""
         dish = await self.session.get(Dish, dish_id)
-        if not dish:
+        if not dish or dish.deleted_at is not None:
             return None
         return dish
 
+    async def get_updated_at(self, dish_id: int) -> datetime | None:
+        """只查询 updated_at，用于条件请求，不加载 ORM 对象"""
+        return await self.session.scalar(
+            select(Dish.updated_at).where(Dish.id == dish_id, Dish.deleted_at.is_(None))
+        )
+
+    async def get_by_ids(self, dish_ids: list[int]) -> list[Dish]:
+        """批量获取数据（不保证顺序）"""
+        if not dish_ids:
+            return []
+        query = select(Dish).where(Dish.id.in_(dish_ids), Dish.deleted_at.is_(None))
+        return list(await self.session.scalars(query))
+
+    async def get_rows_by_ids(
+        self, dish_ids: list[int], columns: Sequence[str]
+    ) -> list[RowMapping]:
+        """批量获取指定列（不保证顺序），不创建 ORM 对象"""
+        if not dish_ids:
+            return []
+        query = select(*_columns(columns)).where(
+            Dish.id.in_(dish_ids), Dish.deleted_at.is_(None)
+        )
+        return list((await self.session.execute(query)).mappings())
+
+    async def get_ids(
+        self,
+        *,
+        search: str | None = None,
+        dish_ids: list[int] | None = None,
+        limit: int | None = None,
+    ) -> list[int]:
+        """只查询满足筛选条件的菜品 id，排序与分页由调用方完成（例如按热度）"""
+        query = select(Dish.id).where(Dish.deleted_at.is_(None))
+        if dish_ids is not None:
+            if not dish_ids:
+                return []
+            query = query.where(_id_in(dish_ids))
+        if search:
+            pattern = f"%{search}%"
+            query = query.where(
+                or_(Dish.name.ilike(pattern), Dish.description.ilike(pattern))
+            )
+        if limit is not None:
+            query = query.limit(limit)
+        return list(await self.session.scalars(query))
+
     async def get_all(
         self,
         *,
@@ -40,9 +117,26 @@ class DishRepository:
         direction: str = "asc",
         limit: int = 10,
         offset: int = 0,
-    ) -> list[Dish]:
-        """获取所有数据"""
-        query = select(Dish)
+        dish_ids: list[int] | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> list[RowMapping]:
+        """获取所有数据，dish_ids 为标签筛选得到的升序 id 列表
+
+        只 SELECT columns 指定的列（None 表示全部列），返回行映射而不是 ORM 对象：
+        大页查询不进入 identity map，也不会加载用不到的 description 等文本列。
+        """
+        query = select(*_columns(columns)).where(Dish.deleted_at.is_(None))
+
+        # 0. 标签筛选
+        if dish_ids is not None:
+            if not dish_ids:
+                return []
+            if order_by == "id" and not search:
+                # 按 id 排序时直接在内存中分页，只把当前页的 id 交给数据库
+                ordered = dish_ids if direction == "asc" else dish_ids[::-1]
+                dish_ids = ordered[max(offset, 0) : max(offset, 0) + min(limit, 500)]
+                offset = 0
+            query = query.where(_id_in(dish_ids))
 
         # 1. 搜索
         if search:
@@ -64,28 +158,65 @@ class DishRepository:
         limit = min(limit, 500)
         offset = max(offset, 0)
         paginated_query = query.offset(offset).limit(limit)
-        items = list(await self.session.scalars(paginated_query))
+        items = list((await self.session.execute(paginated_query)).mappings())
 
         return items
 
     async def update(self, dish_data: Mapping[str, Any], dish_id: int) -> Dish | None:
-        """更新数据"""
-        dish = await self.session.get(Dish, dish_id)
-        if not dish:
-            return None
+        """UPDATE ... RETURNING：不存在或已删除时返回 None"""
+        if not dish_data:
+            return await self.get_by_id(dish_id)
+        try:
+            dish = await self.session.scalar(
+                update(Dish)
+                .where(Dish.id == dish_id, Dish.deleted_at.is_(None))
+                .values(**dish_data)
+                .returning(Dish),
+                execution_options={"populate_existing": True},
+            )
+            await self.session.commit()
+        except IntegrityError:
+            await self.session.rollback()
+            raise
+        return dish
 
-        for key, value in dish_data.items():
-            setattr(dish, key, value)
+    async def bulk_update(self, dish_ids: list[int], values: Mapping[str, Any]) -> list[Dish]:
+        """一条 UPDATE ... WHERE id IN (...) RETURNING，返回实际更新的菜品（跳过不存在与已删除）"""
+        result = await self.session.scalars(
+            update(Dish)
+            .where(Dish.id.in_(dish_ids), Dish.deleted_at.is_(None))
+            .values(**values)
+            .returning(Dish),
+            execution_options={"synchronize_session": False},
+        )
+        dishes = list(result)
         await self.session.commit()
-        await self.session.refresh(dish)
-        return dish
+        return dishes
+
+    async def bulk_delete(self, dish_ids: list[int]) -> list[int]:
+        """一条 UPDATE 批量软删除，返回实际删除的菜品 id"""
+        result = await self.session.scalars(
+            update(Dish)
+            .where(Dish.id.in_(dish_ids), Dish.deleted_at.is_(None))
+            .values(deleted_at=datetime.now(timezone.utc))
+            .returning(Dish.id),
+            execution_options={"synchronize_session": False},
+        )
+        deleted = list(result)
+        await self.session.commit()
+        return deleted
 
     async def delete(self, dish_id: int) -> bool:
-        """删除数据"""
-        dish = await self.session.get(Dish, dish_id)
-        if not dish:
-            return False
-
-        await self.session.delete(dish)
+        """软删除：只标记 deleted_at，不在请求内级联删除收藏关联"""
+        result = await self.session.execute(
+            update(Dish)
+            .where(Dish.id == dish_id, Dish.deleted_at.is_(None))
+            .values(deleted_at=datetime.now(timezone.utc))
+        )
         await self.session.commit()
-        return True
+        return result.rowcount > 0
+
+
+def _columns(names: Sequence[str] | None):
+    table = Dish.__table__.c
+    return list(table) if names is None else [table[name] for name in names]
@@ -1,24 +1,74 @@
 # src/dishes/router.py
-from typing import Literal
+from typing import Literal, cast
 
-from fastapi import APIRouter, Depends, Path, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
 from loguru import logger
+from redis.asyncio import Redis
 
 from src.dishes.service import DishService
 from src.dishes.repository import DishRepository
-from src.dishes.schema import DishCreate, DishUpdate, DishResponse
+from src.dishes.schema import (
+    DISH_FIELDS,
+    DishCreate,
+    DishUpdate,
+    DishResponse,
+    DishBulkSelector,
+    DishBulkUpdate,
+    DishBulkResponse,
+    PopularDishResponse,
+    SimilarDishResponse,
+)
+from src.dishes.similarity import SimilarityIndex
+from src.tags.bitmap import TagBitmapIndex
+from src.tags.dependencies import get_tag_index, get_tag_service
+from src.tags.schema import DishFacetResponse
+from src.tags.service import TagService
 from src.core.database import get_db
+from src.core.etag import check_not_modified
+from src.core.exception import BadRequestException
+from src.core.redis_db import get_cache_redis
+from src.core.rate_limit import RateLimit
+from src.tasks.schema import JobAccepted
+from src.auth.schemas import UserRead
 from src.auth.user_manager import get_current_user, current_superuser
 
 router = APIRouter(
-    prefix="/dishes", tags=["Dishes"], dependencies=[Depends(get_current_user)] 
+    prefix="/dishes",
+    tags=["Dishes"],
+    dependencies=[Depends(get_current_user), Depends(RateLimit("dishes"))],
 )
 
 
+async def get_similarity_index(request: Request) -> SimilarityIndex:
+    return cast(SimilarityIndex, request.state.similarity_index)
+
+
 # 注入仓库 + 服务层
-async def get_dish_service(session=Depends(get_db)) -> DishService:
+async def get_dish_service(
+    session=Depends(get_db),
+    redis: Redis = Depends(get_cache_redis),
+    similarity: SimilarityIndex = Depends(get_similarity_index),
+    tag_index: TagBitmapIndex = Depends(get_tag_index),
+) -> DishService:
     repository = DishRepository(session)
-    return DishService(repository)
+    return DishService(repository, redis, similarity, tag_index)
+
+
+def get_dish_fields(
+    fields: str | None = Query(
+        None,
+        description=f"返回的字段，逗号分隔，可选 {','.join(DISH_FIELDS)}，默认全部",
+        examples=["id,name"],
+    ),
+) -> tuple[str, ...]:
+    """解析 ?fields=，按 DishResponse 的字段顺序返回"""
+    if not fields:
+        return DISH_FIELDS
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(DISH_FIELDS)
+    if unknown:
+        raise BadRequestException(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(name for name in DISH_FIELDS if name in requested) or DISH_FIELDS
 
 
 @router.post("/", response_model=DishResponse, status_code=status.HTTP_201_CREATED)
@@ -30,41 +80,121 @@ async def create_dish(
     return new_dish
 
 
+@router.get("/facets", response_model=DishFacetResponse)
+async def dish_facets(
+    tag: list[str] | None = Query(None, description="标签筛选，格式 kind:name，可重复"),
+    tag_mode: Literal["all", "any"] = Query("all", description="all=同时满足，any=满足任一"),
+    tag_service: TagService = Depends(get_tag_service),
+):
+    """标签分面计数（基于内存位图）"""
+    return await tag_service.facet_counts(tag, tag_mode)
+
+
+@router.get("/top", response_model=list[PopularDishResponse])
+async def list_top_dishes(
+    limit: int = Query(10, ge=1, le=100),
+    service: DishService = Depends(get_dish_service),
+):
+    """最受欢迎的菜品（按被收藏次数）"""
+    return await service.list_top_dishes(limit)
+
+
 @router.get("/{dish_id}", response_model=DishResponse)
 async def get_dish(
+    request: Request,
+    response: Response,
     dish_id: int = Path(..., description="菜品ID"),
     service: DishService = Depends(get_dish_service),
 ):
-    """获取单个菜品"""
+    """获取单个菜品（支持 If-None-Match / If-Modified-Since）"""
 
-    logger.debug(f"正在获取菜品 ID: {dish_id}")
+    logger.debug("正在获取菜品 ID: {}", dish_id)
     try:
+        # 先只查 updated_at，客户端缓存有效时不再加载和序列化菜品
+        etag, updated_at = await service.get_dish_validators(dish_id)
+        not_modified = check_not_modified(request, response, etag, updated_at)
+        if not_modified is not None:
+            return not_modified
         dish = await service.get_dish_by_id(dish_id)
-        logger.info(f"获取到菜品, ID: {dish_id}")
+        logger.debug("获取到菜品, ID: {}", dish_id)
         return dish
+    except HTTPException as e:
+        logger.debug("获取 ID 为 {} 的菜品失败: {}", dish_id, e.detail)
+        raise
     except Exception as e:
-        logger.error(f"获取 ID 为 {dish_id} 的菜品时出错: {str(e)}")
+        logger.error("获取 ID 为 {} 的菜品时出错: {}", dish_id, e)
         raise
 
 
+@router.get("/{dish_id}/similar", response_model=list[SimilarDishResponse])
+async def list_similar_dishes(
+    dish_id: int = Path(..., description="菜品ID"),
+    limit: int = Query(10, ge=1, le=50),
+    service: DishService = Depends(get_dish_service),
+):
+    """查找相似菜品"""
+    return await service.list_similar_dishes(dish_id, limit)
+
+
 @router.get("/", response_model=list[DishResponse])
 async def list_dishes(
+    request: Request,
+    response: Response,
     search: str | None = Query(None, description="搜索关键词"),
-    order_by: Literal["id", "name", "created_at"] = Query("id", description="排序字段"),
+    order_by: Literal["id", "name", "created_at", "popularity"] = Query(
+        "id", description="排序字段，popularity 为被收藏次数"
+    ),
     direction: Literal["asc", "desc"] = Query("asc", description="排序方向"),
     limit: int = Query(10, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    tag: list[str] | None = Query(None, description="标签筛选，格式 kind:name，可重复"),
+    tag_mode: Literal["all", "any"] = Query("all", description="all=同时满足，any=满足任一"),
+    fields: tuple[str, ...] = Depends(get_dish_fields),
     service: DishService = Depends(get_dish_service),
+    tag_service: TagService = Depends(get_tag_service),
 ):
-    """查询所有菜品"""
-    dishes = await service.list_dishes(
+    """查询所有菜品（支持 If-None-Match，?fields= 只返回并只查询指定字段）"""
+    etag = await service.list_etag(
+        request.url.query, tagged=bool(tag), by_popularity=order_by == "popularity"
+    )
+    not_modified = check_not_modified(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+
+    dish_ids = await tag_service.match_dish_ids(tag, tag_mode) if tag else None
+    body = await service.list_dishes_body(
         search=search,
         order_by=order_by,
         direction=direction,
         limit=limit,
         offset=offset,
+        dish_ids=dish_ids,
+        fields=fields,
     )
-    return dishes
+    # 行已直接序列化，跳过 response_model 的校验与二次序列化（ETag 等头部随响应返回）
+    return Response(body, media_type="application/json", headers=response.headers)
+
+
+@router.patch(
+    "/bulk",
+    response_model=DishBulkResponse,
+    dependencies=[Depends(current_superuser)],
+)
+async def bulk_update_dishes(
+    data: DishBulkUpdate, service: DishService = Depends(get_dish_service)
+):
+    """批量更新菜品（按 id 列表或搜索条件），逐个 id 返回结果"""
+    return await service.bulk_update_dishes(data)
+
+
+@router.delete("/bulk", response_model=DishBulkResponse)
+async def bulk_delete_dishes(
+    selector: DishBulkSelector,
+    service: DishService = Depends(get_dish_service),
+    current_user: UserRead = Depends(current_superuser),
+):
+    """批量删除菜品（立即隐藏，关联数据由后台任务分批清理）"""
+    return await service.bulk_delete_dishes(selector, current_user)
 
 
 @router.patch("/{dish_id}", response_model=DishResponse)
@@ -80,13 +210,15 @@ async def update_dish(
 
 @router.delete(
     "/{dish_id}",
-    status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(current_superuser)],
+    response_model=JobAccepted,
+    status_code=status.HTTP_202_ACCEPTED,
 )
 async def delete_dish(
     dish_id: int = Path(..., description="菜品ID"),
     service: DishService = Depends(get_dish_service),
+    current_user: UserRead = Depends(current_superuser),
 ):
-    """删除菜品"""
+    """删除菜品（立即隐藏，收藏关联由后台任务清理，进度见 GET /tasks/{job_id}）"""
 
-    await service.delete_dish(dish_id)
+    job_id = await service.delete_dish(dish_id, current_user)
+    return JobAccepted(job_id=job_id)
@@ -1,6 +1,8 @@
 from datetime import datetime
-from typing import Annotated, Literal
-from pydantic import BaseModel, Field
+from typing import Annotated, Any, Literal
+from pydantic import BaseModel, Field, TypeAdapter, model_validator
+
+from src.core.config import settings
 
 
 # 公共字段基类
@@ -30,6 +32,62 @@ class DishResponse(DishBase):
     model_config = {"from_attributes": True}
 
 
+# 列表接口 ?fields= 可选的字段，顺序与 DishResponse 一致
+DISH_FIELDS: tuple[str, ...] = tuple(DishResponse.model_fields)
+
+# 列表接口直接把数据库行序列化为 JSON（日期格式与 DishResponse 相同），不经过模型实例
+_ROWS_ADAPTER = TypeAdapter(list[dict[str, Any]])
+
+
+def dish_rows_json(rows: list[dict[str, Any]]) -> bytes:
+    return _ROWS_ADAPTER.dump_json(rows)
+
+
+# 相似菜品响应
+class SimilarDishResponse(DishResponse):
+    score: Annotated[float, Field(description="余弦相似度")]
+
+
+# 热门菜品响应
+class PopularDishResponse(DishResponse):
+    popularity: Annotated[int, Field(description="被收藏次数")]
+
+
+# 批量操作：目标为 id 列表或搜索条件（二选一）
+class DishBulkSelector(BaseModel):
+    ids: Annotated[
+        list[int] | None,
+        Field(None, max_length=settings.dish_bulk_max_items, description="菜品ID列表"),
+    ]
+    search: Annotated[
+        str | None, Field(None, min_length=1, description="按名称或描述模糊匹配的关键词")
+    ]
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.ids is None) == (self.search is None):
+            raise ValueError("ids 与 search 必须且只能提供一个")
+        return self
+
+
+# 批量更新（名称唯一，不支持批量修改）
+class DishBulkUpdate(DishBulkSelector):
+    description: Annotated[str | None, Field(..., description="新的菜品描述，null 表示清空")]
+
+
+class DishBulkItemResult(BaseModel):
+    id: int
+    status: Literal["updated", "deleted", "not_found"]
+
+
+# 批量操作结果：逐个 id 报告
+class DishBulkResponse(BaseModel):
+    matched: Annotated[int, Field(description="目标菜品数")]
+    succeeded: Annotated[int, Field(description="成功处理的菜品数")]
+    results: list[DishBulkItemResult]
+    job_ids: Annotated[list[str], Field(description="批量删除的后台清理任务")] = []
+
+
 # 查询参数模型
 class DishQueryParams(BaseModel):
     """菜品列表查询参数"""
@@ -39,8 +97,8 @@ class DishQueryParams(BaseModel):
     ] = None
 
     order_by: Annotated[
-        Literal["id", "name", "created_at"],
-        Field(description="排序字段，可选：id、name、created_at"),
+        Literal["id", "name", "created_at", "popularity"],
+        Field(description="排序字段，可选：id、name、created_at、popularity"),
     ] = "id"
 
     direction: Annotated[
@@ -1,34 +1,103 @@
 # src/dishes/service.py
+import asyncio
+from datetime import datetime
+
+from redis.asyncio import Redis
 from sqlalchemy.exc import IntegrityError
 
 from src.dishes.repository import DishRepository
+from src.collections.cache_collection import (
+    refresh_dish_in_collections,
+    refresh_dishes_in_collections,
+    remove_dish_from_collections,
+    remove_dishes_from_collections,
+)
+from src.recommendations.index import index_dish, index_dishes, unindex_dish, unindex_dishes
+from src.dishes.similarity import SimilarityIndex
+from src.dishes import popularity
+from src.tags.bitmap import TagBitmapIndex, VERSION_KEY as TAG_VERSION_KEY
+from src.core.etag import (
+    bump_table_version,
+    get_table_versions,
+    make_etag,
+    table_version_key,
+)
+from src.core.config import settings
+from src.core.tracing import traced
 from src.core.exception import (
     NotFoundException,
     AlreadyExistsException,
+    BadRequestException,
 )
+from src.tasks.queue import enqueue
 from src.dishes.schema import (
+    DISH_FIELDS,
+    dish_rows_json,
     DishCreate,
     DishUpdate,
     DishResponse,
+    DishBulkSelector,
+    DishBulkUpdate,
+    DishBulkItemResult,
+    DishBulkResponse,
+    PopularDishResponse,
+    SimilarDishResponse,
 )
 
+DISHES_VERSION_KEY = table_version_key("dishes")
+
 
+@traced("service")
 class DishService:
     """业务逻辑层（Service Layer）"""
 
-    def __init__(self, repository: DishRepository):
+    def __init__(
+        self,
+        repository: DishRepository,
+        redis: Redis,
+        similarity: SimilarityIndex,
+        tag_index: TagBitmapIndex,
+    ):
         self.repository = repository
-        
+        self.redis = redis
+        self.similarity = similarity
+        self.tag_index = tag_index
 
     async def create_dish(self, dish_data: DishCreate) -> DishResponse:
         """创建菜品，处理唯一约束冲突"""
         data = dish_data.model_dump()
         try:
             dish = await self.repository.create(data)
-            return DishResponse.model_validate(dish)
         except IntegrityError as e:
             # 数据库层唯一约束冲突 → 抛出业务异常
             raise AlreadyExistsException("Dish with this name already exists") from e
+        response = DishResponse.model_validate(dish)
+        await index_dish(self.redis, response.id, response.name, response.description)
+        await asyncio.to_thread(
+            self.similarity.upsert, response.id, response.name, response.description
+        )
+        await popularity.add_dish(self.redis, response.id)
+        await bump_table_version(self.redis, DISHES_VERSION_KEY)
+        return response
+
+    async def get_dish_validators(self, dish_id: int) -> tuple[str, datetime]:
+        """单个菜品的 ETag 与 Last-Modified，只查询 updated_at 一列"""
+        updated_at = await self.repository.get_updated_at(dish_id)
+        if updated_at is None:
+            raise NotFoundException(f"Dish with id {dish_id} not found")
+        return make_etag("dish", dish_id, updated_at.isoformat()), updated_at
+
+    async def list_etag(
+        self, query: str, *, tagged: bool = False, by_popularity: bool = False
+    ) -> str:
+        """列表 ETag：菜品表版本号（按标签筛选、按热度排序时再加上对应版本号）+ 查询参数"""
+        keys = [DISHES_VERSION_KEY]
+        if tagged:
+            keys.append(TAG_VERSION_KEY)
+        if by_popularity:
+            keys.append(popularity.POPULARITY_VERSION_KEY)
+        versions = await get_table_versions(self.redis, *keys)
+        return make_etag("dishes", *versions, query)
 
     async def get_dish_by_id(self, dish_id: int) -> DishResponse:
         """通过 ID 获取菜品"""
@@ -37,7 +106,7 @@ class DishService:
             raise NotFoundException(f"Dish with id {dish_id} not found")
         return DishResponse.model_validate(dish)
 
-    async def list_dishes(
+    async def list_dishes_body(
         self,
         *,
         search: str | None = None,
@@ -45,16 +114,72 @@ class DishService:
         direction: str = "asc",
         limit: int = 10,
         offset: int = 0,
-    ) -> list[DishResponse]:
-        """查询所有菜品"""
-        dishes = await self.repository.get_all(
-            search=search,
-            order_by=order_by,
-            direction=direction,
-            limit=limit,
-            offset=offset,
-        )
-        return [DishResponse.model_validate(dish) for dish in dishes]
+        dish_ids: list[int] | None = None,
+        fields: tuple[str, ...] = DISH_FIELDS,
+    ) -> bytes:
+        """查询菜品列表的 JSON 响应体：只查询 fields 对应的列，数据库行直接序列化"""
+        if order_by == "popularity":
+            rows = await self._list_by_popularity(
+                search=search,
+                descending=direction == "desc",
+                limit=limit,
+                offset=offset,
+                dish_ids=dish_ids,
+                fields=fields,
+            )
+        else:
+            rows = await self.repository.get_all(
+                search=search,
+                order_by=order_by,
+                direction=direction,
+                limit=limit,
+                offset=offset,
+                dish_ids=dish_ids,
+                columns=fields,
+            )
+            rows = [dict(row) for row in rows]
+        return dish_rows_json(rows)
+
+    async def _list_by_popularity(
+        self,
+        *,
+        search: str | None,
+        descending: bool,
+        limit: int,
+        offset: int,
+        dish_ids: list[int] | None,
+        fields: tuple[str, ...],
+    ) -> list[dict]:
+        """按热度排序：无筛选时直接分页读取有序集合，有筛选时对候选 id 批量取分数排序"""
+        if search is None and dish_ids is None:
+            page = await popularity.popularity_page(
+                self.redis, offset, limit, descending=descending
+            )
+        else:
+            candidates = await self.repository.get_ids(search=search, dish_ids=dish_ids)
+            page = await popularity.rank_ids(
+                self.redis, candidates, offset, limit, descending=descending
+            )
+        # 需要 id 还原排行顺序，未请求时再去掉
+        columns = fields if "id" in fields else ("id", *fields)
+        rows = await self.repository.get_rows_by_ids(page, columns)
+        by_id = {row["id"]: row for row in rows}
+        return [
+            {name: by_id[i][name] for name in fields} for i in page if i in by_id
+        ]
+
+    async def list_top_dishes(self, limit: int = 10) -> list[PopularDishResponse]:
+        """被收藏次数最多的菜品（直接读取热度排行）"""
+        ranked = await popularity.top_dishes(self.redis, limit)
+        dishes = await self.repository.get_by_ids([i for i, _ in ranked])
+        by_id = {d.id: d for d in dishes}
+        return [
+            PopularDishResponse(
+                **DishResponse.model_validate(by_id[i]).model_dump(), popularity=count
+            )
+            for i, count in ranked
+            if i in by_id
+        ]
 
     async def update_dish(self, dish_id: int, dish_data: DishUpdate) -> DishResponse:
         """更新菜品"""
@@ -63,12 +188,132 @@ class DishService:
             updated = await self.repository.update(update_data, dish_id)
             if not updated:
                 raise NotFoundException(f"Dish with id {dish_id} not found")
-            return DishResponse.model_validate(updated)
         except IntegrityError as e:
             raise AlreadyExistsException("Dish with this name already exists") from e
+        response = DishResponse.model_validate(updated)
+        # 先递增版本号再刷新包含该菜品的收藏快照，进行中的收藏回源会放弃写入
+        await bump_table_version(self.redis, DISHES_VERSION_KEY)
+        await refresh_dish_in_collections(self.redis, response)
+        await index_dish(self.redis, response.id, response.name, response.description)
+        await asyncio.to_thread(
+            self.similarity.upsert, response.id, response.name, response.description
+        )
+        return response
 
-    async def delete_dish(self, dish_id: int) -> None:
-        """删除菜品"""
+    async def list_similar_dishes(
+        self, dish_id: int, limit: int = 10
+    ) -> list[SimilarDishResponse]:
+        """基于 TF-IDF 余弦相似度查找相似菜品"""
+        dish = await self.get_dish_by_id(dish_id)
+        # 矩阵乘法会释放 GIL，放到线程中避免阻塞事件循环
+        matches = await asyncio.to_thread(
+            self.similarity.query,
+            dish.name,
+            dish.description,
+            limit=limit,
+            exclude=dish_id,
+        )
+        dishes = await self.repository.get_by_ids([i for i, _ in matches])
+        by_id = {d.id: d for d in dishes}
+        return [
+            SimilarDishResponse(
+                **DishResponse.model_validate(by_id[i]).model_dump(), score=score
+            )
+            for i, score in matches
+            if i in by_id
+        ]
+
+    async def delete_dish(self, dish_id: int, current_user) -> str:
+        """软删除菜品并立即从缓存与索引中移除，收藏关联交给后台任务分批清理，返回任务 id"""
         deleted = await self.repository.delete(dish_id)
         if not deleted:
             raise NotFoundException(f"Dish with id {dish_id} not found")
+        await bump_table_version(self.redis, DISHES_VERSION_KEY)
+        await remove_dish_from_collections(self.redis, dish_id)
+        await unindex_dish(self.redis, dish_id)
+        await asyncio.to_thread(self.similarity.remove, dish_id)
+        await self.tag_index.remove_dish(self.redis, dish_id)
+        await popularity.remove_dish(self.redis, dish_id)
+        return await enqueue(
+            self.redis, "dishes.purge", owner_id=current_user.id, dish_id=dish_id
+        )
+
+    async def _resolve_targets(self, selector: DishBulkSelector) -> list[int]:
+        """批量操作的目标 id（去重、保持请求中的顺序）
+
+        搜索条件命中超过 dish_bulk_max_items 时直接拒绝，不静默截断成只处理一部分
+        """
+        if selector.ids is not None:
+            return list(dict.fromkeys(selector.ids))
+        max_items = settings.dish_bulk_max_items
+        ids = await self.repository.get_ids(search=selector.search, limit=max_items + 1)
+        if len(ids) > max_items:
+            raise BadRequestException(
+                f"搜索条件匹配的菜品超过 {max_items} 个，请缩小范围或改用 ids 分批提交"
+            )
+        return ids
+
+    async def bulk_update_dishes(self, data: DishBulkUpdate) -> DishBulkResponse:
+        """批量更新：每批一条 UPDATE ... RETURNING，缓存与索引按批失效"""
+        targets = await self._resolve_targets(data)
+        updated: set[int] = set()
+        for start in range(0, len(targets), settings.dish_bulk_chunk_size):
+            chunk = targets[start : start + settings.dish_bulk_chunk_size]
+            dishes = [
+                DishResponse.model_validate(dish)
+                for dish in await self.repository.bulk_update(
+                    chunk, {"description": data.description}
+                )
+            ]
+            if dishes:
+                await bump_table_version(self.redis, DISHES_VERSION_KEY)
+            await refresh_dishes_in_collections(self.redis, dishes)
+            await index_dishes(self.redis, [(d.id, d.name, d.description) for d in dishes])
+            await asyncio.to_thread(
+                self.similarity.upsert_many, [(d.id, d.name, d.description) for d in dishes]
+            )
+            updated.update(dish.id for dish in dishes)
+        return _bulk_report(targets, updated, "updated")
+
+    async def bulk_delete_dishes(
+        self, selector: DishBulkSelector, current_user
+    ) -> DishBulkResponse:
+        """批量软删除：每批一条 UPDATE，关联行由每批一个后台任务清理"""
+        targets = await self._resolve_targets(selector)
+        deleted: set[int] = set()
+        job_ids: list[str] = []
+        for start in range(0, len(targets), settings.dish_bulk_chunk_size):
+            chunk = await self.repository.bulk_delete(
+                targets[start : start + settings.dish_bulk_chunk_size]
+            )
+            if not chunk:
+                continue
+            await bump_table_version(self.redis, DISHES_VERSION_KEY)
+            await remove_dishes_from_collections(self.redis, chunk)
+            await unindex_dishes(self.redis, chunk)
+            await asyncio.to_thread(self.similarity.remove_many, chunk)
+            await self.tag_index.remove_dishes(self.redis, chunk)
+            await popularity.remove_dishes(self.redis, chunk)
+            job_ids.append(
+                await enqueue(
+                    self.redis, "dishes.purge_many", owner_id=current_user.id, dish_ids=chunk
+                )
+            )
+            deleted.update(chunk)
+        return _bulk_report(targets, deleted, "deleted", job_ids)
+
+
+def _bulk_report(
+    targets: list[int], succeeded: set[int], status: str, job_ids: list[str] | None = None
+) -> DishBulkResponse:
+    return DishBulkResponse(
+        matched=len(targets),
+        succeeded=len(succeeded),
+        results=[
+            DishBulkItemResult(
+                id=dish_id, status=status if dish_id in succeeded else "not_found"
+            )
+            for dish_id in targets
+        ],
+        job_ids=job_ids or [],
+    )
@@ -0,0 +1,298 @@
+# src/dishes/similarity.py
+import asyncio
+import fcntl
+import os
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.dishes.model import Dish
+
+NGRAM_SIZES = (1, 2, 3)  # 中文短文本：字符 1~3 元组
+INITIAL_CAPACITY = 1024
+
+# meta 文件布局：[已用行数, 容量, 维度, 代数]
+_COUNT, _CAPACITY, _DIMENSIONS, _GENERATION = range(4)
+
+
+def _ngram_bucket(ngram: str, dimensions: int) -> int:
+    # 不能用内置 hash()：它在每个进程中随机化，多个 worker 会得到不同向量
+    return zlib.crc32(ngram.encode("utf-8")) % dimensions
+
+
+def term_frequencies(text: str, dimensions: int) -> np.ndarray:
+    """字符 n-gram 特征哈希到固定维度，返回次线性缩放后的词频向量"""
+    text = "".join(text.split())
+    buckets = [
+        _ngram_bucket(text[i : i + n], dimensions)
+        for n in NGRAM_SIZES
+        for i in range(len(text) - n + 1)
+    ]
+    vector = np.bincount(buckets, minlength=dimensions).astype(np.float32)
+    nonzero = vector > 0
+    vector[nonzero] = 1.0 + np.log(vector[nonzero])
+    return vector
+
+
+class SimilarityIndex:
+    """菜品 TF-IDF 向量矩阵，持久化为内存映射文件，供多个 worker 共享
+
+    - vectors: float32[capacity, dimensions]，每行是 L2 归一化后的 TF-IDF 向量；
+    - ids: int64[capacity]，行号 → 菜品 id，0 表示空行（删除留下的空行由后续新增复用，
+      末尾的空行直接截掉，查询只扫描 [0, 已用行数)）；
+    - df: float32[dimensions]，各特征桶的文档频率，用于增量计算 IDF；
+    - meta: int64[4]，写入方每次修改都会递增代数，读取方据此判断是否需要重新映射。
+
+    全量构建先统计整个目录的文档频率，再用同一份 IDF 一次性加权所有行；
+    增量写入使用写入时的 IDF，随目录变化逐渐偏离，由重建任务（dishes.rebuild_similarity_index）统一重新加权。
+    写入持有排他文件锁，查询持有共享锁，读不到写了一半的行。
+    所有方法都是同步的 numpy / 文件操作，异步代码中应通过 asyncio.to_thread 调用。
+    """
+
+    def __init__(self, path: str | Path, dimensions: int = settings.similarity_dimensions):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.dimensions = dimensions
+        self._mapped_capacity = -1
+        # 菜品 id → 行号与可复用的空行；其他 worker 写入后（代数变化）按 ids 重新生成
+        self._rows: dict[int, int] = {}
+        self._free: list[int] = []
+        self._rows_generation = -1
+        self._open()
+
+    # ------------------ 文件映射 ------------------
+    def _file(self, suffix: str) -> Path:
+        return self.path.with_suffix(f".{suffix}")
+
+    def _open(self) -> None:
+        with self._locked():
+            meta_path = self._file("meta")
+            if not meta_path.exists():
+                self._create(INITIAL_CAPACITY)
+            self.meta = np.memmap(meta_path, dtype=np.int64, mode="r+", shape=(4,))
+            if int(self.meta[_DIMENSIONS]) != self.dimensions:
+                raise ValueError(
+                    f"Similarity index dimensions mismatch: "
+                    f"{int(self.meta[_DIMENSIONS])} != {self.dimensions}"
+                )
+            self._map(int(self.meta[_CAPACITY]))
+
+    def _create(self, capacity: int) -> None:
+        meta = np.memmap(self._file("meta"), dtype=np.int64, mode="w+", shape=(4,))
+        meta[:] = (0, capacity, self.dimensions, 0)
+        meta.flush()
+        np.memmap(
+            self._file("vectors"), dtype=np.float32, mode="w+",
+            shape=(capacity, self.dimensions),
+        ).flush()
+        np.memmap(self._file("ids"), dtype=np.int64, mode="w+", shape=(capacity,)).flush()
+        np.memmap(self._file("df"), dtype=np.float32, mode="w+", shape=(self.dimensions,)).flush()
+
+    def _map(self, capacity: int) -> None:
+        self.vectors = np.memmap(
+            self._file("vectors"), dtype=np.float32, mode="r+",
+            shape=(capacity, self.dimensions),
+        )
+        self.ids = np.memmap(self._file("ids"), dtype=np.int64, mode="r+", shape=(capacity,))
+        self.df = np.memmap(self._file("df"), dtype=np.float32, mode="r+", shape=(self.dimensions,))
+        self._mapped_capacity = capacity
+
+    def _remap_if_grown(self) -> None:
+        """其他 worker 扩容后，重新映射到新的文件大小"""
+        capacity = int(self.meta[_CAPACITY])
+        if capacity != self._mapped_capacity:
+            self._map(capacity)
+
+    def _grow(self) -> None:
+        capacity = int(self.meta[_CAPACITY]) * 2
+        for suffix, row_bytes in (("vectors", 4 * self.dimensions), ("ids", 8)):
+            with open(self._file(suffix), "r+b") as f:
+                f.truncate(capacity * row_bytes)
+        self.meta[_CAPACITY] = capacity
+        self._map(capacity)
+
+    @contextmanager
+    def _locked(self, *, shared: bool = False):
+        """跨进程文件锁：写入排他，保证行号分配不冲突；查询共享，互不阻塞"""
+        with open(self._file("lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ------------------ 向量计算 ------------------
+    @property
+    def count(self) -> int:
+        return int(self.meta[_COUNT])
+
+    def _idf(self, documents: int) -> np.ndarray:
+        return np.log((1.0 + max(documents, 1)) / (1.0 + self.df)) + 1.0
+
+    def _weigh(self, tf: np.ndarray, documents: int) -> np.ndarray:
+        vector = tf * self._idf(documents)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _sync_rows(self) -> None:
+        """持有写锁时调用：本进程之外有写入（代数变化）时重新生成 id → 行号与空行列表"""
+        generation = int(self.meta[_GENERATION])
+        if generation == self._rows_generation:
+            return
+        ids = self.ids[: self.count]
+        rows = np.flatnonzero(ids)
+        self._rows = dict(zip(ids[rows].tolist(), rows.tolist()))
+        self._free = np.flatnonzero(ids == 0).tolist()
+        self._rows_generation = generation
+
+    def _trim(self) -> None:
+        """截掉末尾的空行，查询扫描的行数随之缩小"""
+        count = self.count
+        while count and self.ids[count - 1] == 0:
+            count -= 1
+        if count != self.count:
+            self.meta[_COUNT] = count
+            self._free = [row for row in self._free if row < count]
+
+    def _bump_generation(self) -> None:
+        self.meta[_GENERATION] += 1
+        self._rows_generation = int(self.meta[_GENERATION])
+
+    # ------------------ 增量维护 ------------------
+    def upsert(self, dish_id: int, name: str, description: str | None) -> None:
+        self.upsert_many([(dish_id, name, description)])
+
+    def upsert_many(self, dishes: list[tuple[int, str, str | None]]) -> None:
+        """新增或更新一批菜品的向量（每道 O(维度)，无需重建矩阵），整批只加一次锁"""
+        tfs = [
+            (dish_id, term_frequencies(f"{name} {description or ''}", self.dimensions))
+            for dish_id, name, description in dishes
+        ]
+        with self._locked():
+            self._remap_if_grown()
+            self._sync_rows()
+            for dish_id, tf in tfs:
+                row = self._rows.get(dish_id)
+                if row is None:
+                    if self._free:
+                        row = self._free.pop()
+                    else:
+                        if self.count >= self._mapped_capacity:
+                            self._grow()
+                        row = self.count
+                        self.meta[_COUNT] = row + 1
+                    self.ids[row] = dish_id
+                    self._rows[dish_id] = row
+                else:
+                    self.df -= (self.vectors[row] != 0).astype(np.float32)
+                self.df += (tf != 0).astype(np.float32)
+                self.vectors[row] = self._weigh(tf, len(self._rows))
+            self._bump_generation()
+
+    def remove(self, dish_id: int) -> None:
+        self.remove_many([dish_id])
+
+    def remove_many(self, dish_ids: list[int]) -> None:
+        with self._locked():
+            self._remap_if_grown()
+            self._sync_rows()
+            for dish_id in dish_ids:
+                row = self._rows.pop(dish_id, None)
+                if row is None:
+                    continue
+                self.df -= (self.vectors[row] != 0).astype(np.float32)
+                self.vectors[row] = 0.0
+                self.ids[row] = 0
+                self._free.append(row)
+            self._trim()
+            self._bump_generation()
+
+    def rebuild(self, dishes: list[tuple[int, str, str | None]]) -> None:
+        """用给定菜品整体替换索引：先统计全部文档频率，再以同一份 IDF 加权所有行"""
+        count = len(dishes)
+        tf = np.zeros((count, self.dimensions), dtype=np.float32)
+        for row, (_, name, description) in enumerate(dishes):
+            tf[row] = term_frequencies(f"{name} {description or ''}", self.dimensions)
+        df = np.count_nonzero(tf, axis=0).astype(np.float32)
+        vectors = tf * (np.log((1.0 + max(count, 1)) / (1.0 + df)) + 1.0)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+        with self._locked():
+            self._remap_if_grown()
+            while self._mapped_capacity < count:
+                self._grow()
+            previous = self.count
+            self.vectors[:count] = vectors
+            self.ids[:count] = [dish_id for dish_id, _, _ in dishes]
+            if previous > count:
+                self.vectors[count:previous] = 0.0
+                self.ids[count:previous] = 0
+            self.df[:] = df
+            self.meta[_COUNT] = count
+            self._rows = {dish_id: row for row, (dish_id, _, _) in enumerate(dishes)}
+            self._free = []
+            self._bump_generation()
+
+    def query(
+        self, name: str, description: str | None, *, limit: int = 10, exclude: int | None = None
+    ) -> list[tuple[int, float]]:
+        """余弦相似度 top-k：一次矩阵-向量乘 + argpartition
+
+        空行的向量全为 0，得分不会大于 0，无需再逐行屏蔽；exclude 多取一个再过滤。
+        """
+        tf = term_frequencies(f"{name} {description or ''}", self.dimensions)
+        with self._locked(shared=True):
+            self._remap_if_grown()
+            count = self.count
+            if count == 0:
+                return []
+            ids = self.ids[:count]
+            query = self._weigh(tf, int(np.count_nonzero(ids)))
+            scores = self.vectors[:count] @ query
+
+            k = min(limit + (exclude is not None), count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            results = [
+                (int(ids[row]), float(scores[row]))
+                for row in top
+                if scores[row] > 0 and ids[row] != exclude
+            ]
+        return results[:limit]
+
+    def flush(self) -> None:
+        for array in (self.vectors, self.ids, self.df, self.meta):
+            array.flush()
+
+
+async def build_similarity_index(
+    session: AsyncSession, index: SimilarityIndex, *, force: bool = False
+) -> int:
+    """从数据库构建索引；索引文件已有数据时默认跳过（worker 启动直接映射文件）"""
+    if not force and index.count > 0:
+        return 0
+
+    result = await session.execute(
+        select(Dish.id, Dish.name, Dish.description).where(Dish.deleted_at.is_(None))
+    )
+    dishes = [tuple(row) for row in result]
+
+    def rebuild() -> None:
+        index.rebuild(dishes)
+        index.flush()
+
+    # 向量计算与文件写入放到线程中，避免阻塞事件循环
+    await asyncio.to_thread(rebuild)
+    logger.info("相似菜品索引构建完成，共 {} 道菜品", len(dishes))
+    return len(dishes)
+
+
+def open_similarity_index() -> SimilarityIndex:
+    return SimilarityIndex(os.path.expanduser(settings.similarity_index_path))
@@ -1,4 +1,5 @@
 # app/lifespan.py
+import asyncio
 from typing import TypedDict
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
@@ -8,7 +9,27 @@ from redis.asyncio import Redis
 from httpx import AsyncClient
 from loguru import logger
 
+from src.core.config import settings
+from src.core.http_client import create_http_client
+from src.core.client_cache import ClientSideCache
+from src.core.rate_limit import load_monitor
+from src.auth.user_manager import TOKEN_KEY_PREFIX
 from src.core.redis_db import create_auth_redis, create_cache_redis
+from src.core.database import SessionFactory
+from src.core.sharding import shard_router
+from src.recommendations.index import build_index
+from src.ai.client import OllamaClient
+from src.tags.bitmap import TagBitmapIndex
+from src.weather.cache_weather import WEATHER_CACHE_PREFIX
+from src.weather.history import WeatherLogCompactor, weather_log_buffer
+from src.weather.prefetch import WeatherPrefetcher
+from src.weather.pubsub import WeatherHub, WeatherPoller
+from src.dishes.popularity import PopularityReconciler, build_popularity
+from src.dishes.similarity import (
+    SimilarityIndex,
+    build_similarity_index,
+    open_similarity_index,
+)
 
 # from src.core.database import create_db_and_tables
 
@@ -16,7 +37,13 @@ from src.core.redis_db import create_auth_redis, create_cache_redis
 class State(TypedDict):
     auth_redis: Redis
     cache_redis: Redis
+    token_cache: ClientSideCache
+    weather_cache: ClientSideCache
     http_client: AsyncClient
+    llm_client: OllamaClient
+    similarity_index: SimilarityIndex
+    tag_index: TagBitmapIndex
+    weather_hub: WeatherHub
 
 
 @asynccontextmanager
@@ -25,17 +52,94 @@ async def lifespan(app: FastAPI) -> AsyncIterator[State]:
     logger.info("应用启动，开始加载所有资源...")
     # await create_db_and_tables()
 
+    # 降载指标采样（事件循环延迟、连接池等待）
+    load_monitor.start()
+
     auth_redis = create_auth_redis()
     cache_redis = create_cache_redis()
     logger.info("Redis 已就绪。")
-    http_client = AsyncClient(timeout=10)
+
+    # 客户端缓存（默认关闭）：认证令牌与天气缓存的热点读取走进程内存
+    token_cache = ClientSideCache(auth_redis, (TOKEN_KEY_PREFIX,))
+    weather_cache = ClientSideCache(cache_redis, (WEATHER_CACHE_PREFIX,))
+    token_cache.start()
+    weather_cache.start()
+
+    # 推荐倒排索引：仅在 Redis 中不存在时从数据库构建
+    # 相似菜品索引：直接映射已有文件，首次启动时从数据库构建
+    similarity_index = open_similarity_index()
+    async with SessionFactory() as session:
+        await build_index(session, cache_redis)
+        await build_similarity_index(session, similarity_index)
+        # 菜品热度排行：仅在 Redis 中不存在时构建，之后由租约持有者定期对账
+        await build_popularity(session, cache_redis)
+    reconciler = PopularityReconciler(cache_redis, SessionFactory)
+    reconcile_task = asyncio.create_task(reconciler.run())
+    # 外部 API 客户端：连接池 + HTTP/2 + 重试 + 熔断
+    http_client = create_http_client()
+    llm_client = OllamaClient(http_client, cache_redis)
+
+    # 热门城市天气预取：每个 worker 都启动，由 Redis 租约选出唯一执行者
+    prefetcher = WeatherPrefetcher(http_client, cache_redis)
+    prefetch_task = (
+        asyncio.create_task(prefetcher.run())
+        if settings.weather_prefetch_enabled
+        else None
+    )
+
+    # 天气推送：本地订阅中心 + 全局唯一的轮询者
+    weather_hub = WeatherHub(cache_redis)
+    weather_hub.start()
+    poller = WeatherPoller(http_client, cache_redis)
+    poll_task = asyncio.create_task(poller.run())
+
+    # 天气历史：缓冲批量写入；原始记录的压缩由租约持有者执行
+    compact_task = None
+    if settings.weather_log_enabled:
+        weather_log_buffer.start(SessionFactory)
+        compact_task = asyncio.create_task(
+            WeatherLogCompactor(cache_redis, SessionFactory).run()
+        )
 
     # -------- 运行 --------
-    yield State(auth_redis=auth_redis, cache_redis=cache_redis, http_client=http_client)
+    yield State(
+        auth_redis=auth_redis,
+        cache_redis=cache_redis,
+        token_cache=token_cache,
+        weather_cache=weather_cache,
+        http_client=http_client,
+        llm_client=llm_client,
+        similarity_index=similarity_index,
+        # 标签位图在首次查询时按 Redis 版本号惰性构建
+        tag_index=TagBitmapIndex(),
+        weather_hub=weather_hub,
+    )
 
     # -------- 关闭 --------
+    reconcile_task.cancel()
+    poll_task.cancel()
+    await asyncio.gather(reconcile_task, poll_task, return_exceptions=True)
+    await poller.aclose()
+    await weather_hub.aclose()
+    if compact_task is not None:
+        compact_task.cancel()
+        await asyncio.gather(compact_task, return_exceptions=True)
+        await weather_log_buffer.aclose()
+    if prefetch_task is not None:
+        prefetch_task.cancel()
+        await asyncio.gather(prefetch_task, return_exceptions=True)
+        await prefetcher.aclose()
+    await llm_client.aclose()
+    await token_cache.aclose()
+    await weather_cache.aclose()
     await auth_redis.aclose()
     await cache_redis.aclose()
     await http_client.aclose()
+    similarity_index.flush()
+    if shard_router is not None:
+        await shard_router.dispose()
+    await load_monitor.aclose()
 
     logger.info("应用关闭，资源已释放。")
+    # 等待队列中的日志全部写出
+    await logger.complete()
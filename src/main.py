@@ -4,9 +4,19 @@ from fastapi import FastAPI, Response, Depends
 from src.core.config import settings
 from src.lifespan import lifespan
 from src.core.exception import register_exception_handlers
+from src.core.rate_limit import LoadSheddingMiddleware
+from src.core.compression import CompressionMiddleware
+from src.core.logging import RequestContextMiddleware, setup_logging
+from src.core.tracing import setup_tracing
 from src.dishes.router import router as dishes_router
 from src.collections.router import router as collections_router
 from src.weather.router import router as weather_router
+from src.recommendations.router import router as recommendations_router
+from src.ai.router import router as ai_router
+from src.tags.router import router as tags_router
+from src.tasks.router import router as tasks_router
+from src.profiling.router import router as profiling_router
+from src.profiling.profiler import profile_request
 
 # FastAPI Users 路由引入
 from src.auth.user_manager import fastapi_users
@@ -19,6 +29,9 @@ from src.auth.router import register_fastapi_users_routes
 # load_dotenv(Path(__file__).parent.parent / ".env")
 
 
+# 日志经队列异步写出，带 request_id
+setup_logging()
+
 app = FastAPI(
     app_name=settings.app_name,
     version="0.1.0",
@@ -29,17 +42,45 @@ app = FastAPI(
 # 注册全局异常处理
 register_exception_handlers(app)
 
+# 按 Accept-Encoding 压缩响应（gzip / br）
+app.add_middleware(CompressionMiddleware)
+
+# 过载时快速返回 503，避免请求在连接池上排队
+app.add_middleware(LoadSheddingMiddleware)
+
+# 最外层：分配 request_id 并记录采样后的访问日志
+app.add_middleware(RequestContextMiddleware)
+
+# 链路追踪（未启用时不做任何事）：请求、数据库、Redis、外部 HTTP 自动埋点
+setup_tracing(app)
+
+# 业务路由统一挂载按需 / 抽样剖析依赖（超级用户请求头 X-Profile: 1）
+PROFILED = [Depends(profile_request)]
+
 # 注册 FastAPI-Users 路由
 register_fastapi_users_routes(app, fastapi_users)
 
 # 引入菜品路由
-app.include_router(dishes_router)
+app.include_router(dishes_router, dependencies=PROFILED)
+
+# 引入标签路由
+app.include_router(tags_router, dependencies=PROFILED)
 
 # 引入收藏路由
-app.include_router(collections_router)
+app.include_router(collections_router, dependencies=PROFILED)
 
 # 引入天气路由
-app.include_router(weather_router)
+app.include_router(weather_router, dependencies=PROFILED)
+
+# 引入推荐路由
+app.include_router(recommendations_router, dependencies=PROFILED)
+app.include_router(ai_router, dependencies=PROFILED)
+
+# 引入后台任务路由
+app.include_router(tasks_router, dependencies=PROFILED)
+
+# 引入性能剖析管理路由
+app.include_router(profiling_router)
 
 # 路由引入
 # @app.get("/")
@@ -0,0 +1,162 @@
+# src/profiling/profiler.py
+"""请求级性能剖析（pyinstrument，可选依赖：uv sync --extra profiling）
+
+- 按需：超级用户在请求上带 X-Profile: 1，本次请求在采样分析器下运行，
+  speedscope 格式的结果写入 Redis，响应头 X-Profile-Id 给出 /admin/profiles/{id} 的 id
+- 持续：按 profile_continuous_sample_rate 随机抽取请求，把各调用栈的自耗时
+  以折叠栈（a;b;c）聚合到按小时划分的 Redis hash，观察跨请求的整体热点
+
+pyinstrument 的 async_mode 只记录发起剖析的协程上下文，并发请求互不干扰；
+未带请求头且未被抽中的请求只多一次 random() 判断。
+"""
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import Depends, Request, Response
+from redis.asyncio import Redis
+
+from src.auth.model import User
+from src.auth.user_manager import current_user_optional
+from src.core.config import settings
+from src.core.redis_db import get_cache_redis
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # 可选依赖：uv sync --extra profiling
+    Profiler = None
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+RECENT_KEY = "profiles:recent"
+
+
+def profile_key(profile_id: str) -> str:
+    return f"profile:{profile_id}"
+
+
+def continuous_key(hour: int) -> str:
+    return f"profile:continuous:{hour}"
+
+
+def _profile_mode(request: Request, user: User | None) -> str | None:
+    if Profiler is None or not settings.profile_enabled:
+        return None
+    if request.headers.get(PROFILE_HEADER) == "1" and user is not None and user.is_superuser:
+        return "on_demand"
+    rate = settings.profile_continuous_sample_rate
+    if rate > 0 and random.random() < rate:
+        route = getattr(request.scope.get("route"), "path", None)
+        if route not in settings.profile_continuous_exclude:
+            return "continuous"
+    return None
+
+
+async def profile_request(
+    request: Request,
+    response: Response,
+    redis: Redis = Depends(get_cache_redis),
+    user: User | None = Depends(current_user_optional),
+):
+    """路由依赖：按需或抽样地在分析器下执行本次请求（含后续依赖、处理函数与序列化）"""
+    mode = _profile_mode(request, user)
+    if mode is None:
+        yield
+        return
+
+    profile_id = uuid.uuid4().hex
+    if mode == "on_demand":
+        response.headers[PROFILE_ID_HEADER] = profile_id
+    profiler = Profiler(interval=settings.profile_interval, async_mode="enabled")
+    started = time.time()
+    profiler.start()
+    try:
+        yield
+    finally:
+        session = profiler.stop()
+        if mode == "on_demand":
+            summary = {
+                "id": profile_id,
+                "method": request.method,
+                "path": request.url.path,
+                "route": getattr(request.scope.get("route"), "path", None),
+                "user_id": str(user.id),
+                "duration_ms": round((time.time() - started) * 1000, 2),
+                "created_at": started,
+            }
+            await save_profile(redis, summary, session)
+        else:
+            await record_stacks(redis, session)
+
+
+def _render_speedscope(session) -> str:
+    return SpeedscopeRenderer().render(session)
+
+
+async def save_profile(redis: Redis, summary: dict, session) -> None:
+    # 渲染是纯 CPU 工作，放到线程中，避免占用事件循环
+    body = await asyncio.to_thread(_render_speedscope, session)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.set(profile_key(summary["id"]), body, ex=settings.profile_ttl)
+        pipe.lpush(RECENT_KEY, json.dumps(summary))
+        pipe.ltrim(RECENT_KEY, 0, settings.profile_max_recent - 1)
+        await pipe.execute()
+
+
+async def get_profile(redis: Redis, profile_id: str) -> str | None:
+    return await redis.get(profile_key(profile_id))
+
+
+async def list_profiles(redis: Redis) -> list[dict]:
+    return [json.loads(item) for item in await redis.lrange(RECENT_KEY, 0, -1)]
+
+
+def folded_stacks(session) -> dict[str, float]:
+    """把调用树展开为 折叠栈 → 自耗时（秒），与 flamegraph.pl / speedscope 的 collapsed 格式一致"""
+    root = session.root_frame()
+    if root is None:
+        return {}
+    stacks: dict[str, float] = {}
+    pending = [(root, "")]
+    while pending:
+        frame, prefix = pending.pop()
+        if frame.file_path_short == "<thread>":
+            # 根节点带线程 id，跳过，否则不同进程的结果无法合并
+            path = prefix
+        else:
+            name = f"{frame.function} ({frame.file_path_short}:{frame.line_no})"
+            path = f"{prefix};{name}" if prefix else name
+        self_time = frame.time - sum(child.time for child in frame.children)
+        if self_time > 0 and path:
+            stacks[path] = stacks.get(path, 0.0) + self_time
+        pending.extend((child, path) for child in frame.children)
+    return stacks
+
+
+async def record_stacks(redis: Redis, session) -> None:
+    stacks = await asyncio.to_thread(folded_stacks, session)
+    if not stacks:
+        return
+    key = continuous_key(int(time.time() // 3600))
+    async with redis.pipeline(transaction=False) as pipe:
+        for stack, seconds in stacks.items():
+            pipe.hincrbyfloat(key, stack, seconds)
+        pipe.expire(key, settings.profile_continuous_retention * 3600)
+        await pipe.execute()
+
+
+async def continuous_profile(redis: Redis, hours: int) -> dict[str, float]:
+    """合并最近若干小时的聚合结果"""
+    current = int(time.time() // 3600)
+    async with redis.pipeline(transaction=False) as pipe:
+        for hour in range(current - hours + 1, current + 1):
+            pipe.hgetall(continuous_key(hour))
+        buckets = await pipe.execute()
+    merged: dict[str, float] = {}
+    for bucket in buckets:
+        for stack, seconds in bucket.items():
+            merged[stack] = merged.get(stack, 0.0) + float(seconds)
+    return merged
@@ -0,0 +1,51 @@
+# src/profiling/router.py
+from fastapi import APIRouter, Depends, Path, Query, Response
+from fastapi.responses import PlainTextResponse
+from redis.asyncio import Redis
+
+from src.core.exception import NotFoundException
+from src.core.redis_db import get_cache_redis
+from src.profiling.profiler import continuous_profile, get_profile, list_profiles
+from src.profiling.schema import ProfileSummary
+from src.auth.user_manager import current_superuser
+
+router = APIRouter(
+    prefix="/admin/profiles",
+    tags=["Profiling"],
+    dependencies=[Depends(current_superuser)],
+)
+
+
+@router.get("", response_model=list[ProfileSummary])
+async def get_recent_profiles(redis: Redis = Depends(get_cache_redis)):
+    """最近的按需剖析记录（新的在前）"""
+    return await list_profiles(redis)
+
+
+@router.get("/continuous", response_class=PlainTextResponse)
+async def get_continuous_profile(
+    hours: int = Query(1, ge=1, le=48, description="合并最近多少小时"),
+    redis: Redis = Depends(get_cache_redis),
+):
+    """持续剖析的聚合结果，折叠栈格式（每行 "栈 微秒数"），可直接导入 speedscope"""
+    stacks = await continuous_profile(redis, hours)
+    lines = sorted(f"{stack} {round(seconds * 1_000_000)}" for stack, seconds in stacks.items())
+    return PlainTextResponse("\n".join(lines))
+
+
+@router.get("/{profile_id}")
+async def get_profile_detail(
+    profile_id: str = Path(..., description="剖析ID（响应头 X-Profile-Id）"),
+    redis: Redis = Depends(get_cache_redis),
+) -> Response:
+    """下载 speedscope 格式的剖析结果，在 https://www.speedscope.app 打开"""
+    body = await get_profile(redis, profile_id)
+    if body is None:
+        raise NotFoundException(f"Profile with id {profile_id} not found")
+    return Response(
+        body,
+        media_type="application/json",
+        headers={
+            "Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'
+        },
+    )
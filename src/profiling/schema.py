@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class ProfileSummary(BaseModel):
+    id: str
+    method: str
+    path: str
+    route: str | None = None
+    user_id: str
+    duration_ms: float
+    created_at: float
@@ -0,0 +1,204 @@
+# src/recommendations/index.py
+import json
+import re
+
+from loguru import logger
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.dishes.model import Dish
+
+# 天气现象 → 关键词（同时用于解析天气描述和菜品描述）
+CONDITION_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "storm": ("台风", "雷", "暴风", "冰雹", "沙尘"),
+    "rain": ("雨", "回南天", "潮湿"),
+    "snow": ("小雪", "中雪", "大雪", "暴雪", "下雪", "初雪", "风雪", "雪天", "雪夜"),
+    "fog": ("雾", "霾"),
+    "sunny": ("晴", "干旱", "极光"),
+    "cloudy": ("阴", "多云"),
+}
+
+# 温度区间 → 菜品描述关键词
+# 寒冷区间与下雪只用完整的词：单字的“冰”“雪”“冷”“冻”“霜”“暖”会把冰粉、雪糕、冷面、
+# 果冻、糖霜这类消暑食物也归进来
+BAND_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "hot": ("高温", "闷热", "秋老虎", "降温", "干旱"),
+    "cold": (
+        "寒",
+        "冷空气",
+        "天冷",
+        "霜降",
+        "霜冻",
+        "冻雨",
+        "初雪",
+        "大雪",
+        "风雪",
+        "下雪",
+        "保暖",
+        "取暖",
+        "暖身",
+        "暖胃",
+    ),
+    "mild": ("春", "梅雨", "回南天", "雾"),
+}
+
+CONDITION_LABELS = {
+    "storm": "雷暴大风",
+    "rain": "下雨",
+    "snow": "下雪",
+    "fog": "雾霾",
+    "sunny": "晴天",
+    "cloudy": "阴天",
+}
+BAND_LABELS = {"hot": "炎热", "mild": "温和", "cold": "寒冷"}
+
+INDEX_VERSION_KEY = "reco:version"
+DISHES_KEY = "reco:dishes"
+
+_TEMPERATURE_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def condition_key(condition: str) -> str:
+    return f"reco:cond:{condition}"
+
+
+def band_key(band: str) -> str:
+    return f"reco:band:{band}"
+
+
+def dish_tags_key(dish_id: int) -> str:
+    return f"reco:dish:{dish_id}:tags"
+
+
+def classify_dish(name: str, description: str | None) -> tuple[set[str], set[str]]:
+    """根据名称与描述中的关键词，推断菜品适合的天气现象与温度区间"""
+    text = f"{name} {description or ''}"
+    conditions = {
+        condition
+        for condition, words in CONDITION_KEYWORDS.items()
+        if any(word in text for word in words)
+    }
+    bands = {
+        band for band, words in BAND_KEYWORDS.items() if any(word in text for word in words)
+    }
+    return conditions, bands
+
+
+def parse_temperature(value: str | None) -> float | None:
+    """解析 "12.3°C" 形式的温度字符串"""
+    if not value:
+        return None
+    match = _TEMPERATURE_PATTERN.search(value)
+    return float(match.group()) if match else None
+
+
+def weather_bucket(weather: dict) -> tuple[str, str]:
+    """把天气数据归入 (天气现象, 温度区间) 桶"""
+    description = weather.get("天气", "")
+    condition = next(
+        (
+            condition
+            for condition, words in CONDITION_KEYWORDS.items()
+            if any(word in description for word in words)
+        ),
+        "cloudy",
+    )
+
+    low = parse_temperature(weather.get("最低气温"))
+    high = parse_temperature(weather.get("最高气温"))
+    temperatures = [t for t in (low, high) if t is not None]
+    if not temperatures:
+        return condition, "mild"
+    mean = sum(temperatures) / len(temperatures)
+    if mean >= 28:
+        band = "hot"
+    elif mean <= 10:
+        band = "cold"
+    else:
+        band = "mild"
+    return condition, band
+
+
+async def _old_tags(redis: Redis, dish_ids: list[int]) -> list[set[str]]:
+    async with redis.pipeline(transaction=False) as pipe:
+        for dish_id in dish_ids:
+            pipe.smembers(dish_tags_key(dish_id))
+        return await pipe.execute()
+
+
+async def index_dishes(
+    redis: Redis, dishes: list[tuple[int, str, str | None]]
+) -> None:
+    """批量写入（或刷新）倒排索引：一次读取旧标签，一个事务写入"""
+    if not dishes:
+        return
+    old = await _old_tags(redis, [dish_id for dish_id, _, _ in dishes])
+    async with redis.pipeline(transaction=True) as pipe:
+        for (dish_id, name, description), old_tags in zip(dishes, old):
+            conditions, bands = classify_dish(name, description)
+            tags = {f"cond:{c}" for c in conditions} | {f"band:{b}" for b in bands}
+            for tag in old_tags - tags:
+                kind, value = tag.split(":", 1)
+                pipe.srem(condition_key(value) if kind == "cond" else band_key(value), dish_id)
+            for condition in conditions:
+                pipe.sadd(condition_key(condition), dish_id)
+            for band in bands:
+                pipe.sadd(band_key(band), dish_id)
+            pipe.delete(dish_tags_key(dish_id))
+            if tags:
+                pipe.sadd(dish_tags_key(dish_id), *tags)
+            pipe.hset(
+                DISHES_KEY,
+                str(dish_id),
+                json.dumps(
+                    {"id": dish_id, "name": name, "description": description},
+                    ensure_ascii=False,
+                ),
+            )
+        pipe.incr(INDEX_VERSION_KEY)
+        await pipe.execute()
+
+
+async def index_dish(
+    redis: Redis, dish_id: int, name: str, description: str | None
+) -> None:
+    """增量写入（或刷新）单个菜品的倒排索引"""
+    await index_dishes(redis, [(dish_id, name, description)])
+
+
+async def unindex_dishes(redis: Redis, dish_ids: list[int]) -> None:
+    """菜品删除后从倒排索引中批量移除"""
+    if not dish_ids:
+        return
+    old = await _old_tags(redis, dish_ids)
+    async with redis.pipeline(transaction=True) as pipe:
+        for dish_id, old_tags in zip(dish_ids, old):
+            for tag in old_tags:
+                kind, value = tag.split(":", 1)
+                pipe.srem(condition_key(value) if kind == "cond" else band_key(value), dish_id)
+            pipe.delete(dish_tags_key(dish_id))
+        pipe.hdel(DISHES_KEY, *(str(dish_id) for dish_id in dish_ids))
+        pipe.incr(INDEX_VERSION_KEY)
+        await pipe.execute()
+
+
+async def unindex_dish(redis: Redis, dish_id: int) -> None:
+    """菜品删除后从倒排索引中移除"""
+    await unindex_dishes(redis, [dish_id])
+
+
+async def build_index(session: AsyncSession, redis: Redis, *, force: bool = False) -> int:
+    """从数据库全量构建倒排索引；已存在时默认跳过，避免多个 worker 重复构建"""
+    if not force and await redis.exists(DISHES_KEY):
+        return 0
+
+    count = 0
+    result = await session.execute(
+        select(Dish.id, Dish.name, Dish.description).where(Dish.deleted_at.is_(None))
+    )
+    for batch in result.partitions(500):
+        await index_dishes(redis, [tuple(row) for row in batch])
+        count += len(batch)
+    logger.info("推荐倒排索引构建完成，共 {} 道菜品", count)
+    return count
@@ -0,0 +1,43 @@
+# src/recommendations/router.py
+from fastapi import APIRouter, Depends, Query
+import httpx
+from redis.asyncio import Redis
+
+from src.collections.dependencies import get_collection_session
+from src.collections.repository import CollectionRepository
+from src.core.database import get_db
+from src.core.redis_db import get_cache_redis
+from src.core.rate_limit import RateLimit
+from src.weather.dependencies import get_http_client
+from src.recommendations.service import RecommendationService
+from src.recommendations.schemas import RecommendationResponse
+from src.auth.user_manager import get_current_user
+from src.auth.schemas import UserRead
+
+router = APIRouter(
+    prefix="/recommendations",
+    tags=["Recommendations"],
+    dependencies=[Depends(RateLimit("recommendations"))],
+)
+
+
+# 注入仓库 + 服务层
+async def get_recommendation_service(
+    session=Depends(get_db),
+    collection_session=Depends(get_collection_session),
+    redis: Redis = Depends(get_cache_redis),
+    client: httpx.AsyncClient = Depends(get_http_client),
+) -> RecommendationService:
+    repository = CollectionRepository(collection_session, catalog=session)
+    return RecommendationService(repository, redis, client)
+
+
+@router.get("", response_model=RecommendationResponse)
+async def recommend(
+    city: str = Query(..., description="城市名称，例如: 北京"),
+    limit: int = Query(3, ge=1, le=20, description="推荐菜品数量"),
+    service: RecommendationService = Depends(get_recommendation_service),
+    current_user: UserRead = Depends(get_current_user),
+) -> RecommendationResponse:
+    """根据当前天气与收藏历史推荐今天吃什么"""
+    return await service.recommend(city, current_user, limit)
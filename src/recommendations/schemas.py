@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+
+from src.weather.schemas import WeatherResponse
+
+
+class RecommendedDish(BaseModel):
+    id: int
+    name: str
+    description: str | None = None
+    score: float
+    reasons: list[str]
+
+
+class RecommendationResponse(BaseModel):
+    weather: WeatherResponse
+    condition: str
+    temperature_band: str
+    dishes: list[RecommendedDish]
@@ -0,0 +1,139 @@
+# src/recommendations/service.py
+import json
+import uuid
+
+import httpx
+from redis.asyncio import Redis
+
+from src.collections.repository import CollectionRepository
+from src.core.exception import NotFoundException
+from src.core.tracing import traced
+from src.recommendations.index import (
+    BAND_LABELS,
+    CONDITION_LABELS,
+    DISHES_KEY,
+    INDEX_VERSION_KEY,
+    band_key,
+    condition_key,
+    weather_bucket,
+)
+from src.recommendations.schemas import RecommendationResponse, RecommendedDish
+from src.weather.cache_weather import fetch_weather_with_cache
+
+CACHE_TTL = 10 * 60  # 推荐结果缓存 10 分钟
+
+CONDITION_SCORE = 2.0
+BAND_SCORE = 1.0
+HISTORY_SCORE = 1.5
+OVERFETCH_FACTOR = 2  # 摘要缺失时按 limit 的倍数分批超取候选
+
+
+def recommendation_cache_key(user_id: uuid.UUID, version: str) -> str:
+    """每个用户每个索引版本一个 hash，field 为天气桶
+
+    版本号放进 key 名：索引重建后旧版本的 hash 不再被读写，随 TTL 整体过期，
+    不会在同一个 hash 里堆积过期 field。
+    """
+    return f"reco:user:{user_id}:v{version}"
+
+
+async def invalidate_user_recommendations(redis: Redis, user_id: uuid.UUID) -> None:
+    version = await redis.get(INDEX_VERSION_KEY) or "0"
+    await redis.delete(recommendation_cache_key(user_id, version))
+
+
+@traced("service")
+class RecommendationService:
+    """基于天气倒排索引 + 收藏历史的推荐（不走 LLM）"""
+
+    def __init__(
+        self,
+        repository: CollectionRepository,
+        redis: Redis,
+        client: httpx.AsyncClient,
+    ):
+        self.repository = repository
+        self.redis = redis
+        self.client = client
+
+    async def recommend(
+        self, city: str, current_user, limit: int = 3
+    ) -> RecommendationResponse:
+        weather = await fetch_weather_with_cache(self.client, self.redis, city)
+        if weather is None:
+            raise NotFoundException("无法获取该城市天气数据")
+        condition, band = weather_bucket(weather)
+
+        # 1) 读取 (天气桶, 用户) 结果缓存；索引版本号变化后自动失效
+        version = await self.redis.get(INDEX_VERSION_KEY) or "0"
+        cache_key = recommendation_cache_key(current_user.id, version)
+        field = f"{condition}:{band}:{limit}"
+        cached = await self.redis.hget(cache_key, field)
+        if cached:
+            dishes = [RecommendedDish.model_validate(d) for d in json.loads(cached)]
+        else:
+            dishes = await self._score(condition, band, current_user, limit)
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hset(
+                    cache_key,
+                    field,
+                    json.dumps(
+                        [d.model_dump(mode="json") for d in dishes], ensure_ascii=False
+                    ),
+                )
+                pipe.expire(cache_key, CACHE_TTL)
+                await pipe.execute()
+
+        return RecommendationResponse(
+            weather=weather,
+            condition=condition,
+            temperature_band=band,
+            dishes=dishes,
+        )
+
+    async def _score(
+        self, condition: str, band: str, current_user, limit: int
+    ) -> list[RecommendedDish]:
+        # 2) 倒排索引取候选集
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.smembers(condition_key(condition))
+            pipe.smembers(band_key(band))
+            condition_ids, band_ids = await pipe.execute()
+        history_ids = {
+            str(dish_id)
+            for dish_id in await self.repository.get_dish_ids_for_user(current_user)
+        }
+
+        scores: dict[str, float] = {}
+        reasons: dict[str, list[str]] = {}
+        for ids, score, reason in (
+            (condition_ids, CONDITION_SCORE, f"适合{CONDITION_LABELS[condition]}"),
+            (band_ids, BAND_SCORE, f"适合{BAND_LABELS[band]}的天气"),
+            (history_ids, HISTORY_SCORE, "在你的收藏中"),
+        ):
+            for dish_id in ids:
+                scores[dish_id] = scores.get(dish_id, 0.0) + score
+                reasons.setdefault(dish_id, []).append(reason)
+
+        ranked = sorted(scores, key=lambda d: (-scores[d], int(d)))
+
+        # 3) 从索引中的菜品摘要组装结果，无需回表；
+        # 收藏里可能有已下架/未入索引的菜品（无摘要），按批超取直到凑满 limit
+        dishes: list[RecommendedDish] = []
+        batch = max(limit * OVERFETCH_FACTOR, 1)
+        for start in range(0, len(ranked), batch):
+            chunk = ranked[start : start + batch]
+            summaries = await self.redis.hmget(DISHES_KEY, chunk)
+            for dish_id, summary in zip(chunk, summaries):
+                if summary is None:
+                    continue
+                dishes.append(
+                    RecommendedDish(
+                        **json.loads(summary),
+                        score=scores[dish_id],
+                        reasons=reasons[dish_id],
+                    )
+                )
+                if len(dishes) >= limit:
+                    return dishes
+        return dishes
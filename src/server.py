@@ -0,0 +1,265 @@
+# src/server.py
+"""生产启动入口
+
+    python -m src.server --workers 4                      # uvicorn 多进程
+    python -m src.server --workers 4 --loop uvloop --http httptools
+    python -m src.server --workers 4 --server gunicorn    # 预加载 + 平滑重载（kill -HUP）
+    python -m src.server --bench --workers 2              # 对比不同运行时的吞吐与延迟
+
+每个 worker 的数据库连接池与 Redis 连接数由全局连接预算推算，通过环境变量传给
+worker 进程，横向扩容时不会超出 PostgreSQL 的 max_connections。
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+
+import httpx
+from loguru import logger
+
+from src.core.config import settings
+
+APP = "src.main:app"
+# 每个 worker 在连接池之外独占的 Redis 连接：天气订阅 + 两个客户端缓存失效通道
+DEDICATED_REDIS_CONNECTIONS = 3
+
+
+@dataclass
+class ConnectionBudget:
+    workers: int
+    pool_size: int
+    max_overflow: int
+    auth_redis_max_connections: int
+    cache_redis_max_connections: int
+
+    def as_env(self) -> dict[str, str]:
+        return {
+            "POOL_SIZE": str(self.pool_size),
+            "MAX_OVERFLOW": str(self.max_overflow),
+            "AUTH_REDIS_MAX_CONNECTIONS": str(self.auth_redis_max_connections),
+            "CACHE_REDIS_MAX_CONNECTIONS": str(self.cache_redis_max_connections),
+        }
+
+
+def plan_budget(workers: int, db_budget: int, redis_budget: int) -> ConnectionBudget:
+    """把全局连接预算平均分给每个 worker：数据库 3/4 常驻、1/4 溢出；Redis 缓存 3/4、认证 1/4"""
+    db_per_worker = db_budget // workers
+    redis_per_worker = redis_budget // workers - DEDICATED_REDIS_CONNECTIONS
+    if db_per_worker < 2 or redis_per_worker < 4:
+        raise SystemExit(
+            f"连接预算不足以支撑 {workers} 个 worker："
+            f"数据库 {db_budget}、Redis {redis_budget}"
+        )
+    pool_size = max(1, db_per_worker * 3 // 4)
+    auth = max(2, redis_per_worker // 4)
+    return ConnectionBudget(
+        workers=workers,
+        pool_size=pool_size,
+        max_overflow=db_per_worker - pool_size,
+        auth_redis_max_connections=auth,
+        cache_redis_max_connections=redis_per_worker - auth,
+    )
+
+
+def apply_budget(budget: ConnectionBudget) -> None:
+    """写入环境变量（spawn 出的 worker 重新读取配置）并同步当前进程（预加载模式）"""
+    os.environ.update(budget.as_env())
+    settings.pool_size = budget.pool_size
+    settings.max_overflow = budget.max_overflow
+    settings.auth_redis_max_connections = budget.auth_redis_max_connections
+    settings.cache_redis_max_connections = budget.cache_redis_max_connections
+    logger.info(
+        "{} 个 worker，每个 worker：数据库 pool_size={} max_overflow={}，Redis auth={} cache={}",
+        budget.workers,
+        budget.pool_size,
+        budget.max_overflow,
+        budget.auth_redis_max_connections,
+        budget.cache_redis_max_connections,
+    )
+
+
+def run_uvicorn(args: argparse.Namespace) -> None:
+    """uvicorn 自带的多进程管理；kill -HUP 主进程会逐个重启 worker"""
+    import uvicorn
+
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=args.loop,
+        http=args.http,
+        timeout_graceful_shutdown=settings.server_graceful_timeout,
+        proxy_headers=True,
+        log_level="info",
+        access_log=False,  # 访问日志由 RequestContextMiddleware 采样记录
+    )
+
+
+def run_gunicorn(args: argparse.Namespace) -> None:
+    """gunicorn 管理 uvicorn worker：主进程预加载应用后 fork，HUP 时先起新 worker 再优雅关闭旧 worker"""
+    try:
+        from gunicorn.app.base import BaseApplication
+        from uvicorn_worker import UvicornWorker
+    except ImportError:
+        raise SystemExit("gunicorn 模式需要安装可选依赖：uv sync --extra server")
+
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {
+            "loop": args.loop,
+            "http": args.http,
+            "proxy_headers": True,
+            "access_log": False,
+        }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{args.host}:{args.port}",
+                "workers": args.workers,
+                "worker_class": Worker,
+                "preload_app": args.preload,
+                "graceful_timeout": settings.server_graceful_timeout,
+                "timeout": settings.server_graceful_timeout * 2,
+                "keepalive": 5,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from src.main import app
+
+            return app
+
+    Application().run()
+
+
+# ------------------ 压测模式 ------------------
+def available_runtimes() -> list[tuple[str, str]]:
+    runtimes = [("asyncio", "h11")]
+    has_uvloop = importlib.util.find_spec("uvloop") is not None
+    has_httptools = importlib.util.find_spec("httptools") is not None
+    if has_httptools:
+        runtimes.append(("asyncio", "httptools"))
+    if has_uvloop:
+        runtimes.append(("uvloop", "h11"))
+    if has_uvloop and has_httptools:
+        runtimes.append(("uvloop", "httptools"))
+    return runtimes
+
+
+async def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"服务在 {timeout}s 内未就绪: {url}")
+
+
+async def _load(url: str, duration: float, concurrency: int) -> tuple[list[float], int]:
+    """固定并发的闭环压测，返回成功请求的延迟与失败数"""
+    latencies: list[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=10) as client:
+        deadline = time.perf_counter() + duration
+
+        async def user() -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def run_benchmark(args: argparse.Namespace) -> None:
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = []
+    for loop, http in available_runtimes():
+        command = [
+            sys.executable, "-m", "src.server",
+            "--port", str(args.port), "--workers", str(args.workers),
+            "--loop", loop, "--http", http,
+        ]
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            asyncio.run(_wait_ready(f"{base_url}/health"))
+            # 预热：建立连接、填充缓存
+            asyncio.run(_load(f"{base_url}{args.bench_path}", 1, args.bench_concurrency))
+            latencies, errors = asyncio.run(
+                _load(f"{base_url}{args.bench_path}", args.bench_duration, args.bench_concurrency)
+            )
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=settings.server_graceful_timeout + 5)
+
+        latencies.sort()
+        count = len(latencies)
+        results.append(
+            (
+                f"{loop}+{http}",
+                count / args.bench_duration,
+                statistics.median(latencies) * 1000 if count else 0.0,
+                latencies[min(count - 1, int(count * 0.99))] * 1000 if count else 0.0,
+                errors,
+            )
+        )
+
+    print(f"\n{args.bench_path}  并发 {args.bench_concurrency}  时长 {args.bench_duration}s  worker {args.workers}")
+    print(f"{'runtime':<20}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, rps, p50, p99, errors in results:
+        print(f"{name:<20}{rps:>10.0f}{p50:>10.2f}{p99:>10.2f}{errors:>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="What to Eat 服务启动入口")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.server_workers)
+    parser.add_argument("--loop", choices=["auto", "asyncio", "uvloop"], default="auto")
+    parser.add_argument("--http", choices=["auto", "h11", "httptools"], default="auto")
+    parser.add_argument("--server", choices=["uvicorn", "gunicorn"], default="uvicorn")
+    parser.add_argument(
+        "--no-preload", dest="preload", action="store_false",
+        help="gunicorn 模式下不在主进程预加载应用",
+    )
+    parser.add_argument("--db-budget", type=int, default=settings.db_connection_budget)
+    parser.add_argument("--redis-budget", type=int, default=settings.redis_connection_budget)
+    parser.add_argument("--bench", action="store_true", help="依次以各运行时启动服务并压测")
+    parser.add_argument("--bench-path", default="/health")
+    parser.add_argument("--bench-duration", type=float, default=10.0)
+    parser.add_argument("--bench-concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.bench:
+        run_benchmark(args)
+        return
+
+    apply_budget(plan_budget(args.workers, args.db_budget, args.redis_budget))
+    if args.server == "gunicorn":
+        run_gunicorn(args)
+    else:
+        run_uvicorn(args)
+
+
+if __name__ == "__main__":
+    main()
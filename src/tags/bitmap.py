@@ -0,0 +1,103 @@
+# src/tags/bitmap.py
+from functools import reduce
+from operator import and_, or_
+
+import numpy as np
+from loguru import logger
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.dishes.model import Dish
+from src.tags.model import DishTag, Tag
+
+VERSION_KEY = "tags:bitmap:version"
+
+
+def tag_key(kind: str, name: str) -> str:
+    return f"{kind}:{name}"
+
+
+def bitmap_to_ids(bitmap: int) -> list[int]:
+    """位图 → 升序 id 列表（numpy 解包，避免逐位移位）"""
+    if not bitmap:
+        return []
+    raw = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little")).tolist()
+
+
+class TagBitmapIndex:
+    """进程内的 标签 → 菜品 id 位图
+
+    用 Python 大整数作为位图（第 n 位代表 dish_id = n），
+    AND / OR 筛选与分面计数都只是整数位运算 + bit_count()，
+    不需要多表 JOIN + GROUP BY。各 worker 通过 Redis 中的版本号判断是否需要重建。
+    """
+
+    def __init__(self):
+        self.bitmaps: dict[str, int] = {}
+        self.version: str | None = None
+
+    async def ensure_fresh(self, session: AsyncSession, redis: Redis) -> None:
+        version = await redis.get(VERSION_KEY) or "0"
+        if version != self.version:
+            await self.rebuild(session)
+            self.version = version
+
+    async def rebuild(self, session: AsyncSession) -> None:
+        bitmaps: dict[str, int] = {}
+        for kind, name in await session.execute(select(Tag.kind, Tag.name)):
+            bitmaps[tag_key(kind, name)] = 0
+        query = (
+            select(Tag.kind, Tag.name, DishTag.dish_id)
+            .join(DishTag, DishTag.tag_id == Tag.id)
+            .join(Dish, Dish.id == DishTag.dish_id)
+            .where(Dish.deleted_at.is_(None))
+        )
+        for kind, name, dish_id in await session.execute(query):
+            bitmaps[tag_key(kind, name)] |= 1 << dish_id
+        self.bitmaps = bitmaps
+        logger.debug("标签位图重建完成，共 {} 个标签", len(bitmaps))
+
+    async def _bump(self, redis: Redis) -> None:
+        """本地已增量更新；若期间没有其他 worker 写入，则无需重建"""
+        version = await redis.incr(VERSION_KEY)
+        if self.version is not None and int(self.version) + 1 == version:
+            self.version = str(version)
+
+    async def add(self, redis: Redis, key: str, dish_id: int) -> None:
+        self.bitmaps[key] = self.bitmaps.get(key, 0) | (1 << dish_id)
+        await self._bump(redis)
+
+    async def discard(self, redis: Redis, key: str, dish_id: int) -> None:
+        if key in self.bitmaps:
+            self.bitmaps[key] &= ~(1 << dish_id)
+        await self._bump(redis)
+
+    async def remove_tag(self, redis: Redis, key: str) -> None:
+        self.bitmaps.pop(key, None)
+        await self._bump(redis)
+
+    async def remove_dish(self, redis: Redis, dish_id: int) -> None:
+        await self.remove_dishes(redis, [dish_id])
+
+    async def remove_dishes(self, redis: Redis, dish_ids: list[int]) -> None:
+        mask = ~reduce(or_, (1 << dish_id for dish_id in dish_ids), 0)
+        for key in self.bitmaps:
+            self.bitmaps[key] &= mask
+        await self._bump(redis)
+
+    def match(self, keys: list[str], mode: str = "all") -> int:
+        """mode=all：同时具备所有标签；mode=any：具备任一标签"""
+        bitmaps = [self.bitmaps.get(key, 0) for key in keys]
+        return reduce(and_ if mode == "all" else or_, bitmaps)
+
+    def facets(self, selection: int | None = None) -> dict[str, dict[str, int]]:
+        """在当前筛选结果内，统计每个标签命中的菜品数"""
+        facets: dict[str, dict[str, int]] = {}
+        for key, bitmap in self.bitmaps.items():
+            kind, name = key.split(":", 1)
+            if selection is not None:
+                bitmap &= selection
+            facets.setdefault(kind, {})[name] = bitmap.bit_count()
+        return facets
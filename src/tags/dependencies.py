@@ -0,0 +1,25 @@
+from typing import cast
+
+from fastapi import Depends, Request
+from redis.asyncio import Redis
+
+from src.core.database import get_db
+from src.core.redis_db import get_cache_redis
+from src.tags.bitmap import TagBitmapIndex
+from src.tags.repository import TagRepository
+from src.tags.service import TagService
+
+
+# 进程内标签位图依赖
+async def get_tag_index(request: Request) -> TagBitmapIndex:
+    return cast(TagBitmapIndex, request.state.tag_index)
+
+
+# 注入仓库 + 服务层
+async def get_tag_service(
+    session=Depends(get_db),
+    redis: Redis = Depends(get_cache_redis),
+    index: TagBitmapIndex = Depends(get_tag_index),
+) -> TagService:
+    repository = TagRepository(session)
+    return TagService(repository, redis, index)
@@ -0,0 +1,39 @@
+from typing import TYPE_CHECKING
+
+from sqlalchemy import ForeignKey, Index, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from src.core.base_model import Base, DateTimeMixin
+
+if TYPE_CHECKING:
+    from src.dishes.model import Dish
+
+
+class Tag(Base, DateTimeMixin):
+    __tablename__ = "tags"
+    __table_args__ = (UniqueConstraint("kind", "name"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # 标签维度：weather / temperature / cuisine / price
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)
+    name: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    # 单向导航，Dish 模型保持不变
+    dishes: Mapped[list["Dish"]] = relationship("Dish", secondary="dish_tag")
+
+
+# 中间表
+class DishTag(Base):
+    __tablename__ = "dish_tag"
+    __table_args__ = (
+        # 主键以 dish_id 开头；反向（按标签查菜品）需要单独的索引
+        Index("dish_tag_tag_id_dish_id_idx", "tag_id", "dish_id"),
+        {"comment": "菜品-标签 中间表"},
+    )
+
+    dish_id: Mapped[int] = mapped_column(
+        ForeignKey("dishes.id", ondelete="CASCADE"), primary_key=True
+    )
+    tag_id: Mapped[int] = mapped_column(
+        ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True
+    )
@@ -0,0 +1,63 @@
+# src/tags/repository.py
+from typing import Mapping, Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.tracing import traced
+from src.dishes.model import Dish
+from src.tags.model import DishTag, Tag
+
+
+@traced("repository")
+class TagRepository:
+    """数据库表仓库层"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create(self, data: Mapping[str, Any]) -> Tag:
+        tag = Tag(**data)
+        self.session.add(tag)
+        try:
+            await self.session.commit()
+        except IntegrityError:
+            await self.session.rollback()
+            raise
+        await self.session.refresh(tag)
+        return tag
+
+    async def get_by_id(self, tag_id: int) -> Tag | None:
+        return await self.session.get(Tag, tag_id)
+
+    async def get_all(self, kind: str | None = None) -> list[Tag]:
+        query = select(Tag).order_by(Tag.kind, Tag.name)
+        if kind:
+            query = query.where(Tag.kind == kind)
+        return list(await self.session.scalars(query))
+
+    async def delete(self, tag: Tag) -> None:
+        await self.session.delete(tag)
+        await self.session.commit()
+
+    async def dish_exists(self, dish_id: int) -> bool:
+        """菜品存在且未被软删除"""
+        query = select(Dish.id).where(Dish.id == dish_id, Dish.deleted_at.is_(None))
+        return await self.session.scalar(query) is not None
+
+    async def attach(self, tag_id: int, dish_id: int) -> None:
+        """关联菜品与标签，重复关联抛出 IntegrityError"""
+        self.session.add(DishTag(tag_id=tag_id, dish_id=dish_id))
+        try:
+            await self.session.commit()
+        except IntegrityError:
+            await self.session.rollback()
+            raise
+
+    async def detach(self, tag_id: int, dish_id: int) -> bool:
+        result = await self.session.execute(
+            delete(DishTag).where(DishTag.tag_id == tag_id, DishTag.dish_id == dish_id)
+        )
+        await self.session.commit()
+        return result.rowcount > 0
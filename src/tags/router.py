@@ -0,0 +1,78 @@
+# src/tags/router.py
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Path, Query, status
+
+from src.tags.dependencies import get_tag_service
+from src.tags.schema import TagCreate, TagKind, TagResponse
+from src.tags.service import TagService
+from src.collections.dependencies import get_dish_id
+from src.auth.user_manager import get_current_user, current_superuser
+from src.core.rate_limit import RateLimit
+
+router = APIRouter(
+    prefix="/tags",
+    tags=["Tags"],
+    dependencies=[Depends(get_current_user), Depends(RateLimit("tags"))],
+)
+
+
+@router.post(
+    "/",
+    response_model=TagResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(current_superuser)],
+)
+async def create_tag(tag_data: TagCreate, service: TagService = Depends(get_tag_service)):
+    """创建标签"""
+    return await service.create_tag(tag_data)
+
+
+@router.get("/", response_model=list[TagResponse])
+async def list_tags(
+    kind: TagKind | None = Query(None, description="标签维度"),
+    service: TagService = Depends(get_tag_service),
+):
+    """查询所有标签"""
+    return await service.list_tags(kind)
+
+
+@router.delete(
+    "/{tag_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(current_superuser)],
+)
+async def delete_tag(
+    tag_id: int = Path(..., description="标签ID"),
+    service: TagService = Depends(get_tag_service),
+):
+    """删除标签"""
+    await service.delete_tag(tag_id)
+
+
+@router.post(
+    "/{tag_id}/dishes/{dish_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(current_superuser)],
+    summary="为菜品添加标签",
+)
+async def add_tag_to_dish(
+    tag_id: int,
+    dish_id: Annotated[int, Depends(get_dish_id)],
+    service: TagService = Depends(get_tag_service),
+):
+    await service.add_tag_to_dish(tag_id, dish_id)
+
+
+@router.delete(
+    "/{tag_id}/dishes/{dish_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(current_superuser)],
+    summary="移除菜品标签",
+)
+async def remove_tag_from_dish(
+    tag_id: int,
+    dish_id: Annotated[int, Depends(get_dish_id)],
+    service: TagService = Depends(get_tag_service),
+):
+    await service.remove_tag_from_dish(tag_id, dish_id)
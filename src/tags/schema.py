@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Annotated, Literal
+from pydantic import BaseModel, Field
+
+TagKind = Literal["weather", "temperature", "cuisine", "price"]
+
+
+# 公共字段基类
+class TagBase(BaseModel):
+    kind: Annotated[TagKind, Field(..., description="标签维度")]
+    name: Annotated[str, Field(..., max_length=64, description="标签名称，例如: 台风天")]
+
+
+# 创建模型
+class TagCreate(TagBase):
+    """用于创建标签"""
+
+    pass
+
+
+# 响应模型
+class TagResponse(TagBase):
+    id: int
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+# 分面统计响应
+class DishFacetResponse(BaseModel):
+    total: Annotated[int, Field(description="满足筛选条件的菜品总数")]
+    facets: Annotated[
+        dict[str, dict[str, int]],
+        Field(description="按维度分组的标签计数：{kind: {name: count}}"),
+    ]
@@ -0,0 +1,79 @@
+# src/tags/service.py
+from redis.asyncio import Redis
+from sqlalchemy.exc import IntegrityError
+
+from src.core.exception import AlreadyExistsException, NotFoundException
+from src.core.tracing import traced
+from src.tags.bitmap import TagBitmapIndex, bitmap_to_ids, tag_key
+from src.tags.repository import TagRepository
+from src.tags.schema import DishFacetResponse, TagCreate, TagResponse
+
+
+@traced("service")
+class TagService:
+    """业务逻辑层（Service Layer）"""
+
+    def __init__(self, repository: TagRepository, redis: Redis, index: TagBitmapIndex):
+        self.repository = repository
+        self.redis = redis
+        self.index = index
+
+    async def create_tag(self, data: TagCreate) -> TagResponse:
+        try:
+            tag = await self.repository.create(data.model_dump())
+        except IntegrityError as e:
+            raise AlreadyExistsException("Tag with this kind and name already exists") from e
+        return TagResponse.model_validate(tag)
+
+    async def list_tags(self, kind: str | None = None) -> list[TagResponse]:
+        tags = await self.repository.get_all(kind)
+        return [TagResponse.model_validate(tag) for tag in tags]
+
+    async def delete_tag(self, tag_id: int) -> None:
+        tag = await self.repository.get_by_id(tag_id)
+        if not tag:
+            raise NotFoundException(f"Tag with id {tag_id} not found")
+        key = tag_key(tag.kind, tag.name)
+        await self.repository.delete(tag)
+        await self.index.remove_tag(self.redis, key)
+
+    async def add_tag_to_dish(self, tag_id: int, dish_id: int) -> None:
+        tag = await self.repository.get_by_id(tag_id)
+        if not tag:
+            raise NotFoundException(f"Tag with id {tag_id} not found")
+        # 软删除的菜品仍在表中，外键约束拦不住
+        if not await self.repository.dish_exists(dish_id):
+            raise NotFoundException(f"Dish with id {dish_id} not found")
+        try:
+            await self.repository.attach(tag_id, dish_id)
+        except IntegrityError as e:
+            raise AlreadyExistsException(
+                f"Tag {tag_id} already associated with dish {dish_id}"
+            ) from e
+        await self.index.add(self.redis, tag_key(tag.kind, tag.name), dish_id)
+
+    async def remove_tag_from_dish(self, tag_id: int, dish_id: int) -> None:
+        tag = await self.repository.get_by_id(tag_id)
+        if not tag or not await self.repository.detach(tag_id, dish_id):
+            raise NotFoundException(
+                f"Tag with id {tag_id} not associated with dish {dish_id}"
+            )
+        await self.index.discard(self.redis, tag_key(tag.kind, tag.name), dish_id)
+
+    async def match_dish_ids(self, tags: list[str], mode: str = "all") -> list[int]:
+        """按标签筛选菜品 id（升序），tags 形如 weather:台风天"""
+        await self.index.ensure_fresh(self.repository.session, self.redis)
+        return bitmap_to_ids(self.index.match(tags, mode))
+
+    async def facet_counts(
+        self, tags: list[str] | None = None, mode: str = "all"
+    ) -> DishFacetResponse:
+        await self.index.ensure_fresh(self.repository.session, self.redis)
+        if not tags:
+            # 未筛选时，统计范围为所有带标签的菜品
+            tags, mode = list(self.index.bitmaps), "any"
+        selection = self.index.match(tags, mode) if tags else 0
+        return DishFacetResponse(
+            total=selection.bit_count(),
+            facets=self.index.facets(selection),
+        )
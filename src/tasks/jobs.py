@@ -0,0 +1,58 @@
+# src/tasks/jobs.py
+import uuid
+
+from src.tasks.registry import JobContext, task
+from src.tasks.purge import purge_dishes, purge_user
+from src.recommendations.index import build_index
+from src.dishes.similarity import build_similarity_index, open_similarity_index
+from src.dishes.popularity import build_popularity
+from src.weather.history import compact_weather_logs
+
+
+@task("recommendations.rebuild_index", max_retries=2)
+async def rebuild_recommendation_index(ctx: JobContext) -> dict:
+    """全量重建推荐倒排索引"""
+    async with ctx.session_factory() as session:
+        count = await build_index(session, ctx.redis, force=True)
+    return {"dishes": count}
+
+
+@task("dishes.rebuild_similarity_index", max_retries=2)
+async def rebuild_similarity_index(ctx: JobContext) -> dict:
+    """全量重建相似菜品索引（按最新文档频率重新计算所有行的 IDF 权重）"""
+    index = open_similarity_index()
+    async with ctx.session_factory() as session:
+        count = await build_similarity_index(session, index, force=True)
+    return {"dishes": count}
+
+
+@task("dishes.reconcile_popularity", max_retries=2)
+async def reconcile_popularity(ctx: JobContext) -> dict:
+    """按数据库重建菜品热度排行（与定期对账相同，可手动触发）"""
+    async with ctx.session_factory() as session:
+        count = await build_popularity(session, ctx.redis, force=True)
+    return {"dishes": count}
+
+
+@task("weather.compact_logs", max_retries=2)
+async def compact_weather_log(ctx: JobContext) -> dict:
+    """删除超过保留期的天气原始记录（与定期压缩相同，可手动触发）"""
+    return {"deleted": await compact_weather_logs(ctx.session_factory)}
+
+
+@task("dishes.purge", max_retries=5)
+async def purge_deleted_dish(ctx: JobContext, dish_id: int) -> dict:
+    """分批清理已软删除菜品的收藏与标签关联，最后删除菜品"""
+    return await purge_dishes(ctx, [dish_id])
+
+
+@task("dishes.purge_many", max_retries=5)
+async def purge_deleted_dishes(ctx: JobContext, dish_ids: list[int]) -> dict:
+    """批量删除接口的清理任务：一批菜品共用一个任务"""
+    return await purge_dishes(ctx, dish_ids)
+
+
+@task("users.purge", max_retries=5)
+async def purge_deleted_user(ctx: JobContext, user_id: str) -> dict:
+    """分批清理已软删除用户的收藏、收藏关联与访问令牌，最后删除用户"""
+    return await purge_user(ctx, uuid.UUID(user_id))
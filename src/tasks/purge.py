@@ -0,0 +1,127 @@
+# src/tasks/purge.py
+"""软删除实体的物理清理
+
+请求内只标记 deleted_at；关联行在后台按主键分批删除，每批一个短事务，
+批次之间暂停片刻，避免一次级联删除长时间持有大量行锁。
+收藏分片时，中间表与收藏在各分片上分别清理，删除数按表名累加。
+"""
+import asyncio
+import uuid
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import ColumnElement, Table, delete, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.config import settings
+from src.core.sharding import shard_router
+from src.auth.model import AccessToken, User
+from src.collections.model import Collection, CollectionDish
+from src.dishes.model import Dish
+from src.tags.model import DishTag
+from src.tasks.registry import JobContext
+
+
+async def delete_in_chunks(
+    session_factory: async_sessionmaker[AsyncSession],
+    table: Table,
+    where: ColumnElement[bool],
+    *,
+    chunk_size: int = settings.purge_chunk_size,
+    pause: float = settings.purge_chunk_pause,
+    on_chunk: Callable[[int], Awaitable[None]] | None = None,
+) -> int:
+    """按主键分批删除满足条件的行，返回删除总数；on_chunk 在每批提交后收到累计数"""
+    key = list(table.primary_key.columns)
+    total = 0
+    while True:
+        async with session_factory() as session:
+            rows = (await session.execute(select(*key).where(where).limit(chunk_size))).all()
+            if not rows:
+                return total
+            if len(key) == 1:
+                in_chunk = key[0].in_([row[0] for row in rows])
+            else:
+                in_chunk = tuple_(*key).in_([tuple(row) for row in rows])
+            result = await session.execute(delete(table).where(in_chunk))
+            await session.commit()
+        total += result.rowcount
+        if on_chunk is not None:
+            await on_chunk(total)
+        await asyncio.sleep(pause)
+
+
+Step = tuple[async_sessionmaker[AsyncSession], Table, ColumnElement[bool]]
+
+
+def _collection_factories(
+    ctx: JobContext, user_id: uuid.UUID | None = None
+) -> list[async_sessionmaker[AsyncSession]]:
+    """收藏表所在库的会话工厂：未分片时为主库；分片时为全部分片，给定用户则只有其所在分片"""
+    if shard_router is None:
+        return [ctx.session_factory]
+    if user_id is not None:
+        return [shard_router.session_factory_for(user_id)]
+    return shard_router.session_factories
+
+
+async def _purge(
+    ctx: JobContext,
+    steps: list[Step],
+    entity: Table,
+    entity_where: ColumnElement[bool],
+) -> dict[str, int]:
+    """依次清理各关联表，最后删除实体本身；进度按表名记录"""
+    deleted = {table.name: 0 for _, table, _ in steps}
+
+    for session_factory, table, where in steps:
+        base = deleted[table.name]
+
+        async def report(count: int, name: str = table.name, base: int = base) -> None:
+            deleted[name] = base + count
+            await ctx.report_progress(**deleted)
+
+        deleted[table.name] = base + await delete_in_chunks(
+            session_factory, table, where, on_chunk=report
+        )
+
+    async with ctx.session_factory() as session:
+        # 只删除仍处于软删除状态的行，任务重试或重复投递时不会误删
+        result = await session.execute(delete(entity).where(entity_where))
+        await session.commit()
+    deleted[entity.name] = result.rowcount
+    await ctx.report_progress(**deleted)
+    return deleted
+
+
+async def purge_dishes(ctx: JobContext, dish_ids: list[int]) -> dict[str, int]:
+    return await _purge(
+        ctx,
+        [
+            *(
+                (factory, CollectionDish.__table__, CollectionDish.dish_id.in_(dish_ids))
+                for factory in _collection_factories(ctx)
+            ),
+            (ctx.session_factory, DishTag.__table__, DishTag.dish_id.in_(dish_ids)),
+        ],
+        Dish.__table__,
+        Dish.id.in_(dish_ids) & Dish.deleted_at.is_not(None),
+    )
+
+
+async def purge_user(ctx: JobContext, user_id: uuid.UUID) -> dict[str, int]:
+    collection_ids = select(Collection.id).where(Collection.user_id == user_id)
+    (collections_factory,) = _collection_factories(ctx, user_id)
+    return await _purge(
+        ctx,
+        [
+            (
+                collections_factory,
+                CollectionDish.__table__,
+                CollectionDish.collection_id.in_(collection_ids),
+            ),
+            (collections_factory, Collection.__table__, Collection.user_id == user_id),
+            (ctx.session_factory, AccessToken.__table__, AccessToken.user_id == user_id),
+        ],
+        User.__table__,
+        (User.id == user_id) & User.deleted_at.is_not(None),
+    )
@@ -0,0 +1,69 @@
+# src/tasks/queue.py
+import json
+import time
+import uuid
+from typing import Any
+
+from redis.asyncio import Redis
+
+from src.core.config import settings
+from src.core.tracing import inject_context
+
+STREAM_KEY = "tasks:stream"
+GROUP_NAME = "tasks:workers"
+DELAYED_KEY = "tasks:delayed"  # 等待重试的任务：zset(score=可执行时间)
+DEAD_LETTER_KEY = "tasks:dead"
+STREAM_MAX_LEN = 100_000
+
+
+def job_key(job_id: str) -> str:
+    return f"task:{job_id}"
+
+
+async def enqueue(
+    redis: Redis, name: str, *, owner_id: uuid.UUID | None = None, **kwargs: Any
+) -> str:
+    """投递任务，返回任务 id；消息体只含 id，任务详情保存在 hash 中
+
+    owner_id 为发起任务的用户，只有该用户与超级用户可以查询任务状态；
+    不指定时仅超级用户可见。
+    """
+    job_id = uuid.uuid4().hex
+    job = {
+        "id": job_id,
+        "name": name,
+        "kwargs": json.dumps(kwargs, ensure_ascii=False),
+        "status": "queued",
+        "attempts": 0,
+        "created_at": time.time(),
+    }
+    if owner_id is not None:
+        job["owner_id"] = str(owner_id)
+    # 链路追踪上下文：worker 执行任务时以投递方的 span 为父 span
+    carrier = inject_context()
+    if carrier:
+        job["trace"] = json.dumps(carrier)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(job_key(job_id), mapping=job)
+        pipe.expire(job_key(job_id), settings.task_result_ttl)
+        pipe.xadd(STREAM_KEY, {"id": job_id}, maxlen=STREAM_MAX_LEN, approximate=True)
+        await pipe.execute()
+    return job_id
+
+
+async def get_job(redis: Redis, job_id: str) -> dict[str, Any] | None:
+    """轮询任务状态与结果"""
+    job = await redis.hgetall(job_key(job_id))
+    if not job:
+        return None
+    job["kwargs"] = json.loads(job["kwargs"])
+    if "result" in job:
+        job["result"] = json.loads(job["result"])
+    if "progress" in job:
+        job["progress"] = json.loads(job["progress"])
+    return job
+
+
+def can_view_job(job: dict[str, Any], user) -> bool:
+    """任务发起者与超级用户可见"""
+    return user.is_superuser or job.get("owner_id") == str(user.id)
@@ -0,0 +1,54 @@
+# src/tasks/registry.py
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.tasks.queue import job_key
+
+
+@dataclass
+class JobContext:
+    """任务运行时可用的共享资源（每个 worker 进程各自创建一份）"""
+
+    redis: Redis
+    session_factory: async_sessionmaker[AsyncSession]
+    extras: dict[str, Any] = field(default_factory=dict)
+    job_id: str | None = None  # 当前执行的任务，由 worker 为每个任务单独设置
+
+    async def report_progress(self, **progress: Any) -> None:
+        """记录长任务的进度，可通过 GET /tasks/{job_id} 轮询"""
+        if self.job_id is not None:
+            await self.redis.hset(
+                job_key(self.job_id), "progress", json.dumps(progress, ensure_ascii=False)
+            )
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    name: str
+    func: Callable[..., Awaitable[Any]]
+    max_retries: int
+    backoff: float
+
+
+TASKS: dict[str, TaskSpec] = {}
+
+
+def task(name: str, *, max_retries: int = 3, backoff: float = 2.0):
+    """注册后台任务
+
+    被装饰的函数签名为 ``async def job(ctx: JobContext, **kwargs)``，
+    kwargs 与返回值都必须可 JSON 序列化。
+    """
+
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        TASKS[name] = TaskSpec(
+            name=name, func=func, max_retries=max_retries, backoff=backoff
+        )
+        return func
+
+    return decorator
@@ -0,0 +1,25 @@
+# src/tasks/router.py
+from fastapi import APIRouter, Depends, Path
+from redis.asyncio import Redis
+
+from src.core.exception import NotFoundException
+from src.core.redis_db import get_cache_redis
+from src.tasks.queue import can_view_job, get_job
+from src.tasks.schema import JobResponse
+from src.auth.schemas import UserRead
+from src.auth.user_manager import get_current_user
+
+router = APIRouter(prefix="/tasks", tags=["Tasks"])
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_task(
+    job_id: str = Path(..., description="任务ID"),
+    redis: Redis = Depends(get_cache_redis),
+    current_user: UserRead = Depends(get_current_user),
+):
+    """查询后台任务状态（结果轮询）；他人的任务与不存在的任务一样返回 404"""
+    job = await get_job(redis, job_id)
+    if job is None or not can_view_job(job, current_user):
+        raise NotFoundException(f"Task with id {job_id} not found")
+    return job
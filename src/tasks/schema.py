@@ -0,0 +1,21 @@
+from typing import Any, Literal
+from pydantic import BaseModel
+
+
+class JobResponse(BaseModel):
+    id: str
+    name: str
+    status: Literal["queued", "running", "retrying", "succeeded", "failed"]
+    attempts: int
+    kwargs: dict[str, Any]
+    result: Any = None
+    progress: dict[str, Any] | None = None
+    error: str | None = None
+    created_at: float
+    finished_at: float | None = None
+
+
+class JobAccepted(BaseModel):
+    """已转交后台任务处理的请求，通过 GET /tasks/{job_id} 查询进度"""
+
+    job_id: str
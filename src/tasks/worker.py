@@ -0,0 +1,278 @@
+# src/tasks/worker.py
+"""后台任务 worker（Redis Streams 消费组）
+
+启动：uv run python -m src.tasks.worker --concurrency 8 --mode asyncio
+    --mode asyncio  任务在 worker 事件循环中并发执行，适合 IO 密集型任务
+    --mode process  任务在进程池中执行，适合 CPU 密集型任务
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Any
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from src.core.config import settings
+from src.core.database import SessionFactory
+from src.core.logging import setup_logging
+from src.core.tracing import inject_context, setup_tracing, task_span
+from src.core.redis_db import create_cache_redis
+from src.tasks.queue import (
+    DEAD_LETTER_KEY,
+    DELAYED_KEY,
+    GROUP_NAME,
+    STREAM_KEY,
+    STREAM_MAX_LEN,
+    job_key,
+)
+from src.tasks.registry import TASKS, JobContext, TaskSpec
+
+# 需要注册任务的模块，worker 启动时统一导入
+TASK_MODULES = ("src.tasks.jobs",)
+
+# 把到期的重试任务重新投递到 stream（原子操作，多个 worker 不会重复投递）
+_PROMOTE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, id in ipairs(due) do
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[2], '*', 'id', id)
+end
+return #due
+"""
+
+
+def load_task_modules() -> None:
+    for module in TASK_MODULES:
+        importlib.import_module(module)
+
+
+def create_context() -> JobContext:
+    return JobContext(redis=create_cache_redis(), session_factory=SessionFactory)
+
+
+# ------------------ 进程池模式 ------------------
+# 子进程内常驻一个事件循环与一份资源，避免每个任务重建连接池
+_process_loop: asyncio.AbstractEventLoop | None = None
+_process_context: JobContext | None = None
+
+
+def _run_in_process(
+    name: str, kwargs: dict[str, Any], job_id: str, carrier: dict[str, str]
+) -> Any:
+    global _process_loop, _process_context
+    if _process_loop is None:
+        setup_tracing()
+        load_task_modules()
+        _process_loop = asyncio.new_event_loop()
+        _process_context = create_context()
+    spec = TASKS[name]
+    context = replace(_process_context, job_id=job_id)
+    # 子进程内的数据库 / Redis span 挂在 worker 的任务 span 之下
+    with task_span(name, carrier, **{"job.id": job_id}):
+        return _process_loop.run_until_complete(spec.func(context, **kwargs))
+
+
+class Worker:
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        concurrency: int = settings.task_worker_concurrency,
+        mode: str = settings.task_worker_mode,
+        consumer: str | None = None,
+    ):
+        self.redis = redis
+        self.concurrency = concurrency
+        self.consumer = consumer or f"{socket.gethostname()}:{os.getpid()}"
+        self.context = JobContext(redis=redis, session_factory=SessionFactory)
+        self.pool = (
+            ProcessPoolExecutor(concurrency, mp_context=multiprocessing.get_context("spawn"))
+            if mode == "process"
+            else None
+        )
+        self._promote = redis.register_script(_PROMOTE_SCRIPT)
+        self._running: set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        logger.info("收到停止信号，等待进行中的任务完成...")
+        self._stopping.set()
+
+    async def run(self) -> None:
+        await self._ensure_group()
+        logger.info("任务 worker 已启动: {}，并发 {}", self.consumer, self.concurrency)
+        last_claim = 0.0
+        while not self._stopping.is_set():
+            await self._promote(
+                keys=[DELAYED_KEY, STREAM_KEY], args=[time.time(), STREAM_MAX_LEN]
+            )
+            if time.monotonic() - last_claim > settings.task_claim_idle_ms / 1000:
+                await self._claim_stale()
+                last_claim = time.monotonic()
+
+            free = self.concurrency - len(self._running)
+            if free <= 0:
+                await asyncio.wait(self._running, return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            response = await self.redis.xreadgroup(
+                GROUP_NAME, self.consumer, {STREAM_KEY: ">"}, count=free, block=1000
+            )
+            for _stream, messages in response or []:
+                for message_id, fields in messages:
+                    self._spawn(message_id, fields["id"])
+
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    async def _ensure_group(self) -> None:
+        try:
+            await self.redis.xgroup_create(STREAM_KEY, GROUP_NAME, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _claim_stale(self) -> None:
+        """接管其他 worker 崩溃后遗留的未确认消息"""
+        _next, messages, *_ = await self.redis.xautoclaim(
+            STREAM_KEY,
+            GROUP_NAME,
+            self.consumer,
+            min_idle_time=settings.task_claim_idle_ms,
+            count=self.concurrency,
+        )
+        for message_id, fields in messages:
+            if fields:
+                self._spawn(message_id, fields["id"])
+
+    def _spawn(self, message_id: str, job_id: str) -> None:
+        task = asyncio.create_task(self._process(message_id, job_id))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _process(self, message_id: str, job_id: str) -> None:
+        key = job_key(job_id)
+        job = await self.redis.hgetall(key)
+        if not job:
+            await self.redis.xack(STREAM_KEY, GROUP_NAME, message_id)
+            return
+
+        spec = TASKS.get(job["name"])
+        attempts = await self.redis.hincrby(key, "attempts", 1)
+        await self.redis.hset(key, "status", "running")
+        try:
+            if spec is None:
+                raise LookupError(f"Unknown task: {job['name']}")
+            kwargs = json.loads(job["kwargs"])
+            carrier = json.loads(job["trace"]) if "trace" in job else None
+            with task_span(spec.name, carrier, **{"job.id": job_id, "job.attempt": attempts}):
+                if self.pool is not None:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(
+                        self.pool, _run_in_process, spec.name, kwargs, job_id, inject_context()
+                    )
+                else:
+                    result = await spec.func(replace(self.context, job_id=job_id), **kwargs)
+        except Exception as e:
+            await self._on_failure(message_id, job_id, spec, attempts, e)
+            return
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                key,
+                mapping={
+                    "status": "succeeded",
+                    "result": json.dumps(result, ensure_ascii=False),
+                    "finished_at": time.time(),
+                },
+            )
+            pipe.hdel(key, "error")
+            pipe.expire(key, settings.task_result_ttl)
+            pipe.xack(STREAM_KEY, GROUP_NAME, message_id)
+            await pipe.execute()
+
+    async def _on_failure(
+        self,
+        message_id: str,
+        job_id: str,
+        spec: TaskSpec | None,
+        attempts: int,
+        error: Exception,
+    ) -> None:
+        key = job_key(job_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if spec is not None and attempts <= spec.max_retries:
+                # 指数退避 + 抖动，避免大量任务同时重试
+                delay = spec.backoff**attempts * random.uniform(0.5, 1.5)
+                logger.warning(
+                    "任务 {}({}) 第 {} 次失败，{:.1f}s 后重试: {}",
+                    spec.name,
+                    job_id,
+                    attempts,
+                    delay,
+                    error,
+                )
+                pipe.hset(key, mapping={"status": "retrying", "error": repr(error)})
+                pipe.zadd(DELAYED_KEY, {job_id: time.time() + delay})
+            else:
+                logger.error("任务 {} 最终失败，转入死信队列: {}", job_id, error)
+                pipe.hset(
+                    key,
+                    mapping={
+                        "status": "failed",
+                        "error": repr(error),
+                        "finished_at": time.time(),
+                    },
+                )
+                pipe.xadd(
+                    DEAD_LETTER_KEY,
+                    {"id": job_id, "error": repr(error)},
+                    maxlen=STREAM_MAX_LEN,
+                    approximate=True,
+                )
+            pipe.xack(STREAM_KEY, GROUP_NAME, message_id)
+            await pipe.execute()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="What to Eat 后台任务 worker")
+    parser.add_argument("--concurrency", type=int, default=settings.task_worker_concurrency)
+    parser.add_argument(
+        "--mode", choices=["asyncio", "process"], default=settings.task_worker_mode
+    )
+    parser.add_argument("--consumer", default=None, help="消费者名称，默认 主机名:进程号")
+    args = parser.parse_args()
+
+    setup_logging()
+    setup_tracing()
+    load_task_modules()
+    redis = create_cache_redis()
+    worker = Worker(
+        redis, concurrency=args.concurrency, mode=args.mode, consumer=args.consumer
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        await redis.aclose()
+        await logger.complete()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
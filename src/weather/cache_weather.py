@@ -4,26 +4,41 @@ from loguru import logger
 import httpx
 from redis.asyncio import Redis
 
+from src.core.client_cache import ClientSideCache
 from src.weather.service import fetch_weather
 
 CACHE_TTL = 60  # 缓存 60 秒，可根据 API 更新频率调节
+# 独立前缀，避免客户端缓存跟踪到 weather:demand 等频繁变动的键
+WEATHER_CACHE_PREFIX = "weather:city:"
 
-async def fetch_weather_with_cache(client: httpx.AsyncClient, redis: Redis, city: str):
-    cache_key = f"weather:{city}"
 
-    logger.info(f"尝试从 Redis 获取缓存: {cache_key}")
-    # 1) 尝试从 Redis 读取缓存
-    cached = await redis.get(cache_key)
-    if cached:
-        return json.loads(cached.encode("utf-8"))
-    logger.info("缓存未命中，尝试从 API 获取数据")
-    # 2) 调用原始 fetch_weather
+def weather_cache_key(city: str) -> str:
+    return f"{WEATHER_CACHE_PREFIX}{city.strip()}"
+
+
+async def refresh_weather_cache(client: httpx.AsyncClient, redis: Redis, city: str):
+    """调用 API 并写入缓存（请求路径未命中与后台预取共用）"""
     data = await fetch_weather(client, city)
-    logger.info(f"从 API 获取到数据: {data}")
     if data is None:
-        return None    
-    logger.info(f"数据写入缓存: {cache_key}")
-    # 3) 写入缓存
-    await redis.set(cache_key, json.dumps(data), ex=CACHE_TTL)
+        return None
+    await redis.set(weather_cache_key(city), json.dumps(data), ex=CACHE_TTL)
+    return data
+
+
+async def fetch_weather_with_cache(
+    client: httpx.AsyncClient,
+    redis: Redis,
+    city: str,
+    local_cache: ClientSideCache | None = None,
+):
+    cache_key = weather_cache_key(city)
+
+    # 1) 尝试从 Redis 读取缓存（启用客户端缓存时优先读进程内存）
+    cached = await (local_cache.get(cache_key) if local_cache else redis.get(cache_key))
+    if cached:
+        return json.loads(cached.encode("utf-8"))
+    logger.debug("天气缓存未命中: {}", cache_key)
+    # 2) 调用原始 fetch_weather 并写入缓存
+    data = await refresh_weather_cache(client, redis, city)
     return data
     
@@ -2,7 +2,20 @@ from typing import cast
 from fastapi import Request
 from httpx import AsyncClient
 
+from src.core.client_cache import ClientSideCache
+from src.weather.pubsub import WeatherHub
+
 
 # HTTP 客户端依赖
 async def get_http_client(request: Request) -> AsyncClient:
     return cast(AsyncClient, request.state.http_client)
+
+
+# 天气订阅中心依赖
+async def get_weather_hub(request: Request) -> WeatherHub:
+    return cast(WeatherHub, request.state.weather_hub)
+
+
+# 天气缓存的进程内副本依赖
+async def get_weather_cache(request: Request) -> ClientSideCache:
+    return cast(ClientSideCache, request.state.weather_cache)
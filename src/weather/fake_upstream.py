@@ -0,0 +1,91 @@
+# src/weather/fake_upstream.py
+"""离线测试 / 压测用的假 Open-Meteo 服务（同时提供地理编码与天气预报接口）
+
+启动：uv run uvicorn src.weather.fake_upstream:app --port 8081
+并在 .env 中设置：
+    OPEN_METEO_GEOCODING_URL=http://localhost:8081
+    OPEN_METEO_FORECAST_URL=http://localhost:8081
+环境变量（也可运行时通过 PUT /_faults 修改）：
+    FAKE_UPSTREAM_LATENCY     基础延迟（秒），默认 0.05
+    FAKE_UPSTREAM_JITTER      额外随机延迟上限（秒），默认 0
+    FAKE_UPSTREAM_SLOW_RATE   慢请求比例（长尾），默认 0
+    FAKE_UPSTREAM_SLOW_DELAY  慢请求延迟（秒），默认 3
+    FAKE_UPSTREAM_ERROR_RATE  返回 503 的比例，默认 0
+"""
+import asyncio
+import os
+import random
+import zlib
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+app = FastAPI(title="Fake Open-Meteo")
+
+
+class Faults(BaseModel):
+    latency: float = float(os.getenv("FAKE_UPSTREAM_LATENCY", "0.05"))
+    jitter: float = float(os.getenv("FAKE_UPSTREAM_JITTER", "0"))
+    slow_rate: float = float(os.getenv("FAKE_UPSTREAM_SLOW_RATE", "0"))
+    slow_delay: float = float(os.getenv("FAKE_UPSTREAM_SLOW_DELAY", "3"))
+    error_rate: float = float(os.getenv("FAKE_UPSTREAM_ERROR_RATE", "0"))
+
+
+faults = Faults()
+
+# 调用计数，用于验证重试、对冲与熔断是否生效
+stats = {"geocoding_calls": 0, "forecast_calls": 0, "errors": 0}
+
+
+async def inject_faults() -> None:
+    delay = faults.latency + random.uniform(0, faults.jitter)
+    if random.random() < faults.slow_rate:
+        delay += faults.slow_delay
+    await asyncio.sleep(delay)
+    if random.random() < faults.error_rate:
+        stats["errors"] += 1
+        raise HTTPException(status_code=503, detail="Injected upstream failure")
+
+
+@app.get("/v1/search")
+async def search(name: str, count: int = 1, language: str = "zh"):
+    stats["geocoding_calls"] += 1
+    await inject_faults()
+    # 由城市名确定性地生成坐标
+    seed = zlib.crc32(name.encode("utf-8"))
+    return {
+        "results": [
+            {
+                "name": name,
+                "latitude": round(20 + seed % 2500 / 100, 2),
+                "longitude": round(100 + seed // 2500 % 3000 / 100, 2),
+            }
+        ][:count]
+    }
+
+
+@app.get("/v1/forecast")
+async def forecast(latitude: float, longitude: float, forecast_days: int = 1):
+    stats["forecast_calls"] += 1
+    await inject_faults()
+    base = round(35 - latitude / 2, 1)
+    return {
+        "current_weather": {"temperature": base, "weathercode": int(latitude) % 4},
+        "daily": {
+            "temperature_2m_max": [round(base + 5 + i, 1) for i in range(forecast_days)],
+            "temperature_2m_min": [round(base - 5 + i, 1) for i in range(forecast_days)],
+            "weathercode": [int(latitude + i) % 4 for i in range(forecast_days)],
+        },
+    }
+
+
+@app.put("/_faults")
+async def update_faults(payload: Faults):
+    global faults
+    faults = payload
+    return faults
+
+
+@app.get("/stats")
+async def get_stats():
+    return {**stats, "faults": faults}
@@ -0,0 +1,299 @@
+# src/weather/history.py
+"""天气历史：上游返回的每条天气先进入进程内缓冲，定期批量写入
+
+- 原始记录批量 INSERT 到 weather_logs；同一事务内把这一批按 (城市, 日期) 合并后
+  UPSERT 到 weather_daily（样本数、最低/最高温、温度和、最近一次天气），
+  多个 worker 并发写入时按主键顺序更新，计数在数据库侧累加
+- 原始记录只保留 weather_log_retention_days 天，由持有租约的 worker 定期分批删除（压缩）；
+  日汇总在写入时已经累加，删除原始记录不影响趋势查询
+- 趋势查询只读 weather_daily，按主键 (city, date) 范围扫描
+
+缓冲有上限，数据库长时间不可用时丢弃最旧的记录；同一批连续写入失败
+weather_log_max_retries 次后整批丢弃，避免一批坏数据堵住后面的写入。天气接口本身不受影响。
+"""
+import asyncio
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from loguru import logger
+from redis.asyncio import Redis
+from sqlalchemy import case, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.config import settings
+from src.core.lease import RedisLease
+from src.tasks.purge import delete_in_chunks
+from src.weather.model import WeatherDaily, WeatherLog
+
+# 上游按该时区返回“当天”的预报，日汇总也按它划分日期
+UPSTREAM_TZ = ZoneInfo("Asia/Shanghai")
+MAX_CITY_LENGTH = 100
+
+if settings.db_type == "postgres":
+    _upsert_insert, _least, _greatest = postgresql.insert, func.least, func.greatest
+else:
+    # SQLite 的多参数 min() / max() 是标量函数
+    _upsert_insert, _least, _greatest = sqlite.insert, func.min, func.max
+
+
+@dataclass(slots=True)
+class Observation:
+    city: str
+    date: date
+    temperature_min: float
+    temperature_max: float
+    weather_code: int | None
+    condition: str
+    observed_at: datetime
+
+
+def _rollups(batch: list[Observation]) -> list[dict]:
+    """把一批记录按 (城市, 日期) 合并为 weather_daily 的增量，按主键排序"""
+    rollups: dict[tuple[str, date], dict] = {}
+    for item in batch:
+        row = rollups.get((item.city, item.date))
+        if row is None:
+            rollups[(item.city, item.date)] = {
+                "city": item.city,
+                "date": item.date,
+                "samples": 1,
+                "temperature_min": item.temperature_min,
+                "temperature_max": item.temperature_max,
+                "temperature_min_sum": item.temperature_min,
+                "temperature_max_sum": item.temperature_max,
+                "condition": item.condition,
+                "last_observed_at": item.observed_at,
+            }
+            continue
+        row["samples"] += 1
+        row["temperature_min"] = min(row["temperature_min"], item.temperature_min)
+        row["temperature_max"] = max(row["temperature_max"], item.temperature_max)
+        row["temperature_min_sum"] += item.temperature_min
+        row["temperature_max_sum"] += item.temperature_max
+        if item.observed_at >= row["last_observed_at"]:
+            row["condition"] = item.condition
+            row["last_observed_at"] = item.observed_at
+    # 固定加锁顺序，避免并发 UPSERT 互相等待形成死锁
+    return [rollups[key] for key in sorted(rollups)]
+
+
+async def write_observations(session: AsyncSession, batch: list[Observation]) -> None:
+    """一个事务内写入原始记录并累加日汇总"""
+    await session.execute(insert(WeatherLog), [asdict(item) for item in batch])
+
+    query = _upsert_insert(WeatherDaily)
+    excluded = query.excluded
+    newer = excluded.last_observed_at >= WeatherDaily.last_observed_at
+    query = query.on_conflict_do_update(
+        index_elements=[WeatherDaily.city, WeatherDaily.date],
+        set_={
+            "samples": WeatherDaily.samples + excluded.samples,
+            "temperature_min": _least(WeatherDaily.temperature_min, excluded.temperature_min),
+            "temperature_max": _greatest(WeatherDaily.temperature_max, excluded.temperature_max),
+            "temperature_min_sum": WeatherDaily.temperature_min_sum + excluded.temperature_min_sum,
+            "temperature_max_sum": WeatherDaily.temperature_max_sum + excluded.temperature_max_sum,
+            "condition": case((newer, excluded.condition), else_=WeatherDaily.condition),
+            "last_observed_at": case(
+                (newer, excluded.last_observed_at), else_=WeatherDaily.last_observed_at
+            ),
+        },
+    )
+    await session.execute(query, _rollups(batch))
+    await session.commit()
+
+
+class WeatherLogBuffer:
+    """进程内缓冲：请求路径只做一次 append，后台任务按间隔或批量大小写入数据库
+
+    未调用 start()（例如任务 worker 进程）时不记录。
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int = settings.weather_log_max_buffer,
+        batch_size: int = settings.weather_log_batch_size,
+        interval: float = settings.weather_log_flush_interval,
+        max_retries: int = settings.weather_log_max_retries,
+    ):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_retries = max_retries
+        self._failures = 0  # 队首这一批连续写入失败的次数
+        self._items: deque[Observation] = deque(maxlen=max_size)
+        self._wakeup = asyncio.Event()
+        self._session_factory: async_sessionmaker[AsyncSession] | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def record(
+        self,
+        city: str,
+        day: str | None,
+        temperature_min: float,
+        temperature_max: float,
+        weather_code: int | None,
+        condition: str,
+    ) -> None:
+        if self._session_factory is None or len(city) > MAX_CITY_LENGTH:
+            return
+        observed_at = datetime.now(timezone.utc)
+        if len(self._items) == self._items.maxlen:
+            self.dropped += 1
+        self._items.append(
+            Observation(
+                city=city,
+                date=date.fromisoformat(day) if day else observed_at.astimezone(UPSTREAM_TZ).date(),
+                temperature_min=temperature_min,
+                temperature_max=temperature_max,
+                weather_code=weather_code,
+                condition=condition,
+                observed_at=observed_at,
+            )
+        )
+        if len(self._items) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self._session_factory = session_factory
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _requeue(self, batch: list[Observation]) -> None:
+        """把写入失败的批次放回缓冲头部
+
+        期间新到的记录可能已占满缓冲：这一批是最旧的记录，放不下的部分从这一批的头部丢弃，
+        而不是让 extendleft 从右端挤掉最新的记录。
+        """
+        room = self._items.maxlen - len(self._items)
+        if room < len(batch):
+            self.dropped += len(batch) - room
+            batch = batch[len(batch) - room :] if room else []
+        self._items.extendleft(reversed(batch))
+
+    async def flush(self) -> int:
+        """写入缓冲中的全部记录，返回写入条数
+
+        写入失败的批次放回缓冲头部，下次重试；连续失败 max_retries 次后丢弃。
+        """
+        written = 0
+        while self._items:
+            batch = [self._items.popleft() for _ in range(min(self.batch_size, len(self._items)))]
+            try:
+                async with self._session_factory() as session:
+                    await write_observations(session, batch)
+            except Exception as e:
+                self._failures += 1
+                if self._failures >= self.max_retries:
+                    self._failures = 0
+                    logger.error(
+                        "天气历史写入连续失败 {} 次，丢弃这一批 {} 条: {}",
+                        self.max_retries,
+                        len(batch),
+                        e,
+                    )
+                    continue
+                self._requeue(batch)
+                logger.error("天气历史写入失败，{} 条留待下次: {}", len(self._items), e)
+                break
+            self._failures = 0
+            written += len(batch)
+        if self.dropped:
+            logger.warning("天气历史缓冲已满，丢弃 {} 条", self.dropped)
+            self.dropped = 0
+        return written
+
+    async def aclose(self) -> None:
+        """停止后台写入，并把剩余记录写完"""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        self._session_factory = None
+
+
+# 与 _geocode_cache 一样是进程级单例：fetch_weather 在请求、预取、轮询等路径上都会调用
+weather_log_buffer = WeatherLogBuffer()
+
+
+async def compact_weather_logs(
+    session_factory: async_sessionmaker[AsyncSession],
+    *,
+    retention_days: int = settings.weather_log_retention_days,
+) -> int:
+    """分批删除超过保留期的原始记录（日汇总已包含它们），返回删除条数"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    return await delete_in_chunks(
+        session_factory, WeatherLog.__table__, WeatherLog.observed_at < cutoff
+    )
+
+
+class WeatherLogCompactor:
+    """定期压缩原始天气记录
+
+    所有 worker 都会启动该任务，但只有持有租约的 worker 真正执行。
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        interval: float = settings.weather_log_compact_interval,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.lease = RedisLease(redis, "weather-log-compactor", ttl=interval * 3)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                if await self.lease.acquire():
+                    deleted = await compact_weather_logs(self.session_factory)
+                    if deleted:
+                        logger.info("压缩天气原始记录 {} 条", deleted)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("天气记录压缩失败: {}", e)
+            await asyncio.sleep(self.interval)
+
+
+async def get_daily_history(session: AsyncSession, city: str, days: int) -> list[dict]:
+    """最近 days 天（含今天）的按日汇总，日期升序"""
+    since = datetime.now(UPSTREAM_TZ).date() - timedelta(days=days - 1)
+    query = (
+        select(WeatherDaily)
+        .where(WeatherDaily.city == city, WeatherDaily.date >= since)
+        .order_by(WeatherDaily.date)
+    )
+    return [
+        {
+            "date": row.date,
+            "samples": row.samples,
+            "temperature_min": row.temperature_min,
+            "temperature_max": row.temperature_max,
+            "temperature_min_avg": round(row.temperature_min_sum / row.samples, 1),
+            "temperature_max_avg": round(row.temperature_max_sum / row.samples, 1),
+            "condition": row.condition,
+        }
+        for row in await session.scalars(query)
+    ]
@@ -0,0 +1,41 @@
+import datetime
+
+from sqlalchemy import Date, DateTime, Float, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.core.base_model import Base
+
+
+# 原始记录：每次向上游取到的天气一行，由进程内缓冲批量写入，超过保留期后被压缩删除
+class WeatherLog(Base):
+    __tablename__ = "weather_logs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    city: Mapped[str] = mapped_column(String(100), nullable=False)
+    # 上游所在时区（Asia/Shanghai）的日期
+    date: Mapped[datetime.date] = mapped_column(Date, nullable=False)
+    temperature_min: Mapped[float] = mapped_column(Float, nullable=False)
+    temperature_max: Mapped[float] = mapped_column(Float, nullable=False)
+    weather_code: Mapped[int | None] = mapped_column(Integer)
+    condition: Mapped[str] = mapped_column(String(50), nullable=False)
+    # 压缩按时间范围删除
+    observed_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+
+# 按 城市 + 日期 汇总：写入原始记录的同一事务内累加，查询趋势只读这张表
+class WeatherDaily(Base):
+    __tablename__ = "weather_daily"
+
+    city: Mapped[str] = mapped_column(String(100), primary_key=True)
+    date: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False)
+    temperature_min: Mapped[float] = mapped_column(Float, nullable=False)  # 当日各次预报的最低值
+    temperature_max: Mapped[float] = mapped_column(Float, nullable=False)  # 当日各次预报的最高值
+    temperature_min_sum: Mapped[float] = mapped_column(Float, nullable=False)
+    temperature_max_sum: Mapped[float] = mapped_column(Float, nullable=False)
+    condition: Mapped[str] = mapped_column(String(50), nullable=False)  # 最近一次的天气
+    last_observed_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
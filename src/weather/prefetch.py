@@ -0,0 +1,87 @@
+# src/weather/prefetch.py
+import asyncio
+
+import httpx
+from loguru import logger
+from redis.asyncio import Redis
+
+from src.core.config import settings
+from src.core.lease import RedisLease
+from src.weather.cache_weather import refresh_weather_cache, weather_cache_key
+
+DEMAND_KEY = "weather:demand"
+DEMAND_DECAY = 0.9  # 每轮衰减，让热度反映近期访问
+DEMAND_MAX_CITIES = 1000  # 热度表最多保留的城市数
+
+
+async def record_demand(redis: Redis, city: str) -> None:
+    """请求路径上记录城市热度（一次 ZINCRBY），只在成功取到天气后调用"""
+    await redis.zincrby(DEMAND_KEY, 1, city.strip())
+
+
+class WeatherPrefetcher:
+    """后台预取热门城市天气，在缓存过期前刷新
+
+    所有 worker 都会启动该任务，但只有持有租约的 worker 真正执行刷新。
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        redis: Redis,
+        *,
+        top_n: int = settings.weather_prefetch_top_n,
+        interval: float = settings.weather_prefetch_interval,
+        refresh_before: int = settings.weather_prefetch_refresh_before,
+        concurrency: int = settings.weather_prefetch_concurrency,
+    ):
+        self.client = client
+        self.redis = redis
+        self.top_n = top_n
+        self.interval = interval
+        self.refresh_before = refresh_before
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # 租约时长为轮询间隔的 3 倍，leader 异常退出后其他 worker 可接管
+        self.lease = RedisLease(redis, "weather-prefetcher", ttl=interval * 3)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                if await self.lease.acquire():
+                    await self.prefetch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("天气预取失败: {}", e)
+            await asyncio.sleep(self.interval)
+
+    async def prefetch_once(self) -> int:
+        cities = await self.redis.zrevrange(DEMAND_KEY, 0, self.top_n - 1)
+        if not cities:
+            return 0
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for city in cities:
+                pipe.ttl(weather_cache_key(city))
+            ttls = await pipe.execute()
+
+        # 不存在的键 TTL 为 -2，同样需要刷新
+        stale = [city for city, ttl in zip(cities, ttls) if ttl < self.refresh_before]
+        await asyncio.gather(*(self._refresh(city) for city in stale))
+
+        # 热度衰减并裁剪冷门城市
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zunionstore(DEMAND_KEY, {DEMAND_KEY: DEMAND_DECAY})
+            pipe.zremrangebyrank(DEMAND_KEY, 0, -(DEMAND_MAX_CITIES + 1))
+            await pipe.execute()
+
+        if stale:
+            logger.debug("预取热门城市天气 {} 个", len(stale))
+        return len(stale)
+
+    async def _refresh(self, city: str) -> None:
+        async with self._semaphore:
+            await refresh_weather_cache(self.client, self.redis, city)
+
+    async def aclose(self) -> None:
+        await self.lease.release()
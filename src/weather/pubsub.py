@@ -0,0 +1,150 @@
+# src/weather/pubsub.py
+import asyncio
+import json
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import httpx
+from loguru import logger
+from redis.asyncio import Redis
+
+from src.core.config import settings
+from src.core.lease import RedisLease
+from src.weather.cache_weather import refresh_weather_cache
+
+WATCHED_KEY = "weather:watched"  # zset: 城市 → 订阅心跳过期时间
+LAST_PUBLISHED_KEY = "weather:last"  # hash: 城市 → 最近一次推送的数据
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+def weather_channel(city: str) -> str:
+    return f"weather:updates:{city.strip()}"
+
+
+class WeatherHub:
+    """每个 worker 一个：每个城市只持有一个 Redis 订阅，再扇出给本地所有客户端"""
+
+    def __init__(self, redis: Redis, *, watch_ttl: int = settings.weather_watch_ttl):
+        self.redis = redis
+        self.watch_ttl = watch_ttl
+        self.pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._read_loop()),
+            asyncio.create_task(self._heartbeat_loop()),
+        ]
+
+    async def aclose(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.pubsub.aclose()
+
+    @asynccontextmanager
+    async def subscribe(self, city: str) -> AsyncIterator[asyncio.Queue]:
+        city = city.strip()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        subscribers = self._subscribers[city]
+        if not subscribers:
+            await self.pubsub.subscribe(weather_channel(city))
+            await self._watch([city])
+        subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[city]
+                await self.pubsub.unsubscribe(weather_channel(city))
+
+    async def _watch(self, cities: list[str]) -> None:
+        """登记本 worker 正在关注的城市，供全局 poller 读取"""
+        expires_at = time.time() + self.watch_ttl
+        await self.redis.zadd(WATCHED_KEY, {city: expires_at for city in cities})
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.watch_ttl / 3)
+            if self._subscribers:
+                await self._watch(list(self._subscribers))
+
+    async def _read_loop(self) -> None:
+        while True:
+            if not self.pubsub.subscribed:
+                await asyncio.sleep(0.1)
+                continue
+            try:
+                message = await self.pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("天气订阅读取失败: {}", e)
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+            city = message["channel"].removeprefix("weather:updates:")
+            for queue in list(self._subscribers.get(city, ())):
+                if queue.full():
+                    # 慢客户端只保留最新数据
+                    queue.get_nowait()
+                queue.put_nowait(message["data"])
+
+
+class WeatherPoller:
+    """全局唯一（Redis 租约）的天气轮询者：每个被订阅城市每轮只请求一次上游"""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        redis: Redis,
+        *,
+        interval: float = settings.weather_poll_interval,
+        concurrency: int = settings.weather_prefetch_concurrency,
+    ):
+        self.client = client
+        self.redis = redis
+        self.interval = interval
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.lease = RedisLease(redis, "weather-poller", ttl=interval * 3)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                if await self.lease.acquire():
+                    await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("天气轮询失败: {}", e)
+            await asyncio.sleep(self.interval)
+
+    async def poll_once(self) -> int:
+        now = time.time()
+        await self.redis.zremrangebyscore(WATCHED_KEY, "-inf", now)
+        cities = await self.redis.zrangebyscore(WATCHED_KEY, now, "+inf")
+        results = await asyncio.gather(*(self._poll(city) for city in cities))
+        return sum(results)
+
+    async def _poll(self, city: str) -> bool:
+        async with self._semaphore:
+            data = await refresh_weather_cache(self.client, self.redis, city)
+        if data is None:
+            return False
+        payload = json.dumps(data, ensure_ascii=False)
+        # 只有数据变化时才推送
+        if await self.redis.hget(LAST_PUBLISHED_KEY, city) == payload:
+            return False
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(LAST_PUBLISHED_KEY, city, payload)
+            pipe.publish(weather_channel(city), payload)
+            await pipe.execute()
+        return True
+
+    async def aclose(self) -> None:
+        await self.lease.release()
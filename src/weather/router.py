@@ -1,16 +1,37 @@
-from fastapi import APIRouter, Depends, Query
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 import httpx
 from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.config import settings
+from src.core.database import get_db
 from src.core.redis_db import get_cache_redis
-from src.weather.dependencies import get_http_client
+from src.core.rate_limit import RateLimit
+from src.core.client_cache import ClientSideCache
+from src.weather.dependencies import get_http_client, get_weather_cache, get_weather_hub
+from src.weather.pubsub import WeatherHub
 from src.weather.service import fetch_weather
-from src.weather.schemas import WeatherResponse
+from src.weather.schemas import WeatherHistoryResponse, WeatherResponse
 from src.weather.cache_weather import fetch_weather_with_cache
+from src.weather.prefetch import record_demand
+from src.weather.history import get_daily_history
 from src.core.exception import NotFoundException
 
 
-router = APIRouter(prefix="/weather", tags=["Weather"])
+# 天气接口会调用外部 API，限流更严格
+router = APIRouter(
+    prefix="/weather",
+    tags=["Weather"],
+    dependencies=[
+        Depends(RateLimit("weather", user_rate=2, user_burst=5, ip_rate=5, ip_burst=10))
+    ],
+)
+
+SSE_PING_INTERVAL = 15  # 心跳间隔（秒），防止代理断开空闲连接
 
 
 @router.get("", response_model=WeatherResponse)
@@ -27,8 +48,54 @@ async def weather_cached(
     city: str = Query(..., description="城市名称，例如: 北京"),
     client: httpx.AsyncClient = Depends(get_http_client),
     redis: Redis = Depends(get_cache_redis),
+    local_cache: ClientSideCache = Depends(get_weather_cache),
 ):
-    data = await fetch_weather_with_cache(client, redis, city)
+    data = await fetch_weather_with_cache(client, redis, city, local_cache)
     if data is None:
         raise NotFoundException("无法获取该城市天气数据")
+    # 只统计能取到天气的城市，无效城市名不会进入预取列表
+    await record_demand(redis, city)
     return data
+
+
+@router.get("/history", response_model=WeatherHistoryResponse)
+async def weather_history(
+    city: str = Query(..., description="城市名称，例如: 北京"),
+    days: int = Query(30, ge=1, le=settings.weather_history_max_days, description="最近多少天"),
+    session: AsyncSession = Depends(get_db),
+):
+    """城市天气趋势：只读取按日汇总，不扫描原始记录；没有记录的日期不返回"""
+    city = city.strip()
+    return WeatherHistoryResponse(city=city, days=await get_daily_history(session, city, days))
+
+
+@router.get("/subscribe", summary="订阅城市天气更新（SSE）")
+async def weather_subscribe(
+    request: Request,
+    city: str = Query(..., description="城市名称，例如: 北京"),
+    client: httpx.AsyncClient = Depends(get_http_client),
+    redis: Redis = Depends(get_cache_redis),
+    hub: WeatherHub = Depends(get_weather_hub),
+    local_cache: ClientSideCache = Depends(get_weather_cache),
+) -> StreamingResponse:
+    initial = await fetch_weather_with_cache(client, redis, city, local_cache)
+    if initial is None:
+        raise NotFoundException("无法获取该城市天气数据")
+
+    async def events():
+        async with hub.subscribe(city) as queue:
+            yield f"data: {json.dumps(initial, ensure_ascii=False)}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(queue.get(), SSE_PING_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {payload}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
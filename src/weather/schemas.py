@@ -1,7 +1,24 @@
+from datetime import date
+
 from pydantic import BaseModel
 
 class WeatherResponse(BaseModel):
     城市: str
     最低气温: str
     最高气温: str
-    天气: str
\ No newline at end of file
+    天气: str
+
+
+class WeatherDay(BaseModel):
+    date: date
+    samples: int  # 当天记录到的上游结果数
+    temperature_min: float
+    temperature_max: float
+    temperature_min_avg: float
+    temperature_max_avg: float
+    condition: str
+
+
+class WeatherHistoryResponse(BaseModel):
+    city: str
+    days: list[WeatherDay]
@@ -1,27 +1,62 @@
+import time
+from collections import OrderedDict
+
 import httpx
 
 from loguru import logger
 
+from src.core.config import settings
+from src.weather.history import weather_log_buffer
+
+# 城市坐标几乎不会变化：进程内 LRU 缓存，命中时每次天气查询只需一次上游请求
+_geocode_cache: OrderedDict[str, tuple[float, float]] = OrderedDict()
+# 查无此城市的名称 → 查询时间；拼写错误或恶意的城市名不会每次都打到上游
+_geocode_misses: OrderedDict[str, float] = OrderedDict()
+
+
+async def geocode(client: httpx.AsyncClient, city: str) -> tuple[float, float] | None:
+    """城市名 → (纬度, 经度)，未找到返回 None"""
+    if city in _geocode_cache:
+        _geocode_cache.move_to_end(city)
+        return _geocode_cache[city]
+    missed_at = _geocode_misses.get(city)
+    if missed_at is not None:
+        if time.monotonic() - missed_at < settings.geocode_negative_ttl:
+            return None
+        del _geocode_misses[city]
+
+    geo_url = f"{settings.open_meteo_geocoding_url}/v1/search?name={city}&language=zh&count=1"
+    geo_response = await client.get(geo_url)
+    geo_response.raise_for_status()
+    geo_data = geo_response.json()
+
+    if "results" not in geo_data or len(geo_data["results"]) == 0:
+        _geocode_misses[city] = time.monotonic()
+        if len(_geocode_misses) > settings.geocode_cache_size:
+            _geocode_misses.popitem(last=False)
+        return None
+
+    coordinates = (geo_data["results"][0]["latitude"], geo_data["results"][0]["longitude"])
+    _geocode_cache[city] = coordinates
+    if len(_geocode_cache) > settings.geocode_cache_size:
+        _geocode_cache.popitem(last=False)
+    return coordinates
+
 
 async def fetch_weather(client: httpx.AsyncClient, city: str):
     city = city.strip()
     try:
         # 1) 获取经纬度
-        geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={city}&language=zh&count=1"
-        geo_response = await client.get(geo_url)
-        geo_response.raise_for_status()
-        geo_data = geo_response.json()
-
-        if "results" not in geo_data or len(geo_data["results"]) == 0:
-            logger.error(f"未找到城市: {city}")
+        coordinates = await geocode(client, city)
+        if coordinates is None:
+            logger.warning("未找到城市: {}", city)
             return None
 
-        lat = geo_data["results"][0]["latitude"]
-        lon = geo_data["results"][0]["longitude"]
+        lat, lon = coordinates
 
         # 2) 获取当天天气（每日最高/最低温 + 天气代码）
         weather_url = (
-            f"https://api.open-meteo.com/v1/forecast"
+            f"{settings.open_meteo_forecast_url}/v1/forecast"
             f"?latitude={lat}&longitude={lon}"
             f"&daily=temperature_2m_max,temperature_2m_min,weathercode"
             f"&current_weather=true"
@@ -65,6 +100,11 @@ async def fetch_weather(client: httpx.AsyncClient, city: str):
 
         min_t = daily.get("temperature_2m_min", [None])[0]
         max_t = daily.get("temperature_2m_max", [None])[0]
+        if min_t is not None and max_t is not None:
+            # 进入进程内缓冲，由后台批量写入天气历史
+            weather_log_buffer.record(
+                city, daily.get("time", [None])[0], min_t, max_t, code_today, description
+            )
 
         return {
             "城市": city,
@@ -74,29 +114,24 @@ async def fetch_weather(client: httpx.AsyncClient, city: str):
         }
 
     except httpx.HTTPError as e:
-        logger.error(f"HTTP 错误: {e}")
+        logger.error("获取 {} 的天气时 HTTP 错误: {}", city, e)
         return None
-    except Exception as e:
-        logger.error(f"未知错误: {e}")
+    except Exception:
+        logger.exception("获取 {} 的天气时出错", city)
         return None
 
 
 # 获取未来天气
 async def fetch_forecast(client: httpx.AsyncClient, city: str, days: int = 5):
     try:
-        geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={city}&language=zh&count=1"
-        geo = await client.get(geo_url)
-        geo.raise_for_status()
-        geo_data = geo.json()
-
-        if "results" not in geo_data or not geo_data["results"]:
+        coordinates = await geocode(client, city.strip())
+        if coordinates is None:
             return None
 
-        lat = geo_data["results"][0]["latitude"]
-        lon = geo_data["results"][0]["longitude"]
+        lat, lon = coordinates
 
         forecast_url = (
-            f"https://api.open-meteo.com/v1/forecast?"
+            f"{settings.open_meteo_forecast_url}/v1/forecast?"
             f"latitude={lat}&longitude={lon}"
             f"&daily=temperature_2m_max,temperature_2m_min,weathercode"
             f"&forecast_days={days}&timezone=Asia/Shanghai&language=zh"
@@ -109,8 +144,8 @@ async def fetch_forecast(client: httpx.AsyncClient, city: str, days: int = 5):
         # TODO: 处理天气数据
 
     except httpx.HTTPError as e:
-        logger.error(f"HTTP 错误: {e}")
+        logger.error("获取 {} 的预报时 HTTP 错误: {}", city, e)
         return None
-    except Exception as e:
-        logger.error(f"未知错误: {e}")
+    except Exception:
+        logger.exception("获取 {} 的预报时出错", city)
         return None
@@ -0,0 +1,78 @@
+# tests/conftest.py
+"""测试默认使用临时 SQLite 文件，必须在导入 src 之前设置环境变量
+
+    uv run pytest
+    DB_TYPE=postgres uv run pytest    # 使用配置的 PostgreSQL（请指向空的临时库）
+"""
+import os
+import tempfile
+
+if os.getenv("DB_TYPE", "sqlite") == "sqlite":
+    os.environ["SQLITE_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "test.sqlite3")
+
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, insert
+
+from src.auth.model import User
+from src.core.base_model import Base
+from src.core.database import SessionFactory, engine
+import src.auth.model, src.dishes.model, src.collections.model, src.tags.model  # noqa: F401
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def tables(anyio_backend):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture
+def make_user(tables):
+    """在主库插入一个已激活的用户并返回"""
+
+    async def make() -> User:
+        user_id = uuid.uuid4()
+        async with SessionFactory() as session:
+            await session.execute(
+                insert(User).values(
+                    id=user_id,
+                    email=f"{user_id.hex}@example.com",
+                    hashed_password="x",
+                    is_active=True,
+                    is_superuser=False,
+                    is_verified=True,
+                )
+            )
+            await session.commit()
+            return await session.get(User, user_id)
+
+    return make
+
+
+@contextmanager
+def _record_statements(target):
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(target.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(target.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def count_statements():
+    """with count_statements() as statements: 记录代码块内执行的 SQL 语句（可指定引擎）"""
+    return lambda target=engine: _record_statements(target)
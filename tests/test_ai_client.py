@@ -0,0 +1,103 @@
+# tests/test_ai_client.py
+"""OllamaClient 对接假 Ollama：请求合并、缓存命中、调用方取消与熔断"""
+import asyncio
+
+import fakeredis
+import httpx
+import pytest
+
+from src.ai import fake_ollama
+from src.ai.client import OllamaClient, completion_cache_key, prompt_fingerprint
+from src.core.http_client import CircuitBreaker, CircuitOpenError, ResilientTransport
+
+pytestmark = pytest.mark.anyio
+
+PROMPT = "今天的候选菜品：宫保鸡丁、麻婆豆腐、回锅肉"
+REPLY = "".join(fake_ollama.fake_reply(PROMPT))
+
+
+@pytest.fixture(autouse=True)
+def fake_upstream(monkeypatch):
+    monkeypatch.setattr(fake_ollama, "FIRST_TOKEN_DELAY", 0.1)
+    monkeypatch.setattr(fake_ollama, "TOKEN_DELAY", 0.0)
+    monkeypatch.setattr(fake_ollama, "faults", fake_ollama.Faults(error_rate=0.0))
+    monkeypatch.setattr(fake_ollama, "stats", {"generate_calls": 0, "errors": 0})
+
+
+@pytest.fixture
+async def redis():
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def transport():
+    return ResilientTransport(httpx.ASGITransport(fake_ollama.app), retries=0)
+
+
+@pytest.fixture
+async def llm(redis, transport):
+    http = httpx.AsyncClient(transport=transport)
+    client = OllamaClient(http, redis, base_url="http://ollama", model="qwen3:8b")
+    yield client
+    await client.aclose()
+    await http.aclose()
+
+
+def _fingerprint(prompt: str = PROMPT) -> str:
+    return prompt_fingerprint("qwen3:8b", prompt)
+
+
+async def test_concurrent_identical_prompts_share_one_call(llm):
+    other = PROMPT.replace("回锅肉", "鱼香肉丝")
+    results = await asyncio.gather(
+        *(llm.complete(PROMPT, _fingerprint()) for _ in range(3)),
+        llm.complete(other, _fingerprint(other)),
+    )
+
+    assert results[:3] == [REPLY] * 3
+    assert "鱼香肉丝" in results[3]
+    # 相同指纹合并为一次调用，不同指纹各自调用
+    assert fake_ollama.stats["generate_calls"] == 2
+
+
+async def test_cache_hit_skips_upstream(llm, redis):
+    assert await llm.complete(PROMPT, _fingerprint()) == REPLY
+    assert await redis.get(completion_cache_key(_fingerprint())) == REPLY
+
+    chunks = [token async for token in llm.stream(PROMPT, _fingerprint())]
+
+    assert chunks == [REPLY]
+    assert fake_ollama.stats["generate_calls"] == 1
+
+
+async def test_cancelled_caller_does_not_abort_shared_generation(llm, redis):
+    cancelled = asyncio.create_task(llm.complete(PROMPT, _fingerprint()))
+    survivor = asyncio.create_task(llm.complete(PROMPT, _fingerprint()))
+    await asyncio.sleep(0.02)
+
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    assert await survivor == REPLY
+    assert fake_ollama.stats["generate_calls"] == 1
+    assert await redis.get(completion_cache_key(_fingerprint())) == REPLY
+
+
+async def test_breaker_opens_after_upstream_failures(llm, transport, monkeypatch):
+    breaker = transport.breakers["ollama"] = CircuitBreaker(
+        window=4, min_requests=2, failure_ratio=0.5, cooldown=60
+    )
+    monkeypatch.setattr(fake_ollama, "faults", fake_ollama.Faults(error_rate=1.0))
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            await llm.complete(PROMPT, _fingerprint())
+    assert breaker.state == "open"
+
+    # 熔断打开后快速失败，不再打到上游
+    with pytest.raises(CircuitOpenError):
+        await llm.complete(PROMPT, _fingerprint())
+    assert fake_ollama.stats["generate_calls"] == 2
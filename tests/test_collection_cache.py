@@ -0,0 +1,134 @@
+# tests/test_collection_cache.py
+"""收藏快照：命中时一次 Redis GET、不查询数据库；回源期间有写入时旧数据不会落入快照"""
+import uuid
+
+import fakeredis
+import pytest
+
+from src.collections.cache_collection import (
+    begin_collection_fill,
+    collection_cache_key,
+    fill_collection_cache,
+)
+from src.collections.repository import CollectionRepository
+from src.collections.schema import CollectionResponse, CollectionUpdate
+from src.collections.service import CollectionService
+from src.core.database import SessionFactory
+from src.core.exception import NotFoundException
+from src.dishes.repository import DishRepository
+from src.dishes.schema import DishUpdate
+from src.dishes.service import DishService
+from src.dishes.similarity import SimilarityIndex
+from src.tags.bitmap import TagBitmapIndex
+
+pytestmark = [pytest.mark.anyio, pytest.mark.usefixtures("tables")]
+
+
+@pytest.fixture
+async def redis():
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def collection(make_user):
+    """(用户, 收藏 id, 收藏中的菜品 id, 不在收藏中的菜品 id)"""
+    user = await make_user()
+    async with SessionFactory() as session:
+        dishes = DishRepository(session)
+        member = await dishes.create({"name": f"快照菜品-{uuid.uuid4().hex[:8]}"})
+        other = await dishes.create({"name": f"快照菜品-{uuid.uuid4().hex[:8]}"})
+        repository = CollectionRepository(session)
+        item = await repository.create({"name": f"快照-{user.id.hex}"}, user)
+        await repository.add_dish_to_collection(item.id, member.id, user)
+    return user, item.id, member.id, other.id
+
+
+async def _body(redis, user, item_id) -> tuple[bytes, str]:
+    async with SessionFactory() as session:
+        return await CollectionService(CollectionRepository(session), redis).get_collection_body(
+            item_id, user
+        )
+
+
+@pytest.fixture
+def update_dish(redis, tmp_path):
+    similarity = SimilarityIndex(tmp_path / "similarity" / "dishes")
+
+    async def update(dish_id: int, name: str) -> None:
+        async with SessionFactory() as session:
+            service = DishService(DishRepository(session), redis, similarity, TagBitmapIndex())
+            await service.update_dish(dish_id, DishUpdate(name=name))
+
+    return update
+
+
+async def _stale_read(user, item_id) -> CollectionResponse:
+    async with SessionFactory() as session:
+        return CollectionResponse.model_validate(
+            await CollectionRepository(session).get_by_id(item_id, user)
+        )
+
+
+async def test_snapshot_hit_runs_no_sql(redis, collection, count_statements):
+    user, item_id, _, _ = collection
+    body, etag = await _body(redis, user, item_id)
+    with count_statements() as statements:
+        assert await _body(redis, user, item_id) == (body, etag)
+    assert statements == []
+
+
+async def test_snapshot_is_private(redis, collection, make_user):
+    user, item_id, _, _ = collection
+    await _body(redis, user, item_id)
+    with pytest.raises(NotFoundException):
+        await _body(redis, await make_user(), item_id)
+
+
+async def test_etag_follows_only_contained_dishes(redis, collection, update_dish):
+    user, item_id, member_id, other_id = collection
+    _, etag = await _body(redis, user, item_id)
+
+    await update_dish(other_id, f"无关-{uuid.uuid4().hex[:8]}")
+    assert (await _body(redis, user, item_id))[1] == etag
+
+    await update_dish(member_id, f"改名-{uuid.uuid4().hex[:8]}")
+    body, patched = await _body(redis, user, item_id)
+    assert patched != etag
+    # 快照被增量改写后，ETag 与从数据库重建的一致
+    await redis.delete(collection_cache_key(item_id))
+    assert await _body(redis, user, item_id) == (body, patched)
+
+
+async def test_fill_dropped_after_collection_write(redis, collection):
+    user, item_id, _, _ = collection
+    fill = await begin_collection_fill(redis, item_id)
+    stale = await _stale_read(user, item_id)
+    async with SessionFactory() as session:
+        await CollectionService(CollectionRepository(session), redis).update_collection(
+            item_id, CollectionUpdate(note="新备注"), user
+        )
+    assert not await fill_collection_cache(redis, stale, user.id, fill)
+    body, _ = await _body(redis, user, item_id)
+    assert "新备注" in body.decode()
+
+
+async def test_fill_dropped_after_dish_write(redis, collection, update_dish):
+    user, item_id, member_id, _ = collection
+    fill = await begin_collection_fill(redis, item_id)
+    stale = await _stale_read(user, item_id)
+    name = f"新名字-{uuid.uuid4().hex[:8]}"
+    await update_dish(member_id, name)
+    assert not await fill_collection_cache(redis, stale, user.id, fill)
+    assert await redis.get(collection_cache_key(item_id)) is None
+    body, _ = await _body(redis, user, item_id)
+    assert name in body.decode()
+
+
+async def test_fill_without_concurrent_writes(redis, collection):
+    user, item_id, _, _ = collection
+    fill = await begin_collection_fill(redis, item_id)
+    assert await fill_collection_cache(redis, await _stale_read(user, item_id), user.id, fill)
+    # 租约只能用一次
+    assert not await fill_collection_cache(redis, await _stale_read(user, item_id), user.id, fill)
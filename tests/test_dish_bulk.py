@@ -0,0 +1,64 @@
+# tests/test_dish_bulk.py
+"""批量操作：搜索条件命中超过上限时返回 400，而不是静默截断"""
+import uuid
+
+import fakeredis
+import pytest
+
+from src.core.config import settings
+from src.core.database import SessionFactory
+from src.core.exception import BadRequestException
+from src.dishes.repository import DishRepository
+from src.dishes.schema import DishBulkUpdate
+from src.dishes.service import DishService
+from src.dishes.similarity import SimilarityIndex
+from src.tags.bitmap import TagBitmapIndex
+
+pytestmark = [pytest.mark.anyio, pytest.mark.usefixtures("tables")]
+
+
+@pytest.fixture
+async def redis():
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def keyword():
+    """三道名称带同一随机关键词的菜品"""
+    keyword = f"批量-{uuid.uuid4().hex[:8]}"
+    async with SessionFactory() as session:
+        dishes = DishRepository(session)
+        for i in range(3):
+            await dishes.create({"name": f"{keyword}-{i}"})
+    return keyword
+
+
+async def _bulk_update(redis, tmp_path, search: str):
+    async with SessionFactory() as session:
+        service = DishService(
+            DishRepository(session),
+            redis,
+            SimilarityIndex(tmp_path / "similarity" / "dishes"),
+            TagBitmapIndex(),
+        )
+        return await service.bulk_update_dishes(
+            DishBulkUpdate(search=search, description="批量更新")
+        )
+
+
+async def test_search_within_limit_updates_all(redis, tmp_path, keyword, monkeypatch):
+    monkeypatch.setattr(settings, "dish_bulk_max_items", 3)
+    response = await _bulk_update(redis, tmp_path, keyword)
+    assert (response.matched, response.succeeded) == (3, 3)
+
+
+async def test_search_over_limit_is_rejected(redis, tmp_path, keyword, monkeypatch):
+    monkeypatch.setattr(settings, "dish_bulk_max_items", 2)
+    with pytest.raises(BadRequestException):
+        await _bulk_update(redis, tmp_path, keyword)
+    async with SessionFactory() as session:
+        ids = await DishRepository(session).get_ids(search=keyword)
+        dishes = await DishRepository(session).get_by_ids(ids)
+    assert all(dish.description is None for dish in dishes)
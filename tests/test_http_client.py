@@ -0,0 +1,134 @@
+# tests/test_http_client.py
+"""ResilientTransport 对接假 Open-Meteo：注入错误与延迟，验证重试次数、熔断状态转换与对冲落败响应的关闭"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.core.http_client import CircuitBreaker, CircuitOpenError, ResilientTransport
+from src.weather import fake_upstream
+from src.weather.fake_upstream import Faults
+
+pytestmark = pytest.mark.anyio
+
+FORECAST = "/v1/forecast?latitude=30&longitude=120"
+HEALTHY = Faults(latency=0.0, error_rate=0.0)
+FAILING = Faults(latency=0.0, error_rate=1.0)
+
+
+class Upstream(httpx.AsyncBaseTransport):
+    """包装假上游：按调用顺序切换注入的故障，记录返回的响应与被取消的调用"""
+
+    def __init__(self, *script: Faults):
+        self.inner = httpx.ASGITransport(fake_upstream.app)
+        self.script = list(script)
+        self.calls = 0
+        self.cancelled = 0
+        self.responses: list[httpx.Response] = []
+        self.release: asyncio.Event | None = None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.script:
+            fake_upstream.faults = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        try:
+            response = await self.inner.handle_async_request(request)
+            if self.release is not None:
+                await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        self.responses.append(response)
+        return response
+
+
+@pytest.fixture(autouse=True)
+def faults(monkeypatch):
+    monkeypatch.setattr(fake_upstream, "faults", HEALTHY)
+    monkeypatch.setattr(
+        fake_upstream, "stats", {"geocoding_calls": 0, "forecast_calls": 0, "errors": 0}
+    )
+
+
+async def _get(transport: ResilientTransport, url: str = FORECAST) -> httpx.Response:
+    async with httpx.AsyncClient(transport=transport, base_url="http://upstream") as client:
+        response = await client.get(url)
+        await response.aread()
+        return response
+
+
+async def test_idempotent_request_retries_until_success():
+    upstream = Upstream(FAILING, FAILING, HEALTHY)
+    transport = ResilientTransport(upstream, retries=2, backoff=0.0)
+
+    response = await _get(transport)
+
+    assert response.status_code == 200
+    assert fake_upstream.stats["forecast_calls"] == 3
+    # 重试前被丢弃的 503 响应都已关闭
+    assert all(r.is_closed for r in upstream.responses[:2])
+
+
+async def test_retries_are_bounded_and_return_last_response():
+    transport = ResilientTransport(Upstream(FAILING), retries=2, backoff=0.0)
+
+    response = await _get(transport)
+
+    assert response.status_code == 503
+    assert fake_upstream.stats["forecast_calls"] == 3
+
+
+async def test_breaker_opens_half_opens_and_closes():
+    upstream = Upstream(FAILING)
+    transport = ResilientTransport(upstream, retries=0, backoff=0.0)
+    breaker = transport.breakers["upstream"] = CircuitBreaker(
+        window=4, min_requests=2, failure_ratio=0.5, cooldown=0.1
+    )
+
+    for _ in range(2):
+        assert (await _get(transport)).status_code == 503
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        await _get(transport)
+    assert upstream.calls == 2
+
+    # 冷却后半开：探测失败重新打开
+    await asyncio.sleep(0.1)
+    assert breaker.state == "half-open"
+    assert (await _get(transport)).status_code == 503
+    assert breaker.state == "open"
+
+    # 再次冷却，探测成功则关闭并清空统计
+    await asyncio.sleep(0.1)
+    upstream.script = [HEALTHY]
+    assert (await _get(transport)).status_code == 200
+    assert breaker.state == "closed"
+    assert (await _get(transport)).status_code == 200
+    assert upstream.calls == 5
+
+
+async def test_hedge_cancels_slow_primary():
+    slow = Faults(latency=0.0, slow_rate=1.0, slow_delay=1.0)
+    upstream = Upstream(slow, HEALTHY)
+    transport = ResilientTransport(upstream, retries=0, hedge_delay=0.05)
+
+    response = await asyncio.wait_for(_get(transport), 0.5)
+
+    assert response.status_code == 200
+    assert upstream.calls == 2
+    assert upstream.cancelled == 1
+
+
+async def test_hedge_closes_losing_response():
+    upstream = Upstream(HEALTHY)
+    upstream.release = asyncio.Event()
+    transport = ResilientTransport(upstream, retries=0, hedge_delay=0.05)
+    # 两个副本都拿到响应后同时放行，只有一个能胜出
+    asyncio.get_running_loop().call_later(0.1, upstream.release.set)
+
+    response = await _get(transport)
+
+    assert response.status_code == 200
+    assert upstream.calls == 2 and len(upstream.responses) == 2
+    losers = [r for r in upstream.responses if r is not response]
+    assert len(losers) == 1 and losers[0].is_closed
@@ -0,0 +1,84 @@
+# tests/test_load_shedding.py
+"""降载：连接池等待时间的采样、衰减，以及监控任务由 start/aclose 启停"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.core import rate_limit
+from src.core.database import TimedQueuePool
+from src.core.rate_limit import LoadMonitor, LoadSheddingMiddleware
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def small_engine(tmp_path, monkeypatch):
+    """只有一个连接的引擎，第二个借出者必须排队"""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'shed.sqlite3'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    monkeypatch.setattr(rate_limit, "engine", engine)
+    yield engine
+    await engine.dispose()
+
+
+async def _hold_connection(engine, seconds: float, acquired: asyncio.Event) -> None:
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        acquired.set()
+        await asyncio.sleep(seconds)
+
+
+async def test_pool_records_acquire_wait(small_engine):
+    acquired = asyncio.Event()
+    holder = asyncio.create_task(_hold_connection(small_engine, 0.2, acquired))
+    await acquired.wait()
+    small_engine.pool.take_max_wait()
+
+    async with small_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    await holder
+
+    assert small_engine.pool.take_max_wait() >= 0.15
+    assert small_engine.pool.take_max_wait() == 0.0
+
+
+async def test_monitor_sheds_on_pool_wait_and_recovers(small_engine):
+    monitor = LoadMonitor(max_loop_lag=10.0, max_pool_wait=0.01, check_interval=0.01)
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    transport = ASGITransport(LoadSheddingMiddleware(app, monitor=monitor))
+    monitor.start()
+    try:
+        acquired = asyncio.Event()
+        holder = asyncio.create_task(_hold_connection(small_engine, 0.3, acquired))
+        await acquired.wait()
+        async with small_engine.connect():
+            pass
+        await holder
+        await asyncio.sleep(0.03)
+        assert monitor.overloaded() is not None
+
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/ping")
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "1"
+
+            # 没有新的排队后平滑值衰减，请求重新放行
+            await asyncio.sleep(0.5)
+            assert monitor.overloaded() is None
+            assert (await client.get("/ping")).status_code == 200
+    finally:
+        await monitor.aclose()
+    assert monitor._task is None
@@ -0,0 +1,20 @@
+# tests/test_query_plans.py
+"""每个仓库查询在种子数据上都不能全表扫描大表，写路径不能超过语句条数上限"""
+import pytest
+
+from query_plan_audit import CASES, audit, seed
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(scope="module")
+async def seeded(tables):
+    return await seed()
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+async def test_query_plan(case, seeded):
+    statements, scans = await audit(case, seeded)
+    assert scans <= case.allow_scan.keys(), [statement for statement, _ in statements]
+    if case.max_statements is not None:
+        assert len(statements) <= case.max_statements, [statement for statement, _ in statements]
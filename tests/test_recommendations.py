@@ -0,0 +1,96 @@
+# tests/test_recommendations.py
+"""推荐：缓存 key 随索引版本切换，收藏中缺摘要的菜品不会让结果少于 limit"""
+import json
+import uuid
+
+import fakeredis
+import pytest
+
+from src.collections.repository import CollectionRepository
+from src.core.database import SessionFactory
+from src.dishes.repository import DishRepository
+from src.recommendations.index import INDEX_VERSION_KEY, index_dish, index_dishes
+from src.recommendations.service import (
+    RecommendationService,
+    invalidate_user_recommendations,
+    recommendation_cache_key,
+)
+from src.weather.cache_weather import weather_cache_key
+
+pytestmark = [pytest.mark.anyio, pytest.mark.usefixtures("tables")]
+
+CITY = "推荐测试城"
+
+
+@pytest.fixture
+async def redis():
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    # 晴、温和：只有“春”字菜品进候选集（BAND_SCORE）
+    await client.set(
+        weather_cache_key(CITY),
+        json.dumps({"城市": CITY, "天气": "晴", "最低气温": "20°C", "最高气温": "24°C"}),
+    )
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def user_with_history(make_user):
+    """收藏了 3 道未入索引的菜品（HISTORY_SCORE 高于 BAND_SCORE）的用户"""
+    user = await make_user()
+    async with SessionFactory() as session:
+        dishes = DishRepository(session)
+        repository = CollectionRepository(session)
+        item = await repository.create({"name": f"推荐-{user.id.hex}"}, user)
+        for _ in range(3):
+            dish = await dishes.create({"name": f"推荐收藏-{uuid.uuid4().hex[:8]}"})
+            await repository.add_dish_to_collection(item.id, dish.id, user)
+    return user
+
+
+async def _recommend(redis, user, limit: int):
+    async with SessionFactory() as session:
+        service = RecommendationService(CollectionRepository(session), redis, client=None)
+        return await service.recommend(CITY, user, limit=limit)
+
+
+async def _index_spring_dishes(redis, count: int) -> list[int]:
+    async with SessionFactory() as session:
+        dishes = DishRepository(session)
+        created = [
+            await dishes.create({"name": f"春笋-{uuid.uuid4().hex[:8]}"}) for _ in range(count)
+        ]
+    await index_dishes(redis, [(d.id, d.name, d.description) for d in created])
+    return [d.id for d in created]
+
+
+async def test_missing_summaries_are_overfetched(redis, user_with_history):
+    spring = await _index_spring_dishes(redis, 2)
+
+    response = await _recommend(redis, user_with_history, limit=2)
+
+    assert [d.id for d in response.dishes] == sorted(spring)
+
+
+async def test_cache_key_follows_index_version(redis, user_with_history):
+    spring = await _index_spring_dishes(redis, 1)
+    await _recommend(redis, user_with_history, limit=1)
+    old_version = await redis.get(INDEX_VERSION_KEY)
+    old_key = recommendation_cache_key(user_with_history.id, old_version)
+    assert await redis.hkeys(old_key) == ["sunny:mild:1"]
+
+    await index_dish(redis, spring[0], "春卷", None)
+    response = await _recommend(redis, user_with_history, limit=1)
+    new_key = recommendation_cache_key(
+        user_with_history.id, await redis.get(INDEX_VERSION_KEY)
+    )
+
+    # 新版本写入新 hash，旧 hash 不再增长，只等 TTL 过期
+    assert new_key != old_key
+    assert await redis.hkeys(new_key) == ["sunny:mild:1"]
+    assert await redis.hkeys(old_key) == ["sunny:mild:1"]
+    assert await redis.ttl(old_key) > 0
+    assert response.dishes[0].name == "春卷"
+
+    await invalidate_user_recommendations(redis, user_with_history.id)
+    assert not await redis.exists(new_key)
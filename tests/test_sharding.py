@@ -0,0 +1,143 @@
+# tests/test_sharding.py
+"""用多个 SQLite 文件充当分片：收藏按用户落到所属分片，增加分片后只迁移放错的用户"""
+import uuid
+from collections import Counter
+
+import pytest
+from sqlalchemy import func, select
+
+from src.collections import rebalance
+from src.collections.model import Collection
+from src.collections.repository import CollectionRepository
+from src.core.database import SessionFactory
+from src.core.exception import NotFoundException
+from src.core.sharding import ShardRouter, jump_hash
+from src.dishes.repository import DishRepository
+
+pytestmark = [pytest.mark.anyio, pytest.mark.usefixtures("tables")]
+
+USERS = 12
+
+
+def _urls(tmp_path, count: int) -> list[str]:
+    return [f"sqlite+aiosqlite:///{tmp_path / f'shard{i}.sqlite3'}" for i in range(count)]
+
+
+async def _counts(router: ShardRouter) -> list[int]:
+    async def count(session):
+        return await session.scalar(select(func.count()).select_from(rebalance.collections_table))
+
+    return await router.map(count)
+
+
+@pytest.fixture
+async def router(tmp_path):
+    router = ShardRouter(_urls(tmp_path, 3))
+    await rebalance.init_shards(router)
+    yield router
+    await router.dispose()
+
+
+@pytest.fixture
+async def dish_ids(tables):
+    async with SessionFactory() as session:
+        repository = DishRepository(session)
+        dishes = [
+            await repository.create({"name": f"分片菜品-{uuid.uuid4().hex[:8]}"})
+            for _ in range(2)
+        ]
+        return [dish.id for dish in dishes]
+
+
+def test_jump_hash_only_moves_keys_to_the_new_bucket():
+    moved = 0
+    for key in range(10_000):
+        before, after = jump_hash(key, 4), jump_hash(key, 5)
+        assert after in (before, 4)
+        moved += after != before
+    # 期望迁移 1/5
+    assert 1_700 < moved < 2_300
+    assert max(Counter(jump_hash(key, 4) for key in range(10_000)).values()) < 2_800
+
+
+async def test_collections_live_on_the_user_shard(router, make_user, dish_ids):
+    users = [await make_user() for _ in range(USERS)]
+    created = {}
+    for user in users:
+        async with (
+            router.session_factory_for(user.id)() as session,
+            SessionFactory() as catalog,
+        ):
+            repository = CollectionRepository(session, catalog=catalog)
+            item = await repository.create({"name": f"分片收藏-{user.id.hex}"}, user)
+            await repository.add_dish_to_collection(item.id, dish_ids[0], user)
+            created[item.id] = user
+
+    assert len(created) == USERS  # 发号表保证 id 全局唯一
+    counts = await _counts(router)
+    assert sum(counts) == USERS
+    expected = Counter(router.shard_of(user.id) for user in users)
+    assert counts == [expected[shard] for shard in range(len(router))]
+
+    for item_id, user in created.items():
+        async with (
+            router.session_factory_for(user.id)() as session,
+            SessionFactory() as catalog,
+        ):
+            item = await CollectionRepository(session, catalog=catalog).get_by_id(item_id, user)
+            # 菜品从主库读取后拼装
+            assert [dish.id for dish in item.dishes] == [dish_ids[0]]
+
+    # 其他用户看不到
+    (first_id, owner), (_, other) = list(created.items())[:2]
+    async with (
+        router.session_factory_for(other.id)() as session,
+        SessionFactory() as catalog,
+    ):
+        with pytest.raises(NotFoundException):
+            await CollectionRepository(session, catalog=catalog).get_by_id(first_id, other)
+
+
+async def test_rebalance_moves_only_misplaced_users(router, tmp_path, make_user, dish_ids):
+    users = [await make_user() for _ in range(USERS)]
+    for user in users:
+        async with (
+            router.session_factory_for(user.id)() as session,
+            SessionFactory() as catalog,
+        ):
+            repository = CollectionRepository(session, catalog=catalog)
+            item = await repository.create({"name": f"待迁移-{user.id.hex}"}, user)
+            await repository.add_dish_to_collection(item.id, dish_ids[1], user)
+    total = sum(await _counts(router))
+
+    grown = ShardRouter(_urls(tmp_path, 4))
+    try:
+        await grown.create_tables(rebalance.SHARD_TABLES)
+        sources = [
+            rebalance.Source(url, factory, shard)
+            for shard, (url, factory) in enumerate(zip(grown.urls, grown.session_factories))
+        ]
+        misplaced = sum(count for _, count in await rebalance.shard_status(grown))
+        expected = sum(1 for user in users if grown.shard_of(user.id) == 3)
+        assert misplaced == expected
+
+        moved = await rebalance.rebalance(grown, sources, batch_size=1)
+        assert sum(moved.values()) == expected
+        status = await rebalance.shard_status(grown)
+        assert [misplaced for _, misplaced in status] == [0, 0, 0, 0]
+        assert sum(count for count, _ in status) == total
+        # 重跑无事可做
+        assert await rebalance.rebalance(grown, sources) == {}
+
+        # 迁移后的收藏（含菜品关联）在新分片上可读
+        for user in users:
+            async with (
+                grown.session_factory_for(user.id)() as session,
+                SessionFactory() as catalog,
+            ):
+                items, _ = await CollectionRepository(session, catalog=catalog).get_all(
+                    current_user=user
+                )
+                assert [[dish.id for dish in item.dishes] for item in items] == [[dish_ids[1]]]
+    finally:
+        await grown.dispose()
@@ -0,0 +1,96 @@
+# tests/test_similarity.py
+"""相似菜品索引：增删查、空行复用与截断、多实例（多 worker）共享文件时的重新映射"""
+import numpy as np
+import pytest
+
+from src.dishes.similarity import INITIAL_CAPACITY, SimilarityIndex
+
+DISHES = [
+    (1, "红烧肉", "五花肉慢炖，酱香浓郁"),
+    (2, "红烧排骨", "排骨酱香浓郁"),
+    (3, "清蒸鲈鱼", "鲜嫩清淡"),
+    (4, "酸菜鱼", "酸辣开胃的鱼片"),
+]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "similarity" / "dishes"
+
+
+@pytest.fixture
+def index(path):
+    index = SimilarityIndex(path, dimensions=64)
+    index.rebuild(DISHES)
+    return index
+
+
+def _ids(results) -> list[int]:
+    return [dish_id for dish_id, _ in results]
+
+
+def test_query_ranks_by_cosine_similarity(index):
+    results = index.query("红烧肉", "酱香浓郁", limit=2)
+    assert _ids(results) == [1, 2]
+    assert 0 < results[1][1] < results[0][1] <= 1.0 + 1e-6
+
+
+def test_query_excludes_self_and_keeps_limit(index):
+    assert _ids(index.query("红烧肉", "五花肉慢炖，酱香浓郁", limit=1, exclude=1)) == [2]
+    assert index.query("", None, limit=3) == []
+
+
+def test_upsert_updates_existing_row_in_place(index):
+    index.upsert(3, "红烧鲈鱼", "酱香浓郁")
+    assert index.count == len(DISHES)
+    assert 3 in _ids(index.query("红烧", "酱香浓郁", limit=3))
+    # 文档频率随更新调整，与全量重建一致
+    rebuilt = SimilarityIndex(index.path.parent / "rebuilt", dimensions=64)
+    rebuilt.rebuild([DISHES[0], DISHES[1], (3, "红烧鲈鱼", "酱香浓郁"), DISHES[3]])
+    assert np.array_equal(index.df, rebuilt.df)
+
+
+def test_removed_rows_are_reused_and_trailing_rows_trimmed(index):
+    index.remove(2)
+    assert index.count == len(DISHES)
+    assert 2 not in _ids(index.query("红烧排骨", None, limit=4))
+
+    # 新菜品复用空行，扫描行数不增长
+    index.upsert(5, "红烧鸡块", "酱香浓郁")
+    assert index.count == len(DISHES)
+    assert int(index.ids[1]) == 5
+
+    # 末尾的空行被截掉
+    index.remove_many([4, 3])
+    assert index.count == 2
+    index.remove_many([1, 5])
+    assert index.count == 0
+    assert index.query("红烧肉", None) == []
+    assert not index.df.any()
+
+
+def test_other_instance_sees_growth_and_removals(path, index):
+    other = SimilarityIndex(path, dimensions=64)
+    extra = [(100 + i, f"红烧肉{i}", "酱香浓郁") for i in range(INITIAL_CAPACITY)]
+    other.upsert_many(extra)
+
+    # 另一个实例扩容后，本实例查询时重新映射到新的文件大小
+    assert index.count == len(DISHES) + len(extra)
+    assert _ids(index.query("红烧肉7", "酱香浓郁", limit=1)) == [107]
+    assert index.vectors.shape[0] >= index.count
+
+    # 本实例写入前按代数重新同步行号与空行，复用对方删除留下的空行
+    other.remove(1)
+    index.upsert(5000, "干锅花菜", None)
+    assert int(index.ids[0]) == 5000
+    assert _ids(other.query("干锅花菜", None, limit=1)) == [5000]
+
+
+def test_reopen_reads_persisted_index(path, index):
+    index.remove(4)
+    index.flush()
+    reopened = SimilarityIndex(path, dimensions=64)
+    assert reopened.count == 3
+    assert _ids(reopened.query("红烧肉", "酱香浓郁", limit=3))[:2] == [1, 2]
+    with pytest.raises(ValueError):
+        SimilarityIndex(path, dimensions=32)
@@ -0,0 +1,151 @@
+# tests/test_tasks.py
+"""后台任务：任务状态只对发起者与超级用户可见；worker 的重试、死信与接管遗留消息"""
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from src.core.config import settings
+from src.core.exception import NotFoundException
+from src.tasks.queue import (
+    DEAD_LETTER_KEY,
+    DELAYED_KEY,
+    GROUP_NAME,
+    STREAM_KEY,
+    STREAM_MAX_LEN,
+    enqueue,
+    get_job,
+)
+from src.tasks.registry import task
+from src.tasks.router import get_task
+from src.tasks.worker import Worker
+
+pytestmark = pytest.mark.anyio
+
+calls: dict[str, int] = {}
+
+
+@task("test.flaky", max_retries=2, backoff=0.0)
+async def flaky(ctx, *, key: str):
+    """第一次失败，之后成功"""
+    calls[key] = calls.get(key, 0) + 1
+    if calls[key] == 1:
+        raise RuntimeError("暂时失败")
+    return calls[key]
+
+
+@task("test.broken", max_retries=1, backoff=0.0)
+async def broken(ctx):
+    raise RuntimeError("永久失败")
+
+
+@task("test.ok")
+async def ok(ctx):
+    return "done"
+
+
+@pytest.fixture
+async def redis():
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def worker(redis):
+    worker = Worker(redis, concurrency=4, mode="asyncio", consumer="worker-1")
+    await worker._ensure_group()
+    yield worker
+    if worker._running:
+        await asyncio.gather(*worker._running)
+
+
+def _user(*, superuser: bool = False):
+    return SimpleNamespace(id=uuid.uuid4(), is_superuser=superuser)
+
+
+async def _read(redis, consumer: str = "worker-1") -> tuple[str, str]:
+    response = await redis.xreadgroup(GROUP_NAME, consumer, {STREAM_KEY: ">"}, count=1)
+    [(_stream, [(message_id, fields)])] = response
+    return message_id, fields["id"]
+
+
+async def _pending(redis) -> int:
+    return (await redis.xpending(STREAM_KEY, GROUP_NAME))["pending"]
+
+
+async def test_task_visible_to_owner_and_superuser_only(redis):
+    owner = _user()
+    job_id = await enqueue(redis, "test.ok", owner_id=owner.id)
+
+    assert (await get_task(job_id, redis=redis, current_user=owner))["id"] == job_id
+    assert await get_task(job_id, redis=redis, current_user=_user(superuser=True))
+    with pytest.raises(NotFoundException):
+        await get_task(job_id, redis=redis, current_user=_user())
+
+    # 未指定发起者的任务只有超级用户能查询
+    system_job = await enqueue(redis, "test.ok")
+    with pytest.raises(NotFoundException):
+        await get_task(system_job, redis=redis, current_user=owner)
+    assert await get_task(system_job, redis=redis, current_user=_user(superuser=True))
+
+
+async def test_failed_job_is_retried_via_delayed_set(redis, worker):
+    key = uuid.uuid4().hex
+    job_id = await enqueue(redis, "test.flaky", key=key)
+
+    await worker._process(*await _read(redis))
+    job = await get_job(redis, job_id)
+    assert (job["status"], job["attempts"]) == ("retrying", "1")
+    assert "暂时失败" in job["error"]
+    assert await redis.zscore(DELAYED_KEY, job_id) is not None
+    assert await _pending(redis) == 0
+
+    # 到期后重新投递到 stream，第二次执行成功
+    await worker._promote(keys=[DELAYED_KEY, STREAM_KEY], args=[time.time() + 60, STREAM_MAX_LEN])
+    assert await redis.zcard(DELAYED_KEY) == 0
+    await worker._process(*await _read(redis))
+    job = await get_job(redis, job_id)
+    assert (job["status"], job["attempts"], job["result"]) == ("succeeded", "2", 2)
+    assert "error" not in job
+    assert await _pending(redis) == 0
+
+
+async def test_job_out_of_retries_goes_to_dead_letter(redis, worker):
+    job_id = await enqueue(redis, "test.broken")
+
+    await worker._process(*await _read(redis))
+    await worker._promote(keys=[DELAYED_KEY, STREAM_KEY], args=[time.time() + 60, STREAM_MAX_LEN])
+    await worker._process(*await _read(redis))
+
+    job = await get_job(redis, job_id)
+    assert (job["status"], job["attempts"]) == ("failed", "2")
+    assert job["finished_at"]
+    [(_id, fields)] = await redis.xrange(DEAD_LETTER_KEY)
+    assert fields["id"] == job_id and "永久失败" in fields["error"]
+    assert await redis.zcard(DELAYED_KEY) == 0
+    assert await _pending(redis) == 0
+
+
+async def test_unknown_task_is_dead_lettered_without_retry(redis, worker):
+    job_id = await enqueue(redis, "test.missing")
+    await worker._process(*await _read(redis))
+    assert (await get_job(redis, job_id))["status"] == "failed"
+    assert await redis.xlen(DEAD_LETTER_KEY) == 1
+
+
+async def test_stale_message_is_claimed_from_crashed_consumer(redis, worker, monkeypatch):
+    job_id = await enqueue(redis, "test.ok")
+    # 另一个 worker 读到消息后崩溃，消息一直处于未确认状态
+    await _read(redis, consumer="crashed")
+    assert await _pending(redis) == 1
+
+    monkeypatch.setattr(settings, "task_claim_idle_ms", 0)
+    await worker._claim_stale()
+    await asyncio.gather(*worker._running)
+
+    assert (await get_job(redis, job_id))["status"] == "succeeded"
+    assert await _pending(redis) == 0
@@ -0,0 +1,98 @@
+# tests/test_write_statements.py
+"""写路径基于 INSERT / UPDATE ... RETURNING：每次修改一条语句取回结果，提交后不再 refresh"""
+import uuid
+
+import pytest
+
+from src.collections.repository import CollectionRepository
+from src.core.database import SessionFactory
+from src.dishes.repository import DishRepository
+
+pytestmark = [pytest.mark.anyio, pytest.mark.usefixtures("tables")]
+
+
+@pytest.fixture
+async def user(make_user):
+    return await make_user()
+
+
+@pytest.fixture
+async def dishes(tables):
+    async with SessionFactory() as session:
+        repository = DishRepository(session)
+        return [
+            await repository.create({"name": f"写路径-{uuid.uuid4().hex[:8]}"})
+            for _ in range(3)
+        ]
+
+
+def _verbs(statements: list[str]) -> list[str]:
+    return [statement.split(None, 1)[0].upper() for statement in statements]
+
+
+async def test_dish_create_is_one_insert_returning(count_statements):
+    async with SessionFactory() as session:
+        with count_statements() as statements:
+            dish = await DishRepository(session).create({"name": f"新菜-{uuid.uuid4().hex[:8]}"})
+    assert _verbs(statements) == ["INSERT"]
+    assert "RETURNING" in statements[0]
+    assert dish.id and dish.created_at is not None
+
+
+async def test_dish_update_is_one_update_returning(dishes, count_statements):
+    async with SessionFactory() as session:
+        with count_statements() as statements:
+            dish = await DishRepository(session).update({"description": "改"}, dishes[0].id)
+    assert _verbs(statements) == ["UPDATE"]
+    assert dish.description == "改"
+
+
+async def test_dish_update_missing_returns_none(count_statements):
+    async with SessionFactory() as session:
+        with count_statements() as statements:
+            assert await DishRepository(session).update({"description": "改"}, 10**9) is None
+    assert _verbs(statements) == ["UPDATE"]
+
+
+async def test_collection_create_is_one_insert_returning(user, count_statements):
+    async with SessionFactory() as session:
+        with count_statements() as statements:
+            item = await CollectionRepository(session).create({"name": "新收藏"}, user)
+    assert _verbs(statements) == ["INSERT"]
+    assert item.dishes == []
+
+
+async def test_collection_update_reloads_dishes_once(user, dishes, count_statements):
+    async with SessionFactory() as session:
+        repository = CollectionRepository(session)
+        item = await repository.create({"name": "待更新"}, user)
+        await repository.add_dish_to_collection(item.id, dishes[0].id, user)
+    async with SessionFactory() as session:
+        with count_statements() as statements:
+            item = await CollectionRepository(session).update({"note": "备注"}, item.id, user)
+    # UPDATE ... RETURNING + 一次 selectin 加载 dishes
+    assert _verbs(statements) == ["UPDATE", "SELECT"]
+    assert item.note == "备注" and [dish.id for dish in item.dishes] == [dishes[0].id]
+
+
+async def test_add_and_remove_dish_do_not_refresh(user, dishes, count_statements):
+    async with SessionFactory() as session:
+        item = await CollectionRepository(session).create({"name": "增删菜品"}, user)
+
+    async with SessionFactory() as session:
+        with count_statements() as statements:
+            item = await CollectionRepository(session).add_dish_to_collection(
+                item.id, dishes[1].id, user
+            )
+    # UPDATE 时间戳 + selectin dishes + 查询菜品 + INSERT 关联
+    assert _verbs(statements) == ["UPDATE", "SELECT", "SELECT", "INSERT"]
+    assert [dish.id for dish in item.dishes] == [dishes[1].id]
+
+    async with SessionFactory() as session:
+        with count_statements() as statements:
+            item = await CollectionRepository(session).remove_dish_from_collection(
+                item.id, dishes[1].id, user
+            )
+    # UPDATE 时间戳 + selectin dishes + DELETE 关联
+    assert _verbs(statements) == ["UPDATE", "SELECT", "DELETE"]
+    assert item.dishes == []